@@ -32,6 +32,14 @@ mod.setting("marithime_context_paste_key", type=str, default="ctrl-v", desc="The
 mod.setting("marithime_indexing_strategy", type=str, default="", desc="Determine what strategy we should use to begin reindexing documents")
 mod.setting("marithime_remove_stutters_in_same_phrase", type=int, default=0, desc="Enables or disables the removal of words that repeat after one another")
 
+# Options - "" (default) - Expand matches branch by branch in match trees
+#         - alignment - Expand matches with a dynamic programming alignment of the query and the buffer
+mod.setting("marithime_matcher_engine", type=str, default="", desc="Determine what engine we should use to match phrases in the document")
+
+# Options - "" (default) - Search the windows of the document from the nearest to the furthest away from the cursor
+#         - best_first - Search the windows with the highest possible scores first, skipping windows that cannot improve the matches
+mod.setting("marithime_matcher_window_search", type=str, default="", desc="Determine in what order we should search through the windows of the document")
+
 ctx.tags = ["user.marithime_available"]
 ctx.lists["user.marithime_terminator_word"] = [
 #    "over",
@@ -1,6 +1,7 @@
 import os
 from talon import Context, Module, fs, settings, app
 from .phonetics import PhoneticSearch
+from .persistence import SimilarityFileWriter
 
 cwd = os.path.dirname(os.path.realpath(__file__))
 
@@ -9,6 +10,9 @@ mod = Module()
 current_language = None
 
 phonetic_search = PhoneticSearch()
+homophones_writer = None
+phonetics_writer = None
+semantics_writer = None
 
 def update_language(language: str):
     global current_language
@@ -24,6 +28,14 @@ def update_language(language: str):
         global phonetics_file
         global semantics_file
         global phonetic_search
+        global homophones_writer
+        global phonetics_writer
+        global semantics_writer
+
+        # Make sure the learned similarities of the previous language are persisted
+        for writer in [homophones_writer, phonetics_writer, semantics_writer]:
+            if writer is not None:
+                writer.flush()
 
         postfix = "" if language == "en" else "_" + language
         homophones_file = os.path.join(cwd, "lists", "homophones" + postfix + ".csv")
@@ -45,22 +57,20 @@ def update_language(language: str):
             with open(semantics_file) as f:
                 semantics_content = f.read()
 
-        phonetic_search.set_homophones(homophones_content, lambda content, file_location=homophones_file: write_file(file_location, content))
-        phonetic_search.set_phonetic_similiarities(phonetics_content, lambda content, file_location=phonetics_file: write_file(file_location, content))
-        phonetic_search.set_semantic_similarities(semantics_content, lambda content, file_location=semantics_file: write_file(file_location, content))
+        homophones_writer = SimilarityFileWriter(homophones_file, cwd, lambda: phonetic_search.homophones.to_contents())
+        phonetics_writer = SimilarityFileWriter(phonetics_file, cwd, lambda: phonetic_search.phonetic_similarities.to_contents())
+        semantics_writer = SimilarityFileWriter(semantics_file, cwd, lambda: phonetic_search.semantic_similarities.to_contents())
+        phonetic_search.set_homophones(homophones_content, homophones_writer.append_row)
+        phonetic_search.set_phonetic_similiarities(phonetics_content, phonetics_writer.append_row)
+        phonetic_search.set_semantic_similarities(semantics_content, semantics_writer.append_row)
         phonetic_search.set_language(language)
 
 settings.register("speech.language", update_language)
 app.register("ready", lambda: update_language( settings.get("speech.language") ))
 
-def write_file(file_location: str, content: str):
-    # Only write the file if it is inside of the phonetics directory for security reasons
-    if file_location.startswith(cwd):
-        with open(file_location, "w") as file:
-            file.write(content)
-
 def reload_homophones(name, flags):
-    if name != homophones_file:
+    # Changes made by our own writer are already known, so they do not need to be parsed again
+    if name != homophones_file or (homophones_writer is not None and homophones_writer.is_own_write()):
         return
 
     contents = ""
@@ -72,7 +82,8 @@ def reload_homophones(name, flags):
     phonetic_search.set_homophones(contents)
 
 def reload_phonetic_similarities(name, flags):
-    if name != phonetics_file:
+    # Changes made by our own writer are already known, so they do not need to be parsed again
+    if name != phonetics_file or (phonetics_writer is not None and phonetics_writer.is_own_write()):
         return
 
     contents = ""
@@ -84,7 +95,8 @@ def reload_phonetic_similarities(name, flags):
     phonetic_search.set_phonetic_similiarities(contents)
 
 def reload_semantic_similarities(name, flags):
-    if name != semantics_file:
+    # Changes made by our own writer are already known, so they do not need to be parsed again
+    if name != semantics_file or (semantics_writer is not None and semantics_writer.is_own_write()):
         return
 
     contents = ""
@@ -102,7 +114,7 @@ def reload_files(name, flags):
             reload_homophones(name, flags)
         elif name == phonetics_file:
             reload_phonetic_similarities(name, flags)
-        elif name == phonetics_file:
+        elif name == semantics_file:
             reload_semantic_similarities(name, flags)
 
 fs.watch(cwd, reload_files)
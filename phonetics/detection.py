@@ -1,6 +1,8 @@
 import re
+from collections import OrderedDict
+from typing import Dict
 from .languages import english, dutch, german
-from ..utils.levenshtein import levenshtein
+from ..utils.levenshtein import levenshtein, bounded_levenshtein, levenshtein_many
 
 # These values have been calculated with some deduction
 # And testing using expectations with a set of up to 5 word matches
@@ -23,11 +25,94 @@ SYLLABLE_COUNT_METHODS = {
     'de': german.syllable_count,   
 }
 
+# The amount of words kept per language before the least recently used ones are evicted
+DEFAULT_PHONETIC_CACHE_SIZE = 20000
+
+# Bounded least recently used cache for phonetic normalizations and syllable counts
+# The same words are normalized over and over again during matching, so we only want to do the string munging once
+# Entries are kept per language and keyed by ( word, strictness ), where a strictness of None denotes a syllable count
+class PhoneticCache:
+    max_size: int
+    languages: Dict[str, OrderedDict]
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __init__(self, max_size: int = DEFAULT_PHONETIC_CACHE_SIZE):
+        self.max_size = max_size
+        self.languages = {}
+        self.reset_stats()
+
+    def get(self, language: str, word: str, strict: bool = None):
+        entries = self.languages.get(language)
+        key = (word, strict)
+        if entries is not None and key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+
+        self.misses += 1
+        return None
+
+    def set(self, language: str, word: str, strict: bool, value):
+        if self.max_size <= 0:
+            return
+
+        if language not in self.languages:
+            self.languages[language] = OrderedDict()
+        entries = self.languages[language]
+        entries[(word, strict)] = value
+        entries.move_to_end((word, strict))
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_max_size(self, max_size: int):
+        self.max_size = max_size
+        for language in list(self.languages.keys()):
+            entries = self.languages[language]
+            while len(entries) > max(0, max_size):
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    # Remove the entries of a single language, or all of them if no language is given
+    def invalidate(self, language: str = None):
+        if language is None:
+            self.languages = {}
+        elif language in self.languages:
+            del self.languages[language]
+
+    def size(self, language: str = None) -> int:
+        if language is not None:
+            return len(self.languages[language]) if language in self.languages else 0
+        return sum([len(entries) for entries in self.languages.values()])
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size(),
+            "hit_rate": 0.0 if lookups == 0 else self.hits / lookups
+        }
+
+phonetic_cache = PhoneticCache()
+
 def phonetic_normalize(word: str, strict = True, language: str = 'en') -> str:
-    normalize_method = PHONETIC_NORMALIZE_METHODS['en']
-    if language in PHONETIC_NORMALIZE_METHODS:
-        normalize_method = PHONETIC_NORMALIZE_METHODS[language]
-    return normalize_method(normalize_text(word), strict)
+    normalized = phonetic_cache.get(language, word, strict)
+    if normalized is None:
+        normalize_method = PHONETIC_NORMALIZE_METHODS['en']
+        if language in PHONETIC_NORMALIZE_METHODS:
+            normalize_method = PHONETIC_NORMALIZE_METHODS[language]
+        normalized = normalize_method(normalize_text(word), strict)
+        phonetic_cache.set(language, word, strict, normalized)
+    return normalized
 
 def get_phonetic_distance(a: str, b:str, strict = True, language: str = 'en') -> int:
     normalized_a = phonetic_normalize(normalize_text(a), strict, language)
@@ -50,7 +135,11 @@ def detect_phonetic_fix_type(a: str, b:str, language: str = 'en') -> str:
 
 # Roughly calculate the amount of syllables in a word
 def syllable_count(a: str, language: str = 'en') -> int:
-    count_method = SYLLABLE_COUNT_METHODS['en']
-    if language in SYLLABLE_COUNT_METHODS:
-        count_method = SYLLABLE_COUNT_METHODS[language]
-    return count_method(a)
+    count = phonetic_cache.get(language, a)
+    if count is None:
+        count_method = SYLLABLE_COUNT_METHODS['en']
+        if language in SYLLABLE_COUNT_METHODS:
+            count_method = SYLLABLE_COUNT_METHODS[language]
+        count = count_method(a)
+        phonetic_cache.set(language, a, None, count)
+    return count
@@ -0,0 +1,98 @@
+from typing import Dict, List, Tuple
+
+# Groups words that are interchangeable, like homophones, into equivalence classes
+# Every line of comma separated words is a class, and lines that share a word are merged together using union-find
+# The classes can only be changed by adding new equivalences, lookups return copies so they cannot change the index
+class EquivalenceIndex:
+    class_indices: Dict[str, int]
+    class_words: List[Tuple[str, ...]]
+
+    def __init__(self, contents: str = ""):
+        parents = {}
+        words_in_order = []
+
+        def find(word: str) -> str:
+            while parents[word] != word:
+                parents[word] = parents[parents[word]]
+                word = parents[word]
+            return word
+
+        for line in contents.splitlines():
+            words = [word for word in line.rstrip().split(",") if word != ""]
+            root = None
+            for word in words:
+                lowercase_word = word.lower()
+                if lowercase_word not in parents:
+                    parents[lowercase_word] = lowercase_word
+                    words_in_order.append(word)
+                if root is None:
+                    root = find(lowercase_word)
+                else:
+                    parents[find(lowercase_word)] = root
+
+        # Flatten the classes so every lookup is a single dictionary access
+        self.class_indices = {}
+        self.class_words = []
+        words_per_root = {}
+        for word in words_in_order:
+            root = find(word.lower())
+            if root not in words_per_root:
+                words_per_root[root] = []
+            words_per_root[root].append(word)
+
+        for root, words in words_per_root.items():
+            class_index = len(self.class_words)
+            self.class_words.append(tuple(words))
+            for word in words:
+                self.class_indices[word.lower()] = class_index
+
+    # Get the other words in the class of the given word, in the order they were found
+    # A new list is returned so it can be changed without affecting the index
+    def find(self, word: str) -> List[str]:
+        word = word.lower()
+        if word in self.class_indices:
+            return [other_word for other_word in self.class_words[self.class_indices[word]] if other_word.lower() != word]
+        return []
+
+    # Constant time check whether two different words are in the same class
+    def are_equivalent(self, word_a: str, word_b: str) -> bool:
+        word_a = word_a.lower()
+        word_b = word_b.lower()
+        if word_a == word_b or word_a not in self.class_indices:
+            return False
+        return self.class_indices[word_a] == self.class_indices.get(word_b, -1)
+
+    # Make two words equivalent, merging their classes if they both already exist
+    # Returns whether or not the index has changed
+    def add(self, word_a: str, word_b: str) -> bool:
+        if word_a.lower() == word_b.lower() or self.are_equivalent(word_a, word_b):
+            return False
+
+        class_index_a = self.class_indices.get(word_a.lower(), -1)
+        class_index_b = self.class_indices.get(word_b.lower(), -1)
+        if class_index_a == -1 and class_index_b == -1:
+            class_index_a = len(self.class_words)
+            self.class_words.append((word_a, word_b))
+            self.class_indices[word_a.lower()] = class_index_a
+            self.class_indices[word_b.lower()] = class_index_a
+        elif class_index_b == -1:
+            self.class_words[class_index_a] += (word_b,)
+            self.class_indices[word_b.lower()] = class_index_a
+        elif class_index_a == -1:
+            self.class_words[class_index_b] += (word_a,)
+            self.class_indices[word_a.lower()] = class_index_b
+
+        # Move the words of the second class over to the first, leaving the second class empty
+        else:
+            for word in self.class_words[class_index_b]:
+                self.class_indices[word.lower()] = class_index_a
+            self.class_words[class_index_a] += self.class_words[class_index_b]
+            self.class_words[class_index_b] = ()
+        return True
+
+    # Write every class as a single line of comma separated words
+    def to_contents(self) -> str:
+        return "\n".join([",".join(words) for words in self.class_words if len(words) > 0])
+
+    def __len__(self) -> int:
+        return len(self.class_indices)
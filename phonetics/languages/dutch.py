@@ -1,44 +1,49 @@
 import unicodedata
 import re
+from .rule_engine import PhoneticRuleEngine, PREFIX_RULES
 
 # Does a very coarse - unprecise transformation to some sort of phonetic normalization
 # A lot of assumptions are made here that don't equate to all methods
+# The rules are applied in order, as if every rule was a separate str.replace call
+
+# One to one phoneme connection
+ONE_TO_ONE_RULES = [
+    ("ph", "f"),
+    ("cks", "x"), ("ks", "x"),
+    ("schr", "sr"), ("sh", "sj"),
+    ("jou", "zju"),
+    ("au", "ou"),
+    ("ij", "ei"),
+    ("th", "t"),
+]
+
+# Very rough normalization ( unvoiced to voiced, slurred etc. )
+LOOSE_RULES = [
+    ("xth", "xf"), ("th", "t"),
+    ("dth", "tt"), ("d", "t"),
+
+    ("fth", "f"), ("v", "f"), ("lth", "lf"),
+    ("b", "p"),
+
+    # Can be cheat ( tj ), chef ( sj ) or chaos ( gaos ), but ist mostly sj
+    (PREFIX_RULES, "ch", [("chao", "gao"), ("ch", "sj")]),
+
+    ("ch", "g"), ("qu", "kw"), ("ck", "k"),
+    ("cr", "kr"), ("kh", "k"), ("m", "n"), ("m", "n"), ("ng", "n"),
+    ("sch", "sg"), ("zh", "sj"), ("z", "s"), ("c", "k"), ("nce", "ns"),
+]
+
+# Deduplication
+DEDUPLICATION_RULES = [
+    ("dd", "d"), ("pp", "p"), ("cc", "k"), ("tt", "t"), ("ss", "s"), ("gg", "g"),
+    ("ck", "k"), ("kk", "k"), ("ff", "f"), ("ll", "l"), ("bb", "b"), ("nn", "n"),
+    ("mm", "m"), ("zz", "z"),
+]
+
+engine = PhoneticRuleEngine(ONE_TO_ONE_RULES + DEDUPLICATION_RULES, ONE_TO_ONE_RULES + LOOSE_RULES + DEDUPLICATION_RULES)
+
 def homophone_normalize(text: str, strict = False) -> str:
-    text = unicodedata.normalize('NFD', text)
-    text = text.encode('ascii', 'ignore')
-    text = text.decode("utf-8")
-
-    # One to one phoneme connection
-    text = text.replace("ph", "f")
-    text = text.replace("cks", "x").replace("ks", "x")
-    text = text.replace("schr", "sr").replace("sh", "sj")
-    text = text.replace("jou", "zju")
-    text = text.replace("au", "ou")
-    text = text.replace("ij", "ei")
-    text = text.replace("th", "t")
-
-    # Very rough normalization ( unvoiced to voiced, slurred etc. )
-    if not strict:
-        text = text.replace("xth", "xf").replace("th", "t")
-        text = text.replace("dth", "tt").replace("d", "t")
-
-        text = text.replace("fth", "f").replace("v", "f").replace("lth", "lf")
-        text = text.replace("b", "p")
-        
-        # Can be cheat ( tj ), chef ( sj ) or chaos ( gaos ), but ist mostly sj
-        if text.startswith("ch"):
-            text = text.replace("chao", "gao").replace("ch", "sj")
-
-        text = text.replace("ch", "g").replace("qu", "kw").replace("ck", "k")
-        text = text.replace("cr", "kr").replace("kh", "k").replace("m", "n").replace("m", "n").replace("ng", "n")
-        text = text.replace("sch", "sg").replace("zh", "sj").replace("z", "s").replace("c", "k").replace("nce", "ns")
-
-    # Deduplication
-    text = text.replace("dd", "d").replace("pp", "p").replace("cc", "k").replace("tt", "t").replace("ss", "s").replace("gg", "g") \
-        .replace("ck", "k").replace("kk", "k").replace("ff", "f").replace("ll", "l").replace("bb", "b").replace("nn", "n") \
-        .replace("mm", "m").replace("zz", "z")
-
-    return text
+    return engine.normalize_strict(text) if strict else engine.normalize_loose(text)
 
 def syllable_count(text: str) -> int:
     marker = "@"
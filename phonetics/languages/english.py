@@ -1,40 +1,46 @@
 import unicodedata
 import re
+from .rule_engine import PhoneticRuleEngine
 
 # Does a very coarse - unprecise transformation to some sort of phonetic normalization
 # A lot of assumptions are made here that don't equate to all methods
+# The rules are applied in order, as if every rule was a separate str.replace call
+
+# One to one phoneme connection
+ONE_TO_ONE_RULES = [
+    ("ph", "f"),
+    ("lve", "lf"), ("ce", "se"),
+    ("cks", "x"), ("ks", "x"),
+    ("who", "ho"), ("wh", "w"),
+    ("tch", "ch"), ("nch", "nsh"),
+    ("kn", "n"),
+    ("wr", "r"),
+]
+
+# Very rough normalization ( unvoiced to voiced, slurred etc. )
+LOOSE_RULES = [
+    ("xth", "xf"), ("th", "t"),
+    ("dth", "tt"), ("dd", "t"), ("d", "t"),
+    ("fth", "f"), ("v", "f"), ("lth", "lf"),
+    ("b", "p"),
+    ("ch", "k"), ("qu", "k"), ("ck", "k"),
+    ("cr", "kr"), ("kh", "k"), ("mm", "n"), ("m", "n"), ("ng", "n"), ("g", "k"),
+    ("sh", "s"), ("zh", "s"), ("z", "s"), ("c", "k"), ("nce", "ns"),
+
+    # Vowels
+    ("an", "en"), ("ap", "ep"), ("akt", "ekt"),
+]
+
+# Deduplication
+DEDUPLICATION_RULES = [
+    ("dd", "d"), ("pp", "p"), ("cc", "k"), ("tt", "t"), ("ss", "s"), ("gg", "g"),
+    ("ck", "k"), ("kk", "k"), ("ff", "f"), ("ll", "l"), ("bb", "b"),
+]
+
+engine = PhoneticRuleEngine(ONE_TO_ONE_RULES + DEDUPLICATION_RULES, ONE_TO_ONE_RULES + LOOSE_RULES + DEDUPLICATION_RULES)
+
 def homophone_normalize(text: str, strict = False) -> str:
-    text = unicodedata.normalize('NFD', text)
-    text = text.encode('ascii', 'ignore')
-    text = text.decode("utf-8")
-
-    # One to one phoneme connection
-    text = text.replace("ph", "f")
-    text = text.replace("lve", "lf").replace("ce", "se")
-    text = text.replace("cks", "x").replace("ks", "x")
-    text = text.replace("who", "ho").replace("wh", "w")
-    text = text.replace("tch", "ch").replace("nch", "nsh")
-    text = text.replace("kn", "n")
-    text = text.replace("wr", "r")
-
-    # Very rough normalization ( unvoiced to voiced, slurred etc. )
-    if not strict:
-        text = text.replace("xth", "xf").replace("th", "t")
-        text = text.replace("dth", "tt").replace("dd", "t").replace("d", "t")
-        text = text.replace("fth", "f").replace("v", "f").replace("lth", "lf")
-        text = text.replace("b", "p")
-        text = text.replace("ch", "k").replace("qu", "k").replace("ck", "k")
-        text = text.replace("cr", "kr").replace("kh", "k").replace("mm", "n").replace("m", "n").replace("ng", "n").replace("g", "k")
-        text = text.replace("sh", "s").replace("zh", "s").replace("z", "s").replace("c", "k").replace("nce", "ns")
-
-        # Vowels
-        text = text.replace("an", "en").replace("ap", "ep").replace("akt", "ekt")
-
-    # Deduplication
-    text = text.replace("dd", "d").replace("pp", "p").replace("cc", "k").replace("tt", "t").replace("ss", "s").replace("gg", "g") \
-        .replace("ck", "k").replace("kk", "k").replace("ff", "f").replace("ll", "l").replace("bb", "b")
-
-    return text
+    return engine.normalize_strict(text) if strict else engine.normalize_loose(text)
 
 # Very rough syllable count
 def syllable_count(text: str) -> int:
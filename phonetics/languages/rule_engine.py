@@ -0,0 +1,152 @@
+import unicodedata
+from typing import List, Tuple, Union, Callable, Set
+
+# A rule table is a list of ( pattern, replacement ) rules that are applied one after the other, like chained str.replace calls
+# A ( PREFIX_RULES, prefix, rule table ) entry only applies its rules if the text starts with the prefix at that point
+# And a ( START_RULE, pattern, replacement ) entry only replaces the pattern at the very start of the text
+PREFIX_RULES = "prefix"
+START_RULE = "start"
+
+RuleTable = List[Union[Tuple[str, str], Tuple[str, str, list]]]
+
+# Applies the rules one by one, used as the reference for the compiled rules
+def apply_rules(rules: RuleTable, text: str) -> str:
+    for rule in rules:
+        if len(rule) == 3:
+            if rule[0] == PREFIX_RULES:
+                if text.startswith(rule[1]):
+                    text = apply_rules(rule[2], text)
+            elif text.startswith(rule[1]):
+                text = rule[2] + text[len(rule[1]):]
+        else:
+            text = text.replace(rule[0], rule[1])
+    return text
+
+# Transforms text with diacritics to plain ascii, skipping the round trip if the text is ascii already
+def to_ascii(text: str) -> str:
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode("utf-8")
+
+# Separate rule sets are compiled for whether the two characters that the most patterns depend on occur in ascii text
+# So the rules that can never match are left out with a single check per character, instead of a check per rule
+MIN_VARIANT_PRUNED_RULES = 4
+
+# A compiled rule set is a flat list of ( pattern, replacement ) steps, that are only applied if the pattern occurs in the text
+# Start and prefix rules are steps with a function as their replacement, which receives the text and returns the changed text
+RuleSteps = List[Tuple[str, Union[str, Callable[[str], str]]]]
+
+# Compiles a rule table into a function that gives the same result as applying the rules one by one
+def compile_rules(rules: RuleTable, ascii_only: bool = True) -> Callable[[str], str]:
+    steps = compile_rule_steps(prune_rules(rules, set(), False)[0])
+
+    # Every text contains the empty string, so an unused variant character always selects the rules where it is present
+    first_character, second_character = (select_variant_characters(rules) + ["", ""])[:2]
+    variants = [
+        [compile_rule_variant(rules, [first_character, second_character]), compile_rule_variant(rules, [first_character])],
+        [compile_rule_variant(rules, [second_character]), compile_rule_variant(rules, [])]
+    ]
+
+    def normalize(text: str) -> str:
+        if not text.isascii():
+            if not ascii_only:
+                return apply_rule_steps(steps, text)
+            text = to_ascii(text)
+        return apply_rule_steps(variants[first_character in text][second_character in text], text)
+    return normalize
+
+def compile_rule_variant(rules: RuleTable, absent_characters: List[str]) -> RuleSteps:
+    absent = set([character for character in absent_characters if len(character) > 0])
+    return compile_rule_steps(prune_rules(rules, absent, True)[0])
+
+# Removes the rules that can never match, because a part of their pattern cannot be in the text at that point
+# A replaced pattern cannot be in the text anymore if no occurrence of it can overlap with its replacement, until a later replacement can add it back
+# Prefix rules only apply to some texts, so only what is absent both with and without their rules stays absent
+# Ascii text does not contain any non-ascii characters either, unless a replacement adds them
+def prune_rules(rules: RuleTable, absent: Set[str], ascii_text: bool) -> Tuple[RuleTable, bool]:
+    pruned = []
+    for rule in rules:
+        pattern = rule[1] if len(rule) == 3 else rule[0]
+        if any([absent_pattern in pattern for absent_pattern in absent]) or (ascii_text and not pattern.isascii()):
+            continue
+
+        if len(rule) == 3 and rule[0] == PREFIX_RULES:
+            prefix_absent = set(absent)
+            prefix_rules, prefix_ascii_text = prune_rules(rule[2], prefix_absent, ascii_text)
+            pruned.append((PREFIX_RULES, rule[1], prefix_rules))
+            absent.intersection_update(prefix_absent)
+            ascii_text = ascii_text and prefix_ascii_text
+        else:
+            replacement = rule[-1]
+            absent.difference_update([absent_pattern for absent_pattern in absent if can_overlap(absent_pattern, replacement)])
+            ascii_text = ascii_text and replacement.isascii()
+            if len(rule) == 2 and not can_overlap(pattern, replacement):
+                absent.add(pattern)
+            pruned.append(rule)
+    return pruned, ascii_text
+
+# Whether an occurrence of the pattern can contain, be contained by, or partially overlap with the replacement
+# An empty replacement joins the characters around it, which can form any pattern longer than a single character
+def can_overlap(pattern: str, replacement: str) -> bool:
+    if len(replacement) == 0:
+        return len(pattern) > 1
+    if pattern in replacement or replacement in pattern:
+        return True
+    return any([replacement.startswith(pattern[index:]) or replacement.endswith(pattern[:-index]) for index in range(1, len(pattern))])
+
+# Selects up to two characters whose absence removes the most rules from the table
+def select_variant_characters(rules: RuleTable) -> List[str]:
+    rule_count = len(prune_rules(rules, set(), True)[0])
+    characters = set([character for rule in rules for character in (rule[1] if len(rule) == 3 else rule[0]) if character.isascii()])
+    pruned_counts = [(rule_count - len(prune_rules(rules, set([character]), True)[0]), character) for character in sorted(characters)]
+    pruned_counts.sort(key=lambda pruned_count: pruned_count[0], reverse=True)
+    return [character for pruned_count, character in pruned_counts[:2] if pruned_count >= MIN_VARIANT_PRUNED_RULES]
+
+def compile_rule_steps(rules: RuleTable) -> RuleSteps:
+    steps = []
+    for rule in rules:
+        if len(rule) == 2:
+            steps.append(rule)
+        elif rule[0] == PREFIX_RULES:
+            steps.append((rule[1], compile_prefix_rules(rule[1], compile_rule_steps(rule[2]))))
+        else:
+            steps.append((rule[1], compile_start_rule(rule[1], rule[2])))
+    return steps
+
+def compile_prefix_rules(prefix: str, steps: RuleSteps) -> Callable[[str], str]:
+    def apply_prefix_rules(text: str) -> str:
+        return apply_rule_steps(steps, text) if text.startswith(prefix) else text
+    return apply_prefix_rules
+
+def compile_start_rule(pattern: str, replacement: str) -> Callable[[str], str]:
+    def apply_start_rule(text: str) -> str:
+        return replacement + text[len(pattern):] if text.startswith(pattern) else text
+    return apply_start_rule
+
+def apply_rule_steps(steps: RuleSteps, text: str) -> str:
+    for pattern, replacement in steps:
+        if pattern in text:
+            text = text.replace(pattern, replacement) if isinstance(replacement, str) else replacement(text)
+    return text
+
+# Normalizes text using a compiled set of strict and loose rule tables
+class PhoneticRuleEngine:
+    strict_rules: RuleTable
+    loose_rules: RuleTable
+    ascii_only: bool
+
+    def __init__(self, strict_rules: RuleTable, loose_rules: RuleTable, ascii_only: bool = True):
+        self.strict_rules = strict_rules
+        self.loose_rules = loose_rules
+        self.ascii_only = ascii_only
+        self.normalize_strict = compile_rules(strict_rules, ascii_only)
+        self.normalize_loose = compile_rules(loose_rules, ascii_only)
+
+    def normalize(self, text: str, strict = False) -> str:
+        return self.normalize_strict(text) if strict else self.normalize_loose(text)
+
+    # Slow reference implementation that applies every rule separately
+    def normalize_reference(self, text: str, strict = False) -> str:
+        if self.ascii_only:
+            text = to_ascii(text)
+        return apply_rules(self.strict_rules if strict else self.loose_rules, text)
@@ -0,0 +1,69 @@
+import os
+from talon import cron
+from typing import Callable, List
+
+# Persists learned similarities by appending new rows to the end of their file
+# Writes are debounced so corrections in quick succession result in a single write
+# And every so often the file is compacted to a single row per equivalence class
+class SimilarityFileWriter:
+    file_location: str
+    allowed_directory: str
+    get_compacted_contents: Callable[[], str]
+    pending_rows: List[str]
+    flush_delay: str
+    compact_after_rows: int
+    appended_rows: int = 0
+    flush_job = None
+    written_modification_time: int = -1
+
+    def __init__(self, file_location: str, allowed_directory: str, get_compacted_contents: Callable[[], str], flush_delay: str = "2s", compact_after_rows: int = 100):
+        self.file_location = file_location
+        self.allowed_directory = allowed_directory
+        self.get_compacted_contents = get_compacted_contents
+        self.pending_rows = []
+        self.flush_delay = flush_delay
+        self.compact_after_rows = compact_after_rows
+        self.appended_rows = 0
+        self.flush_job = None
+        self.written_modification_time = -1
+
+    def append_row(self, word: str, replaced_word: str):
+        self.pending_rows.append(word + "," + replaced_word)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flush_job is not None:
+            cron.cancel(self.flush_job)
+        self.flush_job = cron.after(self.flush_delay, self.flush)
+
+    def flush(self):
+        self.flush_job = None
+        if len(self.pending_rows) == 0:
+            return
+
+        # Only write the file if it is inside of the allowed directory for security reasons
+        if not self.file_location.startswith(self.allowed_directory):
+            self.pending_rows = []
+            return
+
+        self.appended_rows += len(self.pending_rows)
+        if self.appended_rows >= self.compact_after_rows or not os.path.exists(self.file_location):
+            with open(self.file_location, "w") as file:
+                file.write(self.get_compacted_contents())
+            self.appended_rows = 0
+        else:
+            # Make sure the rows start on a new line
+            needs_line_ending = False
+            if os.path.getsize(self.file_location) > 0:
+                with open(self.file_location, "rb") as file:
+                    file.seek(-1, os.SEEK_END)
+                    needs_line_ending = file.read(1) != b"\n"
+
+            with open(self.file_location, "a") as file:
+                file.write(("\n" if needs_line_ending else "") + "\n".join(self.pending_rows))
+        self.pending_rows = []
+        self.written_modification_time = os.stat(self.file_location).st_mtime_ns
+
+    # Whether the last change to the file was made by this writer, in which case the contents are already known
+    def is_own_write(self) -> bool:
+        return os.path.exists(self.file_location) and os.stat(self.file_location).st_mtime_ns == self.written_modification_time
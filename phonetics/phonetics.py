@@ -1,5 +1,7 @@
-from typing import List, Callable
-from .detection import detect_phonetic_fix_type, phonetic_normalize, levenshtein, syllable_count, EXACT_MATCH, HOMOPHONE_MATCH, PHONETIC_MATCH
+from typing import List, Callable, Tuple
+import math
+from .equivalence import EquivalenceIndex
+from .detection import detect_phonetic_fix_type, phonetic_normalize, levenshtein, bounded_levenshtein, levenshtein_many, syllable_count, phonetic_cache, EXACT_MATCH, HOMOPHONE_MATCH, PHONETIC_MATCH
 
 class PhoneticSearch:
 
@@ -13,116 +15,87 @@ class PhoneticSearch:
 
     language: str = 'en'
 
-    # The dictionaries containing the mapping for easier finding
-    homophones = None
-    phonetic_similarities = None
-    semantic_similarities = None
+    # Changes whenever the similarities or the language change, so scores calculated earlier can be invalidated
+    version: int = 0
 
-    def set_homophones(self, homophone_content: str, update_callback: Callable[[str], None] = None):
+    # The equivalence classes containing the mapping for easier finding
+    homophones: EquivalenceIndex = None
+    phonetic_similarities: EquivalenceIndex = None
+    semantic_similarities: EquivalenceIndex = None
+
+    def set_homophones(self, homophone_content: str, update_callback: Callable[[str, str], None] = None):
         self.homophone_content = homophone_content
         self.homophones = self.parse_contents(homophone_content)
+        self.version += 1
         if update_callback is not None:
             self.homophone_update = update_callback
 
-    def set_semantic_similarities(self, semantic_content: str, update_callback: Callable[[str], None] = None):
+    def set_semantic_similarities(self, semantic_content: str, update_callback: Callable[[str, str], None] = None):
         self.semantic_similarities_content = semantic_content
         self.semantic_similarities = self.parse_contents(semantic_content)
+        self.version += 1
         if update_callback is not None:
             self.semantics_update = update_callback
 
-    def set_phonetic_similiarities(self, phonetic_similarities_content: str, update_callback: Callable[[str], None] = None):
+    def set_phonetic_similiarities(self, phonetic_similarities_content: str, update_callback: Callable[[str, str], None] = None):
         self.phonetic_similarities_content = phonetic_similarities_content
         self.phonetic_similarities = self.parse_contents(phonetic_similarities_content)
+        self.version += 1
         if update_callback is not None:
             self.phonetic_similarities_update = update_callback
 
     def set_language(self, language: str):
+        # Drop the cached normalizations of the previous language as they will no longer be used
+        if language != self.language:
+            phonetic_cache.invalidate(self.language)
+            self.version += 1
         self.language = language
 
-    def parse_contents(self, contents: str):
-        phones = {}
-        for line in contents.splitlines():
-            words = line.rstrip().split(",")
-
-            # Merge the words with other similarities, but maintain the order in which they are available in the contents
-            merged_words = list(dict.fromkeys(words))
-            for word in words:
-                old_words = phones.get(word.lower(), [])
-                merged_words.extend(old_words)
-            merged_words = list(dict.fromkeys(words))            
-
-            for word in merged_words:
-                phones[word.lower()] = [merged_word for merged_word in merged_words if merged_word != word]
-
-        return phones
+    def parse_contents(self, contents: str) -> EquivalenceIndex:
+        return EquivalenceIndex(contents)
 
+    # Learned similarities are added to the index directly instead of parsing all the contents again
+    # The update callback receives the new row so it can be persisted separately
     def add_homophone(self, word: str, replaced_word: str):
-        new_contents = self.append_to_contents(word, replaced_word, self.homophone_content)
-
-        if self.homophone_update:
-            self.homophone_update(new_contents)
-        else:
-            self.set_homophones(new_contents)
+        if self.homophones.add(word, replaced_word):
+            self.homophone_content = self.append_to_contents(word, replaced_word, self.homophone_content)
+            self.version += 1
+            if self.homophone_update:
+                self.homophone_update(word, replaced_word)
 
     def add_phonetic_similarity(self, word: str, replaced_word: str):
-        new_contents = self.append_to_contents(word, replaced_word, self.phonetic_similarities_content)
-
-        if self.phonetic_similarities_update:
-            self.phonetic_similarities_update(new_contents)
-        else:
-            self.set_phonetic_similiarities(new_contents)
+        if self.phonetic_similarities.add(word, replaced_word):
+            self.phonetic_similarities_content = self.append_to_contents(word, replaced_word, self.phonetic_similarities_content)
+            self.version += 1
+            if self.phonetic_similarities_update:
+                self.phonetic_similarities_update(word, replaced_word)
 
     def add_semantic_similarity(self, word: str, replaced_word: str):
-        new_contents = self.append_to_contents(word, replaced_word, self.semantic_similarities_content)
-
-        if self.semantics_update:
-            self.semantics_update(new_contents)
-        else:
-            self.set_semantic_similarities(new_contents)
+        if self.semantic_similarities.add(word, replaced_word):
+            self.semantic_similarities_content = self.append_to_contents(word, replaced_word, self.semantic_similarities_content)
+            self.version += 1
+            if self.semantics_update:
+                self.semantics_update(word, replaced_word)
 
     def append_to_contents(self, word: str, replaced_word: str, contents: str) -> str:
-        check_word = word.lower()
-        check_replaced_word = replaced_word.lower()
-
-        # Update an existing row
-        if check_word in contents or check_replaced_word in contents:
-            new_contents = ""
-            lines = contents.splitlines()
-            for line in lines:
-                split_line = line.lower().split(",")
-                if check_word in split_line:
-                    new_contents += line + "," + replaced_word + "\n"
-                elif check_replaced_word in split_line:
-                    new_contents += line + "," + word + "\n"
-                else:
-                    new_contents += line + "\n"
-
-        # Add a row to the content
-        else:
-            new_contents = contents
-            if not new_contents.endswith("\n"):
-                new_contents += "\n"
-            new_contents += word + "," + replaced_word
-
-        return new_contents
+        if contents != "" and not contents.endswith("\n"):
+            contents += "\n"
+        return contents + word + "," + replaced_word
 
     def find_homophones(self, word: str) -> List[str]:
-        word = word.lower()
-        if word in self.homophones:
-            return self.homophones[word]
-        return []
+        return self.homophones.find(word)
     
     def find_semantic_similarities(self, word: str) -> List[str]:
-        word = word.lower()
-        if word in self.semantic_similarities:
-            return self.semantic_similarities[word]
-        return []
+        return self.semantic_similarities.find(word)
     
     def find_phonetic_similarities(self, word: str) -> List[str]:
-        word = word.lower()
-        if word in self.phonetic_similarities:
-            return self.phonetic_similarities[word]
-        return []
+        return self.phonetic_similarities.find(word)
+
+    def is_homophone(self, word_a: str, word_b: str) -> bool:
+        return self.homophones.are_equivalent(word_a, word_b)
+
+    def is_semantically_similar(self, word_a: str, word_b: str) -> bool:
+        return self.semantic_similarities.are_equivalent(word_a, word_b)
     
     def get_known_fixes(self, word: str, replaced_word: str):
         return self.find_homophones(word)
@@ -156,49 +129,113 @@ class PhoneticSearch:
         known_fixes = list(dict.fromkeys(known_fixes))
         return known_fixes
     
+    # Get the strict and loose phonetic keys and the syllable count of a word
+    def get_phonetic_keys(self, word: str) -> Tuple[str, str, int]:
+        return (phonetic_normalize(word, True, self.language), phonetic_normalize(word, False, self.language), syllable_count(word, self.language))
+
     # Determine a similarity score
-    def phonetic_similarity_score(self, word_a: str, word_b: str) -> float:
+    # Precomputed ( strict, loose ) phonetic keys can be given for either word to skip the normalization
+    # When a minimum score is given, pairs that cannot reach it are bailed out of early with a score of 0
+    def phonetic_similarity_score(self, word_a: str, word_b: str, phonetics_a: Tuple[str, str] = None, phonetics_b: Tuple[str, str] = None, min_score: float = None) -> float:
         if word_a == word_b:
             return EXACT_MATCH
         else:
             # Match a known homophone
-            homophones = self.find_homophones(word_a)
-            if word_b.lower() in homophones:
+            if self.is_homophone(word_a, word_b):
                 return HOMOPHONE_MATCH
             
-            # Match a known homophone
-            semantic_similarities = self.find_semantic_similarities(word_a)
-            if word_b.lower() in semantic_similarities:
+            # Match a known semantic similarity
+            if self.is_semantically_similar(word_a, word_b):
                 return PHONETIC_MATCH
 
             # Attempt to find an unknown homophone
-            homophone_a = phonetic_normalize(word_a, True, self.language)
-            homophone_b = phonetic_normalize(word_b, True, self.language)
+            homophone_a = phonetic_normalize(word_a, True, self.language) if phonetics_a is None else phonetics_a[0]
+            homophone_b = phonetic_normalize(word_b, True, self.language) if phonetics_b is None else phonetics_b[0]
 
             if homophone_a == homophone_b:
                 return HOMOPHONE_MATCH
             else:
                 # Do fuzzy phonetic matching
-                phonetic_a = phonetic_normalize(word_a, False, self.language)
-                phonetic_b = phonetic_normalize(word_b, False, self.language)
-                phonetics_distance = levenshtein(phonetic_a, phonetic_b)
+                phonetic_a = phonetic_normalize(word_a, False, self.language) if phonetics_a is None else phonetics_a[1]
+                phonetic_b = phonetic_normalize(word_b, False, self.language) if phonetics_b is None else phonetics_b[1]
                 longest_phonetics_length = max(len(phonetic_a), len(phonetic_b))
-                                                   
-                homophone_distance = levenshtein(homophone_a, homophone_b)
                 longest_homophone_length = max(len(homophone_a), len(homophone_b))
 
-                phonetics_score = 0
-                if phonetics_distance < longest_phonetics_length:
-                    phonetics_score = (longest_phonetics_length - phonetics_distance) / longest_phonetics_length
+                # Short words can be scored on their homophone distance alone, so they cannot be bounded
+                is_bounded = min_score is not None and not (len(word_a) <= 3 and len(word_b) <= 3)
+                if is_bounded:
+                    # The phonetic score is at most 1, so the homophone score has to make up the rest of the minimum score
+                    max_homophone_distance = math.floor(longest_homophone_length * (2 - 2 * min_score) + 1e-9)
+                    homophone_distance = bounded_levenshtein(homophone_a, homophone_b, min(max_homophone_distance, longest_homophone_length))
+                    if homophone_distance > max_homophone_distance:
+                        return 0
+                else:
+                    homophone_distance = levenshtein(homophone_a, homophone_b)
 
                 homophone_score = 0
                 if homophone_distance < longest_homophone_length:
                     homophone_score = (longest_homophone_length - homophone_distance ) / longest_homophone_length
 
-                if len(word_a) <= 3 and len(word_b) <= 3 and homophone_distance < phonetics_distance:
-                    return homophone_score
+                if is_bounded:
+                    max_phonetics_distance = math.floor(longest_phonetics_length * (1 - 2 * min_score + homophone_score) + 1e-9)
+                    phonetics_distance = bounded_levenshtein(phonetic_a, phonetic_b, min(max_phonetics_distance, longest_phonetics_length))
+                    if phonetics_distance > max_phonetics_distance:
+                        return 0
                 else:
-                    return (phonetics_score + homophone_score ) / 2
+                    phonetics_distance = levenshtein(phonetic_a, phonetic_b)
+
+                return self.combine_phonetic_distances(word_a, word_b, homophone_distance, longest_homophone_length, phonetics_distance, longest_phonetics_length)
+
+    # Score multiple candidates against a single word in one go, giving the same scores as phonetic_similarity_score( candidate, word )
+    # Precomputed ( strict, loose ) phonetic keys can be given for the candidates to skip the normalization
+    def score_many(self, word: str, candidates: List[str], candidate_phonetics: List[Tuple[str, str]] = None) -> List[float]:
+        scores = [0.0 for _ in candidates]
+        homophone_word = phonetic_normalize(word, True, self.language)
+        phonetic_word = phonetic_normalize(word, False, self.language)
+
+        fuzzy_indices = []
+        homophone_candidates = []
+        phonetic_candidates = []
+        for index, candidate in enumerate(candidates):
+            if candidate == word:
+                scores[index] = EXACT_MATCH
+            elif self.is_homophone(candidate, word):
+                scores[index] = HOMOPHONE_MATCH
+            elif self.is_semantically_similar(candidate, word):
+                scores[index] = PHONETIC_MATCH
+            else:
+                homophone_candidate = phonetic_normalize(candidate, True, self.language) if candidate_phonetics is None else candidate_phonetics[index][0]
+                if homophone_candidate == homophone_word:
+                    scores[index] = HOMOPHONE_MATCH
+                else:
+                    fuzzy_indices.append(index)
+                    homophone_candidates.append(homophone_candidate)
+                    phonetic_candidates.append(phonetic_normalize(candidate, False, self.language) if candidate_phonetics is None else candidate_phonetics[index][1])
+
+        # Calculate all the fuzzy distances at once
+        homophone_distances = levenshtein_many(homophone_word, homophone_candidates)
+        phonetics_distances = levenshtein_many(phonetic_word, phonetic_candidates)
+        for fuzzy_index, index in enumerate(fuzzy_indices):
+            scores[index] = self.combine_phonetic_distances(candidates[index], word,
+                homophone_distances[fuzzy_index], max(len(homophone_candidates[fuzzy_index]), len(homophone_word)),
+                phonetics_distances[fuzzy_index], max(len(phonetic_candidates[fuzzy_index]), len(phonetic_word)))
+
+        return scores
+
+    # Turn the distances between the strict and loose phonetic keys into a score
+    def combine_phonetic_distances(self, word_a: str, word_b: str, homophone_distance: int, longest_homophone_length: int, phonetics_distance: int, longest_phonetics_length: int) -> float:
+        homophone_score = 0
+        if homophone_distance < longest_homophone_length:
+            homophone_score = (longest_homophone_length - homophone_distance ) / longest_homophone_length
+
+        phonetics_score = 0
+        if phonetics_distance < longest_phonetics_length:
+            phonetics_score = (longest_phonetics_length - phonetics_distance) / longest_phonetics_length
+
+        if len(word_a) <= 3 and len(word_b) <= 3 and homophone_distance < phonetics_distance:
+            return homophone_score
+        else:
+            return (phonetics_score + homophone_score ) / 2
 
     def syllable_count(self, word_a: str) -> int:
         return syllable_count(word_a, self.language)
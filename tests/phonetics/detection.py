@@ -1,4 +1,4 @@
-from ...phonetics.detection import detect_phonetic_fix_type
+from ...phonetics.detection import detect_phonetic_fix_type, PhoneticCache
 from ..test import create_test_suite
 
 def test_homophone_detection(assertion):
@@ -20,6 +20,30 @@ def test_phonetic_similarity_detection(assertion):
     assertion("    should match if we replace chase with pace", detect_phonetic_fix_type("chase", "pace") == "phonetic")
     assertion("    should match if we replace that's with that", detect_phonetic_fix_type("that's", "that") == "phonetic")
 
+def test_phonetic_cache(assertion):
+    cache = PhoneticCache(2)
+    assertion("Phonetic cache")
+    assertion("    should not find a word that has not been added", cache.get("en", "where", True) is None)
+    cache.set("en", "where", True, "were")
+    cache.set("en", "where", None, 1)
+    assertion("    should find a normalized word after it has been added", cache.get("en", "where", True) == "were")
+    assertion("    should keep syllable counts separate from normalized words", cache.get("en", "where") == 1)
+    assertion("    should not find the word for a different strictness", cache.get("en", "where", False) is None)
+    assertion("    should not find the word for a different language", cache.get("nl", "where", True) is None)
+    cache.get("en", "where", True)
+    cache.set("en", "wear", True, "wer")
+    assertion("    should evict the least recently used word when the size bound is exceeded", cache.get("en", "where") is None)
+    assertion("    should keep the most recently used word", cache.get("en", "where", True) == "were")
+    cache.set("nl", "waar", True, "waar")
+    cache.invalidate("en")
+    assertion("    should remove all the words of a language after invalidating it", cache.get("en", "wear", True) is None and cache.size("en") == 0)
+    assertion("    should keep the words of other languages after invalidating a language", cache.get("nl", "waar", True) == "waar")
+    stats = cache.get_stats()
+    assertion("    should count the hits", stats["hits"] == 5)
+    assertion("    should count the misses", stats["misses"] == 5)
+    assertion("    should count the evictions", stats["evictions"] == 1)
+
 suite = create_test_suite("Phonetic detection")
 suite.add_test(test_homophone_detection)
-suite.add_test(test_phonetic_similarity_detection)
\ No newline at end of file
+suite.add_test(test_phonetic_similarity_detection)
+suite.add_test(test_phonetic_cache)
\ No newline at end of file
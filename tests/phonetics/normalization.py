@@ -0,0 +1,137 @@
+from ...phonetics.languages import english, dutch, german
+from ..test import create_test_suite
+from typing import List
+import unicodedata
+import time
+import os
+
+words = ["where", "wear", "though", "dough", "thought", "knight", "night", "wrecked", "rekt", "phone", "shoe", "chaos", "chef", "cheat",
+    "schrijven", "jouw", "ijs", "pfeffer", "häuser", "straße", "schön", "müde", "katze", "ensemble", "assemble", "paintbrush",
+    "café", "naïve", "tchotchke", "quick", "whose", "bandwidth", "midday", "ebb", "jazz", "thinking"]
+
+# The chained replacements that the rule tables were made from, kept as a reference for the compiled rules
+def reference_english_normalize(text: str, strict = False) -> str:
+    text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode("utf-8")
+    text = text.replace("ph", "f")
+    text = text.replace("lve", "lf").replace("ce", "se")
+    text = text.replace("cks", "x").replace("ks", "x")
+    text = text.replace("who", "ho").replace("wh", "w")
+    text = text.replace("tch", "ch").replace("nch", "nsh")
+    text = text.replace("kn", "n")
+    text = text.replace("wr", "r")
+    if not strict:
+        text = text.replace("xth", "xf").replace("th", "t")
+        text = text.replace("dth", "tt").replace("dd", "t").replace("d", "t")
+        text = text.replace("fth", "f").replace("v", "f").replace("lth", "lf")
+        text = text.replace("b", "p")
+        text = text.replace("ch", "k").replace("qu", "k").replace("ck", "k")
+        text = text.replace("cr", "kr").replace("kh", "k").replace("mm", "n").replace("m", "n").replace("ng", "n").replace("g", "k")
+        text = text.replace("sh", "s").replace("zh", "s").replace("z", "s").replace("c", "k").replace("nce", "ns")
+        text = text.replace("an", "en").replace("ap", "ep").replace("akt", "ekt")
+
+    text = text.replace("dd", "d").replace("pp", "p").replace("cc", "k").replace("tt", "t").replace("ss", "s").replace("gg", "g") \
+        .replace("ck", "k").replace("kk", "k").replace("ff", "f").replace("ll", "l").replace("bb", "b")
+    return text
+
+def reference_dutch_normalize(text: str, strict = False) -> str:
+    text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode("utf-8")
+    text = text.replace("ph", "f")
+    text = text.replace("cks", "x").replace("ks", "x")
+    text = text.replace("schr", "sr").replace("sh", "sj")
+    text = text.replace("jou", "zju")
+    text = text.replace("au", "ou")
+    text = text.replace("ij", "ei")
+    text = text.replace("th", "t")
+    if not strict:
+        text = text.replace("xth", "xf").replace("th", "t")
+        text = text.replace("dth", "tt").replace("d", "t")
+        text = text.replace("fth", "f").replace("v", "f").replace("lth", "lf")
+        text = text.replace("b", "p")
+        if text.startswith("ch"):
+            text = text.replace("chao", "gao").replace("ch", "sj")
+        text = text.replace("ch", "g").replace("qu", "kw").replace("ck", "k")
+        text = text.replace("cr", "kr").replace("kh", "k").replace("m", "n").replace("m", "n").replace("ng", "n")
+        text = text.replace("sch", "sg").replace("zh", "sj").replace("z", "s").replace("c", "k").replace("nce", "ns")
+
+    text = text.replace("dd", "d").replace("pp", "p").replace("cc", "k").replace("tt", "t").replace("ss", "s").replace("gg", "g") \
+        .replace("ck", "k").replace("kk", "k").replace("ff", "f").replace("ll", "l").replace("bb", "b").replace("nn", "n") \
+        .replace("mm", "m").replace("zz", "z")
+    return text
+
+def reference_german_normalize(text: str, strict = False) -> str:
+    text = text.replace("ph", "f").replace("pf", "f")
+    text = text.replace("ck", "k").replace("ks", "x")
+    text = text.replace("sch", "sj").replace("sh", "sj")
+    text = text.replace("äu", "eu").replace("oi", "eu")
+    text = text.replace("üh", "y").replace("ü", "ue").replace("ä", "ae")
+    text = text.replace("öh", "u").replace("ö", "oe")
+    text = text.replace("ou", "au")
+    text = text.replace("ai", "ei").replace("ay", "ei").replace("ou", "au")
+    text = text.replace("ß", "ss")
+    text = text.replace("tz", "z")
+    if text.startswith("ch"):
+        text = "tj" + text[2:]
+    if text.startswith("v"):
+        text = "f" + text[1:]
+    if not strict:
+        text = text.replace("xth", "xf").replace("th", "t")
+        text = text.replace("dth", "tt").replace("d", "t")
+        text = text.replace("fth", "f").replace("v", "f").replace("lth", "lf")
+        text = text.replace("b", "p")
+        text = text.replace("ih", "i").replace("ah", "a").replace("oh", "o").replace("uh", "u").replace("ie", "i").replace("eh", "e")
+        text = text.replace("ch", "g").replace("qu", "kw")
+        text = text.replace("cr", "kr").replace("kh", "k").replace("m", "n").replace("m", "n").replace("ng", "n")
+        text = text.replace("zh", "sj").replace("z", "ts").replace("nce", "ns")
+
+    text = text.replace("dd", "d").replace("pp", "p").replace("cc", "k").replace("tt", "t").replace("ss", "s").replace("gg", "g") \
+        .replace("kk", "k").replace("ff", "f").replace("ll", "l").replace("bb", "b").replace("nn", "n") \
+        .replace("mm", "m").replace("zz", "z")
+    return text
+
+languages = [("english", english, reference_english_normalize), ("dutch", dutch, reference_dutch_normalize), ("german", german, reference_german_normalize)]
+
+def get_corpus_words() -> List[str]:
+    test_path = os.path.dirname(os.path.realpath(__file__))
+    with open(os.path.join(test_path, "..", "virtual_buffer", "testcase_LorumIpsum8k.txt")) as corpus_file:
+        return corpus_file.read().lower().split()
+
+def test_compiled_rules_match_reference(assertion):
+    corpus_words = words + get_corpus_words()
+    assertion("Compiled phonetic normalization")
+    for language_name, language, reference_normalize in languages:
+        for strict in [True, False]:
+            mismatches = [word for word in corpus_words if language.homophone_normalize(word, strict) != reference_normalize(word, strict)]
+            assertion("    should give the same " + language_name + (" strict" if strict else " loose") + " normalization as the chained replacements", len(mismatches) == 0)
+            mismatches = [word for word in words if language.engine.normalize(word, strict) != language.engine.normalize_reference(word, strict)]
+            assertion("    should give the same " + language_name + (" strict" if strict else " loose") + " normalization as applying the rules one by one", len(mismatches) == 0)
+
+    assertion("    should replace only the start of a german word starting with 'v'", german.homophone_normalize("vater", True) == "fater")
+    assertion("    should replace only the start of a german word starting with 'ch'", german.homophone_normalize("chemie", True) == "tjemie")
+    assertion("    should replace 'ch' at the start of a dutch word with 'sj' for loose matching", dutch.homophone_normalize("chef", False) == "sjef")
+    assertion("    should keep umlauts in german", german.homophone_normalize("zürich", True) == "zuerich")
+    assertion("    should remove diacritics in english", english.homophone_normalize("café", True) == "cafe")
+
+# Alternates between the normalizations and takes the best of several runs, so a single slow run does not decide the comparison
+def time_normalizations(normalizations: List, corpus_words: List[str], strict: bool, repeats = 7) -> List[float]:
+    best_times = [None for _ in normalizations]
+    for _ in range(repeats):
+        for index, normalize in enumerate(normalizations):
+            start_time = time.perf_counter()
+            for word in corpus_words:
+                normalize(word, strict)
+            run_time = time.perf_counter() - start_time
+            best_times[index] = run_time if best_times[index] is None else min(best_times[index], run_time)
+    return [best_time * 1000000 / len(corpus_words) for best_time in best_times]
+
+def test_compiled_rules_performance(assertion):
+    corpus_words = get_corpus_words()[:5000]
+    assertion("Compiled phonetic normalization performance")
+    for language_name, language, reference_normalize in languages:
+        for strict in [True, False]:
+            reference_time, compiled_time = time_normalizations([reference_normalize, language.homophone_normalize], corpus_words, strict)
+            assertion("    Microseconds per word for the " + language_name + (" strict" if strict else " loose") + " rules: " + str(compiled_time) + " compared to " + str(reference_time) + " for the chained replacements")
+            assertion("    should not be slower than the chained replacements for the " + language_name + (" strict" if strict else " loose") + " rules", compiled_time <= reference_time)
+
+suite = create_test_suite("Phonetic normalization rules")
+suite.add_test(test_compiled_rules_match_reference)
+suite.add_test(test_compiled_rules_performance)
@@ -0,0 +1,58 @@
+from ...phonetics.phonetics import PhoneticSearch
+from ...phonetics.persistence import SimilarityFileWriter
+from ..test import create_test_suite
+import tempfile
+import os
+
+homophone_contents = "where,wear,ware\nto,too"
+
+def read_file(file_location: str) -> str:
+    with open(file_location, "r") as file:
+        return file.read()
+
+def test_learning_similarities(assertion):
+    phonetic_search = PhoneticSearch()
+    updates = []
+    phonetic_search.set_homophones(homophone_contents, lambda word, replaced_word: updates.append([word, replaced_word]))
+    phonetic_search.set_phonetic_similiarities("")
+    phonetic_search.set_semantic_similarities("")
+
+    assertion("Learning similarities")
+    phonetic_search.add_homophone("to", "two")
+    assertion("    should be able to find a new homophone right away", phonetic_search.find_homophones("two") == ["to", "too"])
+    assertion("    should send the new row to the update callback", updates == [["to", "two"]])
+    phonetic_search.add_homophone("two", "too")
+    assertion("    should not send an update for an already known homophone", len(updates) == 1)
+    phonetic_search.add_homophone("wear", "to")
+    assertion("    should merge the classes of two known words", phonetic_search.find_homophones("where") == ["wear", "ware", "to", "too", "two"])
+
+def test_persisting_similarities(assertion):
+    with tempfile.TemporaryDirectory() as directory:
+        file_location = os.path.join(directory, "homophones.csv")
+        with open(file_location, "w") as file:
+            file.write(homophone_contents)
+
+        phonetic_search = PhoneticSearch()
+        writer = SimilarityFileWriter(file_location, directory, lambda: phonetic_search.homophones.to_contents(), "2s", 3)
+        phonetic_search.set_homophones(homophone_contents, writer.append_row)
+
+        assertion("Persisting learned similarities")
+        phonetic_search.add_homophone("to", "two")
+        phonetic_search.add_homophone("bear", "bare")
+        assertion("    should not write to the file before flushing", read_file(file_location) == homophone_contents)
+        writer.flush()
+        assertion("    should append the new rows on a new line after flushing", read_file(file_location) == homophone_contents + "\nto,two\nbear,bare")
+        assertion("    should know that the last change was its own", writer.is_own_write())
+        phonetic_search.add_homophone("where", "were")
+        writer.flush()
+        assertion("    should compact the file to one row per class after enough rows are appended", read_file(file_location) == "where,wear,ware,were\nto,too,two\nbear,bare")
+        assertion("    should be able to parse the compacted file the same way", PhoneticSearch().parse_contents(read_file(file_location)).find("two") == ["to", "too"])
+
+        writer = SimilarityFileWriter(file_location, os.path.join(directory, "other"), lambda: "")
+        writer.append_row("a", "an")
+        writer.flush()
+        assertion("    should not write outside of the allowed directory", "a,an" not in read_file(file_location))
+
+suite = create_test_suite("Learning and persisting similarities")
+suite.add_test(test_learning_similarities)
+suite.add_test(test_persisting_similarities)
@@ -1,4 +1,6 @@
 from ...phonetics.phonetics import PhoneticSearch
+from ...phonetics.equivalence import EquivalenceIndex
+from ...utils.levenshtein import levenshtein, bounded_levenshtein
 from ..test import create_test_suite
 
 homophone_contents = "where,wear,ware"
@@ -61,7 +63,61 @@ def test_similarity_scores(assertion):
     assertion("    should give a score higher than 0.5 for 'ensemble' and 'assemble' ( very similar )", round(phonetic_search.phonetic_similarity_score("ensemble", "assemble") * 10) / 10 > 0.5)
     assertion("    should give a score lower than 0.5 for 'egg' and 'tremble' ( too dissimilar )", round(phonetic_search.phonetic_similarity_score("egg", "tremble") * 10) / 10 < 0.5)
 
+def test_bounded_similarity_scores(assertion):
+    phonetic_search = PhoneticSearch()
+    phonetic_search.set_homophones(homophone_contents)
+    phonetic_search.set_semantic_similarities("")
+    assertion("Bounded levenshtein")
+    assertion("    should give the same distance as levenshtein for 'kitten' and 'sitting' within the bound", bounded_levenshtein("kitten", "sitting", 3) == levenshtein("kitten", "sitting"))
+    assertion("    should give the bound plus one for 'kitten' and 'sitting' if the bound is too low", bounded_levenshtein("kitten", "sitting", 2) == 3)
+    assertion("    should give the bound plus one if the length difference is already too large", bounded_levenshtein("a", "abcdef", 2) == 3)
+    assertion("    should give the length of the other word if one of them is empty", bounded_levenshtein("", "abc", 5) == 3)
+    assertion("Phonetic scores with a minimum score")
+    assertion("    should give the same score for 'ensemble' and 'assemble' when it clears the minimum score", phonetic_search.phonetic_similarity_score("ensemble", "assemble", min_score=0.5) == phonetic_search.phonetic_similarity_score("ensemble", "assemble"))
+    assertion("    should give a score of 0 for 'egg' and 'tremble' because they cannot reach the minimum score", phonetic_search.phonetic_similarity_score("egg", "tremble", min_score=0.5) == 0)
+    assertion("    should give the same score for short words like 'do' and 'to' regardless of the minimum score", phonetic_search.phonetic_similarity_score("do", "to", min_score=0.9) == 0.75)
+    assertion("    should still give an exact match for 'where' and 'where'", phonetic_search.phonetic_similarity_score("where", "where", min_score=0.9) == 1.2)
+
+def test_batch_similarity_scores(assertion):
+    phonetic_search = PhoneticSearch()
+    phonetic_search.set_homophones(homophone_contents)
+    phonetic_search.set_semantic_similarities("")
+    candidates = ["where", "wear", "were", "thats", "that", "dough", "though", "crab", "nack", "ensemble", "egg", "tremble", ""] * 3
+    scores = phonetic_search.score_many("where", candidates)
+    assertion("Batch phonetic scores")
+    assertion("    should give a score for every candidate", len(scores) == len(candidates))
+    assertion("    should give the same scores as scoring the candidates one by one", scores == [phonetic_search.phonetic_similarity_score(candidate, "where") for candidate in candidates])
+    scores = phonetic_search.score_many("assemble", candidates)
+    assertion("    should give the same fuzzy scores as scoring the candidates one by one", scores == [phonetic_search.phonetic_similarity_score(candidate, "assemble") for candidate in candidates])
+    assertion("    should give no scores for no candidates", phonetic_search.score_many("where", []) == [])
+
+def test_equivalence_index(assertion):
+    index = EquivalenceIndex("where,wear,ware\nto,too\nwear,were\nI,eye")
+    assertion("Equivalence classes")
+    assertion("    should merge lines that share a word", index.find("where") == ["wear", "ware", "were"])
+    assertion("    should find the other words regardless of casing", index.find("WARE") == ["where", "wear", "were"])
+    assertion("    should find words that are stored with capitals", index.are_equivalent("eye", "i"))
+    assertion("    should see words in the same class as equivalent", index.are_equivalent("were", "ware"))
+    assertion("    should not see words in different classes as equivalent", not index.are_equivalent("where", "too"))
+    assertion("    should not see a word as equivalent to itself", not index.are_equivalent("to", "to"))
+    assertion("    should not see unknown words as equivalent", not index.are_equivalent("blue", "blew"))
+    found_words = index.find("to")
+    found_words.append("two")
+    assertion("    should not change the index when the found words are changed", index.find("to") == ["too"])
+
+    phonetic_search = PhoneticSearch()
+    phonetic_search.set_homophones(homophone_contents)
+    phonetic_search.set_phonetic_similiarities(phonetic_contents)
+    phonetic_search.set_semantic_similarities("")
+    first_known_fixes = phonetic_search.get_known_fixes("where")
+    phonetic_search.get_known_fixes("where")
+    assertion("    should not grow the phonetic similarities when finding known fixes", phonetic_search.find_phonetic_similarities("where") == ["we're", "were"])
+    assertion("    should give the same known fixes when asked repeatedly", phonetic_search.get_known_fixes("where") == first_known_fixes)
+
 suite = create_test_suite("Phonetic similarity state")
 suite.add_test(test_detect_fixes)
 suite.add_test(test_updating_fixes)
-suite.add_test(test_similarity_scores)
\ No newline at end of file
+suite.add_test(test_similarity_scores)
+suite.add_test(test_bounded_similarity_scores)
+suite.add_test(test_batch_similarity_scores)
+suite.add_test(test_equivalence_index)
\ No newline at end of file
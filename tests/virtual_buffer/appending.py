@@ -88,7 +88,34 @@ def appending_to_buffer(assertion):
     assertion( "        Expect token index to be 3", token_index[0] == 3 )
     assertion( "        Expect token character index to be equal to the last tokens length (28)", token_index[1] == 28 )
 
+def get_tokens(sentence: str):
+    return [text_to_virtual_buffer_tokens(word + " ", word.lower())[0] for word in sentence.split()]
+
+def splicing_into_buffer(assertion):
+    assertion( "Inserting multiple tokens in the middle of the buffer at once" )
+    vb = get_virtual_buffer()
+    vb.insert_tokens(get_tokens("This is a test sentence"))
+    vb.apply_key("left:14")
+    single_vb = get_virtual_buffer()
+    single_vb.insert_tokens(get_tokens("This is a test sentence"))
+    single_vb.apply_key("left:14")
+
+    assertion( "    Should splice the tokens in between 'a ' and 'test '", vb.splice_tokens(get_tokens("new and improved")))
+    for token in get_tokens("new and improved"):
+        single_vb.insert_tokens([token])
+    assertion( "        Expect the same text as inserting the tokens one by one", [token.text for token in vb.tokens] == [token.text for token in single_vb.tokens])
+    assertion( "        Expect the same indices as inserting the tokens one by one", [(token.line_index, token.index_from_line_end) for token in vb.tokens] == \
+        [(token.line_index, token.index_from_line_end) for token in single_vb.tokens])
+    assertion( "        Expect the caret to be placed after the inserted tokens", vb.caret_tracker.text_buffer == single_vb.caret_tracker.text_buffer)
+    vb.apply_key("left:2")
+    assertion( "    Should not splice tokens in the middle of a token", vb.splice_tokens(get_tokens("sub sentence")) == False)
+    vb.apply_key("right:2")
+    assertion( "    Should not splice tokens that contain line endings", vb.splice_tokens(get_tokens("new") + text_to_virtual_buffer_tokens("line\n")) == False)
+    vb.apply_key("end")
+    assertion( "    Should not splice tokens at the end of the buffer", vb.splice_tokens(get_tokens("appended words")) == False)
+
 suite = create_test_suite("Appending tokens")
 suite.add_test(text_to_virtual_buffer_token_replacement)
 suite.add_test(detect_insert_strategies)
-suite.add_test(appending_to_buffer)
\ No newline at end of file
+suite.add_test(appending_to_buffer)
+suite.add_test(splicing_into_buffer)
@@ -1,5 +1,5 @@
 from ...virtual_buffer.buffer import VirtualBuffer
-from ...virtual_buffer.typing import VirtualBufferTokenList
+from ...virtual_buffer.typing import VirtualBufferTokenList, VirtualBufferToken
 from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
 from ..test import create_test_suite
 from ...virtual_buffer.settings import VirtualBufferSettings
@@ -88,6 +88,25 @@ def test_add_known_self_repair_examples(assertion):
     assertion( "    Inserting 'different kinds of' after 'a lot of'")
     assertion( "        Should not result in self repair", vb.detect_self_repair(["different", "kinds", "of", "people"]) == False)
 
+def test_self_repair_by_tracked_tokens(assertion):
+    vb = get_filled_vb()
+    tracked_tokens = [VirtualBufferToken(token.text, token.phrase, token.format, token.line_index, token.index_from_line_end) for token in vb.tokens[-3:]]
+    assertion( "With a filled virtual buffer, repeating a self repair of tracked tokens 'a new paragraph'")
+    self_repair_match = vb.matcher.find_self_repair_match_by_tokens(vb, tracked_tokens)
+    fuzzy_self_repair_match = vb.find_self_repair(["a", "new", "paragraph"])
+    assertion( "    Should resolve the tracked tokens without a fuzzy search", self_repair_match is not None)
+    assertion( "    Should result in the same self repair as the fuzzy search", self_repair_match.buffer_indices == fuzzy_self_repair_match.buffer_indices and \
+        self_repair_match.query_indices == fuzzy_self_repair_match.query_indices and self_repair_match.scores == fuzzy_self_repair_match.scores)
+    moved_tokens = [VirtualBufferToken(token.text, token.phrase, token.format, token.line_index + 1, token.index_from_line_end) for token in tracked_tokens]
+    assertion( "    Should not resolve tracked tokens that are no longer at their position", vb.matcher.find_self_repair_match_by_tokens(vb, moved_tokens) is None)
+    assertion( "    Should fall back to the fuzzy search when the tracked tokens cannot be resolved", vb.find_self_repair_by_tokens(moved_tokens) is not None)
+    vb.insert_tokens(text_to_virtual_buffer_tokens(" word", "word"))
+    assertion( "    Should not resolve the tracked tokens after text has been added behind them", vb.matcher.find_self_repair_match_by_tokens(vb, tracked_tokens) is None)
+    vb = get_filled_vb_with_examples(["the", "end."])
+    tracked_tokens = [VirtualBufferToken(token.text, token.phrase, token.format, token.line_index, token.index_from_line_end) for token in vb.tokens]
+    assertion( "    Should leave tracked tokens with punctuation to the fuzzy search", vb.matcher.find_self_repair_match_by_tokens(vb, tracked_tokens) is None)
+
 suite = create_test_suite("Self repair in dictation")
 suite.add_test(test_detect_self_repair)
 suite.add_test(test_add_known_self_repair_examples)
+suite.add_test(test_self_repair_by_tracked_tokens)
@@ -0,0 +1,42 @@
+from ...virtual_buffer.buffer import VirtualBuffer
+from ..test import create_test_suite
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...virtual_buffer.settings import VirtualBufferSettings
+
+def get_virtual_buffer() -> VirtualBuffer:
+    settings = VirtualBufferSettings(live_checking=False)
+    return VirtualBuffer(settings)
+
+def test_formatter_context(assertion):
+    vb = get_virtual_buffer()
+    for word in "This is the first sentence. And this is a second sentence with some more words".split(" "):
+        vb.insert_tokens(text_to_virtual_buffer_tokens(word + " ", word.lower().replace(".", "")))
+    vb.apply_key("left:37")
+    context = vb.get_formatter_context()
+
+    assertion( "Getting the formatter context in the middle of 'This is the first sentence. And this is a second sentence with some more words '...")
+    assertion("    should only contain the last words before the caret", context.get_previous_text(3) == "this is a ")
+    assertion("    should only contain the first words after the caret", context.get_next_text(3) == "second sentence with ")
+    assertion("    should end with the same text as the full text before the caret", vb.get_previous_text().endswith(context.get_previous_text()))
+    assertion("    should start with the same text as the full text after the caret", vb.get_next_text().startswith(context.get_next_text()))
+    assertion("    should give the last word before the caret", context.get_previous_words(1) == ["a"])
+    assertion("    should give the next two words after the caret", context.get_next_words(2) == ["second", "sentence"])
+    assertion("    should give the last characters before the caret", context.get_previous_characters(4) == "s a ")
+    assertion("    should give the next characters after the caret", context.get_next_characters(3) == "sec")
+    assertion("    should contain the full text before the caret when asking for more words than there are", context.get_previous_text(100) == vb.get_previous_text())
+
+    vb.apply_key("left:8")
+    context = vb.get_formatter_context()
+    assertion( "Getting the formatter context with the caret inside of the word 'this'...")
+    assertion("    should only contain the part of the word before the caret", context.get_previous_text(1) == "th")
+    assertion("    should start the previous text at a whole word", context.get_previous_text(2) == "And th")
+    assertion("    should end the next text at a whole word", context.get_next_text(1) == "is ")
+
+    vb = get_virtual_buffer()
+    context = vb.get_formatter_context()
+    assertion( "Getting the formatter context of an empty buffer...")
+    assertion("    should not contain text before the caret", context.get_previous_text() == "")
+    assertion("    should not contain text after the caret", context.get_next_text() == "")
+
+suite = create_test_suite("Getting the text around the caret for formatting")
+suite.add_test(test_formatter_context)
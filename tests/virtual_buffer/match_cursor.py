@@ -0,0 +1,39 @@
+from ...virtual_buffer.buffer import VirtualBuffer
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...virtual_buffer.settings import VirtualBufferSettings
+from ...virtual_buffer.input_history import InputEventType
+from ..test import create_test_suite
+
+def get_filled_vb() -> VirtualBuffer:
+    vb = VirtualBuffer(VirtualBufferSettings(live_checking=False))
+    for word in ["Insert ", "a ", "new ", "sentence, ", "that ", "will ", "have ", "new ", "words ", "and ", "new ", "phrases."]:
+        vb.insert_tokens(text_to_virtual_buffer_tokens(word))
+    return vb
+
+def select_repeatedly(vb: VirtualBuffer, phrases):
+    vb.input_history.add_event(InputEventType.SELECT, phrases)
+    vb.select_phrases(phrases)
+    return vb.matcher.get_caret_token_indices(vb)[0]
+
+def test_match_cursor(assertion):
+    vb = get_filled_vb()
+
+    assertion("Repeating the selection of 'new' from the end of the buffer")
+    selected_indices = [select_repeatedly(vb, ["new"]) for _ in range(4)]
+    assertion("    should step backwards through every occurrence and loop around", selected_indices == [10, 7, 2, 10])
+    cursor = vb.match_cursor
+    assertion("    should keep all the occurrences in the cursor", cursor is not None and cursor.starting_indices == [2, 7, 10])
+    select_repeatedly(vb, ["new"])
+    assertion("    should reuse the cursor while the buffer is unchanged", vb.match_cursor is cursor)
+
+    version = vb.version
+    vb.apply_key("right")
+    assertion("    should keep the buffer version when only the caret moves", vb.version == version)
+    vb.insert_tokens(text_to_virtual_buffer_tokens("newer "))
+    assertion("    should change the buffer version when tokens are inserted", vb.version != version)
+    select_repeatedly(vb, ["new"])
+    select_repeatedly(vb, ["new"])
+    assertion("    should create a new cursor after the buffer has changed", vb.match_cursor is not cursor)
+
+suite = create_test_suite("Stepping through matches with a cursor")
+suite.add_test(test_match_cursor)
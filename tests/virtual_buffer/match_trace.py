@@ -0,0 +1,51 @@
+from ...virtual_buffer.buffer import VirtualBuffer
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ..test import create_test_suite
+from ...virtual_buffer.settings import VirtualBufferSettings
+
+def get_virtual_buffer() -> VirtualBuffer:
+    settings = VirtualBufferSettings(live_checking=False)
+    return VirtualBuffer(settings)
+
+def get_tokens_from_sentence(sentence: str):
+    text_tokens = sentence.split(" ")
+    tokens = []
+    for index, text_token in enumerate(text_tokens):
+        tokens.extend(text_to_virtual_buffer_tokens(text_token + (" " if index < len(text_tokens) - 1 else "")))
+    return tokens
+
+def test_match_trace_sink(assertion):
+    vb = get_virtual_buffer()
+    vb.insert_tokens(get_tokens_from_sentence("Insert a new sentence. Then add another sentence with more words in it."))
+    traces = []
+
+    assertion("Tracing the phases of a search in the matcher")
+    vb.select_phrases(["another", "sentence"])
+    assertion("    should not create a trace without a sink", vb.matcher.trace is None and len(traces) == 0)
+    vb.matcher.set_trace_sink(traces.append)
+    vb.select_phrases(["another", "sentence"])
+    assertion("    should send a single trace to the sink", len(traces) == 1)
+    phases = traces[0].phases
+    assertion("    should time the windowing", "windowing" in phases and phases["windowing"].items > 0)
+    assertion("    should time the search for potential sublists", "find_potential_sublists" in phases and "simplify_sublists" in phases)
+    assertion("    should count the found matches", phases["find_matches_in_token_list"].items > 0)
+    assertion("    should count the filtered match trees", phases["filter_expanded_match_trees"].calls > 0)
+    assertion("    should time the total duration", traces[0].duration >= sum([phase.duration for name, phase in phases.items() if name != "filter_expanded_match_trees"]))
+    assertion("    should not keep the trace in the matcher after the search", vb.matcher.trace is None)
+    vb.select_phrases(["more", "words"], for_correction=True)
+    assertion("    should send a trace for every search", len(traces) == 2 and traces[1].search == "correction")
+
+    try:
+        vb.matcher.find_best_match_by_phrases(None, ["another", "sentence"])
+    except AttributeError:
+        pass
+    assertion("    should clear the trace when a traced search raises an error", vb.matcher.trace is None)
+    vb.select_phrases(["another", "sentence"])
+    assertion("    should keep tracing searches after a search raised an error", traces[-1].search == "selection" and traces[-1].duration > 0)
+    vb.matcher.set_trace_sink(None)
+    trace_count = len(traces)
+    vb.select_phrases(["another", "sentence"])
+    assertion("    should stop tracing after removing the sink", len(traces) == trace_count)
+
+suite = create_test_suite("Tracing the phases of the matcher")
+suite.add_test(test_match_trace_sink)
@@ -0,0 +1,48 @@
+from ...virtual_buffer.buffer import VirtualBuffer
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...virtual_buffer.alignment import ALIGNMENT_ENGINE
+from ..test import create_test_suite
+from ...virtual_buffer.settings import VirtualBufferSettings
+
+def get_virtual_buffer(matcher_engine: str = "") -> VirtualBuffer:
+    settings = VirtualBufferSettings(live_checking=False)
+    settings.matcher_engine = matcher_engine
+    return VirtualBuffer(settings)
+
+def get_tokens_from_sentence(sentence: str):
+    text_tokens = sentence.split(" ")
+    tokens = []
+    for index, text_token in enumerate(text_tokens):
+        tokens.extend(text_to_virtual_buffer_tokens(text_token + (" " if index < len(text_tokens) - 1 else "")))
+    return tokens
+
+def test_alignment_selection(assertion):
+    vb = get_virtual_buffer(ALIGNMENT_ENGINE)
+    vb.insert_tokens(get_tokens_from_sentence("Insert a new sentence. Then add another sentence with more words in it."))
+
+    assertion("Using the alignment engine to select phrases")
+    vb.select_phrases(["insert", "an"])
+    assertion("    should select a fuzzy match", vb.caret_tracker.get_selection_text() == "Insert a ")
+    vb.select_phrases(["a", "nyew", "sentences"])
+    assertion("    should select a match with multiple fuzzy words", vb.caret_tracker.get_selection_text() == "a new sentence. ")
+    vb.select_phrases(["and", "other", "sentence"])
+    assertion("    should select a match where the query words are combined", vb.caret_tracker.get_selection_text() == "another sentence ")
+    vb.select_phrases(["more", "words", "in", "it"])
+    assertion("    should select a match with the query words before the root", vb.caret_tracker.get_selection_text() == "more words in it.")
+    vb.select_phrases(["new", "then", "add"], for_correction=True)
+    assertion("    should skip a word in the buffer for corrections", vb.caret_tracker.get_selection_text() == "new sentence. Then add ")
+
+def test_alignment_engine_consistency(assertion):
+    assertion("Using the alignment engine instead of the match trees")
+    for query in [["insert", "new"], ["the", "and", "other"], ["sentence", "with", "mower"], ["new", "sentence", "then", "ad"]]:
+        selections = []
+        for matcher_engine in ["", ALIGNMENT_ENGINE]:
+            vb = get_virtual_buffer(matcher_engine)
+            vb.insert_tokens(get_tokens_from_sentence("Insert a new sentence. Then add another sentence with more words in it."))
+            vb.select_phrases(query, for_correction=True)
+            selections.append(vb.caret_tracker.get_selection_text())
+        assertion("    should give the same result for '" + " ".join(query) + "'", selections[0] == selections[1])
+
+suite = create_test_suite("Aligning the query with the buffer using dynamic programming")
+suite.add_test(test_alignment_selection)
+suite.add_test(test_alignment_engine_consistency)
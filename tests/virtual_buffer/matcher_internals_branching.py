@@ -223,11 +223,44 @@ def test_partially_combined_buffer_match_tree(assertion):
     match_trees, _ = matcher.expand_match_tree(match_tree, calculation, sublist)
     assertion("    should have at least a single result after expanding", len(match_trees) >= 1)
 
+def test_beam_limited_expansion(assertion):
+    matcher = get_matcher()
+    calculation = matcher.generate_match_calculation(["an", "incredible", "good", "match"], correct_threshold, purpose="correction")
+    sublist = VirtualBufferTokenList(0, get_tokens_from_sentence("test with an incredibly good match"))
+    match_tree = get_single_word_match_tree_root(matcher, calculation, sublist, 0, 2)
+
+    assertion("Expanding the match 'an incredible good match' on 'test with an incredibly good match' forward")
+    match_trees, _ = matcher.expand_match_trees_in_direction([match_tree], calculation, sublist, 1)
+    statistics = matcher.get_expansion_statistics()
+    assertion("    should find multiple match trees without a beam limit", len(match_trees) == 2)
+    assertion("    should count the created match trees", statistics["created"] == 6)
+    assertion("    should count the pruned match trees", statistics["pruned"] == 1)
+    assertion("    should count the largest amount of match trees in a single step", statistics["max_frontier"] == 2)
+
+    matcher = get_matcher()
+    matcher.beam_width = 1
+    calculation = matcher.generate_match_calculation(["an", "incredible", "good", "match"], correct_threshold, purpose="correction")
+    match_tree = get_single_word_match_tree_root(matcher, calculation, sublist, 0, 2)
+    match_trees, _ = matcher.expand_match_trees_in_direction([match_tree], calculation, sublist, 1)
+    assertion("    should only keep a single match tree with a beam width of 1", len(match_trees) == 1)
+    assertion("    should keep the match tree with the highest score potential", match_trees[0].buffer_indices == [[2], [3], [4], [5]])
+    assertion("    should count the match trees removed by the beam", matcher.get_expansion_statistics()["beam_pruned"] == 2)
+
+    matcher = get_matcher()
+    matcher.beam_width = 2
+    calculation = matcher.generate_match_calculation(["good", "match"], correct_threshold, purpose="correction")
+    sublist = VirtualBufferTokenList(0, get_tokens_from_sentence("good match and good match and good match"))
+    match_trees = [get_single_word_match_tree_root(matcher, calculation, sublist, 0, buffer_index) for buffer_index in [6, 0, 3]]
+    match_trees, _ = matcher.expand_match_trees_in_direction(match_trees, calculation, sublist, 1)
+    assertion("Expanding three equally scoring matches of 'good match' on 'good match and good match and good match' with a beam width of 2")
+    assertion("    should keep the match trees that come first in the buffer", [match_tree.buffer_indices for match_tree in match_trees] == [[[0], [1]], [[3], [4]]])
+
 suite = create_test_suite("Virtual buffer matcher branching")
 suite.add_test(test_check_expand_backward)
 suite.add_test(test_check_expand_forward)
 suite.add_test(test_expand_skip_one_forward)
 suite.add_test(test_expand_skip_one_backward)
+suite.add_test(test_beam_limited_expansion)
 
 combined_suite = create_test_suite("Virtual buffer matcher branching for combined tokens")
 combined_suite.add_test(test_fully_combined_query_match_tree)
@@ -37,12 +37,33 @@ def test_key_generation(assertion):
     cache = get_empty_cache()
 
     assertion("Using an empty cache")
-    assertion("    should generate 1-1:2-2 for the starting branch", cache.get_cache_key(starting_branch[0], starting_branch[1], starting_branch[2], starting_branch[3], token_list) == "1-1:2-2")
-    assertion("    should generate 1-1:2-2 for the inverse of the starting branch", cache.get_cache_key(inversed_starting_branch[0], inversed_starting_branch[1], inversed_starting_branch[2], inversed_starting_branch[3], token_list) == "1-1:2-2")
-    assertion("    should generate 2-1:3-2 for the second branch", cache.get_cache_key(second_starting_branch[0], second_starting_branch[1], second_starting_branch[2], second_starting_branch[3], token_list) == "2-1:3-2")
-    assertion("    should generate 2-1:3-2 for the inverse of the second branch", cache.get_cache_key(second_inversed_starting_branch[0], second_inversed_starting_branch[1], second_inversed_starting_branch[2], second_inversed_starting_branch[3], token_list) == "2-1:3-2")
-    assertion("    should generate 1-1:2-3 for the skipped branch", cache.get_cache_key(starting_skipped_branch[0], starting_skipped_branch[1], starting_skipped_branch[2], starting_skipped_branch[3], token_list) == "1-1:2-3")
-    assertion("    should generate 1-1:2-3 for the inverse of the skipped branch", cache.get_cache_key(inversed_starting_skipped_branch[0], inversed_starting_skipped_branch[1], inversed_starting_skipped_branch[2], inversed_starting_skipped_branch[3], token_list) == "1-1:2-3")
+    assertion("    should generate (1, 1), (2, 2) for the starting branch", cache.get_cache_key(starting_branch[0], starting_branch[1], starting_branch[2], starting_branch[3], token_list) == ((1, 1), (2, 2)))
+    assertion("    should generate (1, 1), (2, 2) for the inverse of the starting branch", cache.get_cache_key(inversed_starting_branch[0], inversed_starting_branch[1], inversed_starting_branch[2], inversed_starting_branch[3], token_list) == ((1, 1), (2, 2)))
+    assertion("    should generate (2, 1), (3, 2) for the second branch", cache.get_cache_key(second_starting_branch[0], second_starting_branch[1], second_starting_branch[2], second_starting_branch[3], token_list) == ((2, 1), (3, 2)))
+    assertion("    should generate (2, 1), (3, 2) for the inverse of the second branch", cache.get_cache_key(second_inversed_starting_branch[0], second_inversed_starting_branch[1], second_inversed_starting_branch[2], second_inversed_starting_branch[3], token_list) == ((2, 1), (3, 2)))
+    assertion("    should generate (1, 1), (2, 3) for the skipped branch", cache.get_cache_key(starting_skipped_branch[0], starting_skipped_branch[1], starting_skipped_branch[2], starting_skipped_branch[3], token_list) == ((1, 1), (2, 3)))
+    assertion("    should generate (1, 1), (2, 3) for the inverse of the skipped branch", cache.get_cache_key(inversed_starting_skipped_branch[0], inversed_starting_skipped_branch[1], inversed_starting_skipped_branch[2], inversed_starting_skipped_branch[3], token_list) == ((1, 1), (2, 3)))
+
+def test_visit_counters(assertion):
+    token_list = VirtualBufferTokenList(0, get_tokens_from_sentence("is IT true that it could happen to any of us?"))
+    cache = get_empty_cache()
+    cache.index_token_list(token_list)
+
+    assertion("Visiting branches and caching scores")
+    cache.should_visit_branch(starting_branch[0], starting_branch[1], starting_branch[2], starting_branch[3], token_list)
+    cache.cache_score(starting_branch[0], starting_branch[1], starting_branch[2], starting_branch[3], 0.5, token_list)
+    assertion("    should not visit the inverse of a visited branch", cache.should_visit_branch(inversed_starting_branch[0], inversed_starting_branch[1], inversed_starting_branch[2], inversed_starting_branch[3], token_list) == False)
+    assertion("    should count the visits and the cache hits", cache.get_statistics()["visits"] == 2 and cache.get_statistics()["hits"] == 1)
+    cache.cache_buffer_index_score(0.8, [2], token_list)
+    cache.cache_buffer_index_score(0.2, [2], token_list)
+    assertion("    should keep the highest score for a buffer index", cache.get_highest_score_for_buffer_index(2) == 0.8)
+    cache.cache_buffer_index_score(1.0, [3, 4], token_list)
+    assertion("    should divide a combined score over its buffer indices", cache.get_highest_score_for_buffer_index(4) == 0.5)
+    assertion("    should not have a score for unvisited buffer indices", cache.get_highest_score_for_buffer_index(6) == -1)
+    cache.skip_word_sequence(["it"])
+    cache.should_skip_index(1)
+    cache.should_skip_index(0)
+    assertion("    should count the skipped indices", cache.get_statistics()["skips"] == 1)
 
 def test_token_list_indexation(assertion):
     token_list = VirtualBufferTokenList(1, get_tokens_from_sentence("is IT true that it could happen to any of us?"))
@@ -89,6 +110,7 @@ def test_skip_sublists(assertion):
 
 suite = create_test_suite("Virtual buffer branch skipping")
 suite.add_test(test_key_generation)
+suite.add_test(test_visit_counters)
 suite.add_test(test_token_list_indexation)
 suite.add_test(test_skip_word_sequences)
 suite.add_test(test_skip_sublists)
\ No newline at end of file
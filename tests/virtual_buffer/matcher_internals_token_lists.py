@@ -1,7 +1,7 @@
 from ...virtual_buffer.matcher import VirtualBufferMatcher
 from ...phonetics.phonetics import PhoneticSearch
 from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
-from ...virtual_buffer.typing import VirtualBufferTokenList, VirtualBufferMatchCalculation
+from ...virtual_buffer.typing import VirtualBufferTokenList, VirtualBufferMatchCalculation, VirtualBufferTokenView
 from ..test import create_test_suite
 from typing import List
 
@@ -193,6 +193,24 @@ def test_merge_token_lists_overlapping_token_lists_middle(assertion):
     assertion("    should end with 'dense'", merged_token_list.tokens[-1].phrase == "dense")
     assertion("    should have three tokens", len(merged_token_list.tokens) == 3)
 
+def test_token_list_views(assertion):
+    matcher = get_matcher()
+    tokens = get_tokens_from_sentence("an incredibly dense cake that will be eaten")
+    token_list = VirtualBufferTokenList(0, VirtualBufferTokenView(tokens))
+
+    assertion("Using views on the tokens of a token_list instead of copies")
+    sublist = token_list.get_sublist(2, 5)
+    assertion("    should not copy the tokens for a sublist", isinstance(sublist.tokens, VirtualBufferTokenView) and sublist.tokens.source is tokens)
+    assertion("    should give the tokens of the sublist", sublist.index == 2 and sublist.end_index == 4 and [token.phrase for token in sublist.tokens] == ["dense", "cake", "that"])
+    assertion("    should index from the end of the sublist", sublist.tokens[-1].phrase == "that")
+    before = token_list.filter_before_index(3)
+    assertion("    should filter the tokens before an index", before.index == 0 and before.tokens == tokens[0:3] and before.tokens.source is tokens)
+    after = sublist.filter_after_index(2)
+    assertion("    should filter the tokens after an index", after.index == 3 and after.tokens == tokens[3:5] and after.tokens.source is tokens)
+    assertion("    should give an empty token_list when nothing is left after filtering", sublist.filter_after_index(4).length == 0)
+    merged = matcher.merge_token_lists(token_list.get_sublist(1, 4), token_list.get_sublist(3, 7))
+    assertion("    should merge overlapping views into a single view", merged.index == 1 and merged.end_index == 6 and merged.tokens == tokens[1:7] and merged.tokens.source is tokens)
+
 def test_translate_sub_token_list_index_to_token_list_index(assertion):
     assertion("Translating a resulting index of a sub token_list back to a token_list index")
     token_list0_2 = VirtualBufferTokenList(0, get_tokens_from_sentence("an incredibly dense"))
@@ -273,6 +291,7 @@ suite.add_test(test_merge_token_lists_overlapping_token_lists_end)
 suite.add_test(test_merge_token_lists_overlapping_token_lists_start)
 suite.add_test(test_merge_token_lists_overlapping_token_lists_middle)
 suite.add_test(test_translate_sub_token_list_index_to_token_list_index)
+suite.add_test(test_token_list_views)
 
 splitting_suite = create_test_suite("Virtual buffer matcher token_list splitting")
 splitting_suite.add_test(test_split_token_lists_at_start)
@@ -0,0 +1,95 @@
+from ...virtual_buffer.buffer import VirtualBuffer
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...virtual_buffer.matcher import BEST_FIRST_WINDOW_SEARCH
+from ...virtual_buffer.typing import VirtualBufferTokenList
+from ..test import create_test_suite
+from ...virtual_buffer.settings import VirtualBufferSettings
+
+def get_virtual_buffer(matcher_window_search: str = "") -> VirtualBuffer:
+    settings = VirtualBufferSettings(live_checking=False)
+    settings.matcher_window_search = matcher_window_search
+    return VirtualBuffer(settings)
+
+def get_tokens_from_sentence(sentence: str):
+    text_tokens = sentence.split(" ")
+    tokens = []
+    for index, text_token in enumerate(text_tokens):
+        tokens.extend(text_to_virtual_buffer_tokens(text_token + (" " if index < len(text_tokens) - 1 else "")))
+    return tokens
+
+def get_large_document() -> str:
+    sentences = [
+        "The quick brown fox jumps over the lazy dog near the river bank.",
+        "A small village was built on the hill long before the castle.",
+        "Every morning the baker opens his shop to sell warm bread.",
+        "Winter storms arrive early in the mountains during the year.",
+        "Children play football in the park after their lessons are done.",
+        "The old library keeps thousands of books about ancient history.",
+    ]
+    text = " ".join(sentences * 4)
+    return text + " Insert a new sentence with a lighthouse here. " + " ".join(sentences * 2)
+
+def test_best_first_window_search(assertion):
+    vb = get_virtual_buffer(BEST_FIRST_WINDOW_SEARCH)
+    vb.insert_tokens(get_tokens_from_sentence(get_large_document()))
+
+    assertion("Searching the windows of a large document with the highest upper bound first")
+    vb.select_phrases(["lighthouse"])
+    assertion("    should find a match far away from the cursor", vb.caret_tracker.get_selection_text() == "lighthouse ")
+    statistics = vb.matcher.get_expansion_statistics()
+    assertion("    should skip the windows that cannot contain the match", statistics["windows_skipped"] > 0 and statistics["windows_expanded"] < statistics["windows_skipped"])
+    vb.select_phrases(["insert", "an", "new", "sentence"], for_correction=True)
+    assertion("    should find a fuzzy match far away from the cursor", vb.caret_tracker.get_selection_text() == "Insert a new sentence ")
+    vb.select_phrases(["brown", "fox"])
+    assertion("    should select the occurrence closest to the cursor", vb.caret_tracker.get_selection_text() == "brown fox ")
+
+    vb = get_virtual_buffer(BEST_FIRST_WINDOW_SEARCH)
+    vb.insert_tokens(get_tokens_from_sentence(get_large_document()))
+    _, match = vb.matcher.find_best_match_by_phrases(vb, ["brown", "fox"], selecting=True)
+    last_occurrence = max([index for index, token in enumerate(vb.tokens) if token.phrase == "brown"])
+    assertion("    should pick the last occurrence when the cursor is at the end of the document", match.buffer_indices[0][0] == last_occurrence)
+    assertion("    should expand more windows when multiple occurrences have the same score", vb.matcher.get_expansion_statistics()["windows_expanded"] > 1)
+
+def test_lazy_windows(assertion):
+    vb = get_virtual_buffer()
+    vb.insert_tokens(get_tokens_from_sentence(get_large_document()))
+    match_calculation = vb.matcher.generate_match_calculation(["lazy", "dog"])
+    token_list = VirtualBufferTokenList(0, vb.tokens)
+    cursor_token_index = 200
+    windows = token_list.get_windowed_sublists(cursor_token_index, match_calculation)
+
+    assertion("Generating the windows of a large document from the cursor outward")
+    first_window = next(windows)
+    assertion("    should start with the window nearest to the cursor", abs(first_window.index - cursor_token_index) <= first_window.length // 2)
+    remaining_windows = list(windows)
+    distances = [abs(window.index - cursor_token_index) for window in [first_window] + remaining_windows]
+    assertion("    should generate the windows in increasing distance from the cursor", distances == sorted(distances))
+    assertion("    should alternate between windows on the left and the right", remaining_windows[0].index < cursor_token_index and remaining_windows[1].index > cursor_token_index)
+    assertion("    should cover the whole document", min([window.index for window in remaining_windows]) == 0 and max([window.end_index for window in remaining_windows]) >= len(vb.tokens) - 2)
+
+def test_window_upper_bound(assertion):
+    vb = get_virtual_buffer(BEST_FIRST_WINDOW_SEARCH)
+    vb.insert_tokens(get_tokens_from_sentence(get_large_document()))
+    matcher = vb.matcher
+    matcher.vocabulary.sync(vb.tokens)
+    match_calculation = matcher.generate_match_calculation(["lazy", "dog"])
+    matcher.update_similarity_matrix(match_calculation)
+    token_list = VirtualBufferTokenList(0, vb.tokens)
+    windows = list(token_list.get_windowed_sublists(len(vb.tokens) - 1, match_calculation))
+    bounds = {}
+    for window in windows:
+        bounds[window.index] = matcher.get_window_upper_bound(match_calculation, window, {})
+
+    phrases = lambda window: [token.phrase.replace(" ", "") for token in window.tokens]
+    assertion("Calculating the upper bound of a window")
+    assertion("    should reach the maximum score for windows containing the exact words", all([bounds[window.index] == match_calculation.max_score \
+        for window in windows if "lazy" in phrases(window) and "dog" in phrases(window)]))
+    assertion("    should be lower for windows missing one of the words", all([bounds[window.index] < match_calculation.max_score \
+        for window in windows if "lazy" not in phrases(window)]))
+    assertion("    should not reach the match threshold for windows without any similar words", \
+        matcher.get_window_upper_bound(match_calculation, VirtualBufferTokenList(0, get_tokens_from_sentence("Winter storms arrive early.")), {}) < match_calculation.match_threshold)
+
+suite = create_test_suite("Searching through the windows of a large document")
+suite.add_test(test_best_first_window_search)
+suite.add_test(test_window_upper_bound)
+suite.add_test(test_lazy_windows)
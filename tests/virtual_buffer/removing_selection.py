@@ -109,7 +109,25 @@ def test_remove_selecting_multiple_tokens_right(assertion):
     assertion( "        Expect text to be merged", vb.tokens[-1].text == "Suggestion")
     assertion( "        Expect phrase to be merged", vb.tokens[-1].phrase == "suggestion")
 
+def test_remove_selection_merges_only_at_seam(assertion):
+    vb = get_virtual_buffer()
+    tokens = text_to_virtual_buffer_tokens("First line.\n")[:1]
+    for text in ["This ", "iss ", "a ", "broken ", "to", "ken."]:
+        tokens.extend(text_to_virtual_buffer_tokens(text))
+    vb.set_tokens(tokens, True)
+    first_token = vb.tokens[0]
+    vb.apply_key("left:16")
+
+    assertion( "    Selecting a single character in the middle of 'This iss a broken token.' and removing it...")
+    vb.apply_key("shift:down left shift:up backspace")
+    assertion( "        Expect the text to be 'This is a broken token.'", "".join([token.text for token in vb.tokens]) == "First line.\nThis is a broken token.")
+    assertion( "        Expect the token on the line before the selection to be kept", vb.tokens[0] is first_token)
+    assertion( "        Expect the token with the removed character to be updated", vb.tokens[2].text == "is " and vb.tokens[2].phrase == "is")
+    assertion( "        Expect tokens further away from the selection not to be merged", [token.text for token in vb.tokens[-2:]] == ["to", "ken."])
+    assertion( "        Expect the tokens to be reindexed", vb.tokens[2].index_from_line_end == 15 and vb.tokens[2].line_index == 1)
+
 suite = create_test_suite("Removing selected text")
 suite.add_test(test_remove_selecting_single_tokens)
 suite.add_test(test_remove_selecting_multiple_tokens_left)
-suite.add_test(test_remove_selecting_multiple_tokens_right)
\ No newline at end of file
+suite.add_test(test_remove_selecting_multiple_tokens_right)
+suite.add_test(test_remove_selection_merges_only_at_seam)
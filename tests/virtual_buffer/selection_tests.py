@@ -3,13 +3,16 @@ from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
 from ...phonetics.phonetics import PhoneticSearch
 import csv
 import os 
+import time
 from ...virtual_buffer.typing import SELECTION_THRESHOLD, CORRECTION_THRESHOLD
 from talon import resource
 from ..test import create_test_suite
 from ...virtual_buffer.settings import VirtualBufferSettings
+from ...virtual_buffer.alignment import ALIGNMENT_ENGINE
 
-def get_virtual_buffer() -> VirtualBuffer:
+def get_virtual_buffer(matcher_engine: str = "") -> VirtualBuffer:
     settings = VirtualBufferSettings(live_checking=False)
+    settings.matcher_engine = matcher_engine
     return VirtualBuffer(settings)
 
 test_path = os.path.dirname(os.path.realpath(__file__))
@@ -19,8 +22,8 @@ test_path = os.path.dirname(os.path.realpath(__file__))
 #resource.open(os.path.join(test_path, "testcase_correction.csv"))
 #resource.open(os.path.join(test_path, "testcase_selection.csv"))
 
-def get_uncached_virtual_buffer():
-    vb = get_virtual_buffer()
+def get_uncached_virtual_buffer(matcher_engine: str = ""):
+    vb = get_virtual_buffer(matcher_engine)
 
     # Reset the phonetic search to make sure there is no influence from user settings    
     vb.matcher.phonetic_search = PhoneticSearch()
@@ -30,8 +33,8 @@ def get_uncached_virtual_buffer():
 
     return vb
 
-def test_selection(assertion, buffer: str, query: str, result: str = "") -> (bool, str, float):
-    vb = get_uncached_virtual_buffer()
+def test_selection(assertion, buffer: str, query: str, result: str = "", matcher_engine: str = "") -> (bool, str, float):
+    vb = get_uncached_virtual_buffer(matcher_engine)
 
     text_tokens = buffer.split(" ")
     tokens = []
@@ -61,8 +64,8 @@ def test_selection(assertion, buffer: str, query: str, result: str = "") -> (boo
     #    assertion("    Searching for '" + query + "' finds '" + result.strip() + "'", is_valid)
     return is_valid, vb.caret_tracker.get_selection_text().strip()
 
-def test_correction(assertion, buffer: str, query: str, result: str = "") -> (bool, str, float):
-    vb = get_uncached_virtual_buffer()
+def test_correction(assertion, buffer: str, query: str, result: str = "", matcher_engine: str = "") -> (bool, str, float):
+    vb = get_uncached_virtual_buffer(matcher_engine)
 
     text_tokens = buffer.split(" ")
     tokens = []
@@ -92,8 +95,8 @@ def test_correction(assertion, buffer: str, query: str, result: str = "") -> (bo
         assertion("    Correcting with '" + query + "' finds '" + result.strip() + "'", is_valid)
     return is_valid, vb.caret_tracker.get_selection_text().strip()
 
-def test_selfrepair(assertion, buffer: str, query: str, result: str = "") -> (bool, str, float):
-    vb = get_uncached_virtual_buffer()
+def test_selfrepair(assertion, buffer: str, query: str, result: str = "", matcher_engine: str = "") -> (bool, str, float):
+    vb = get_uncached_virtual_buffer(matcher_engine)
 
     text_tokens = buffer.split(" ")
     tokens = []
@@ -130,7 +133,7 @@ def test_selfrepair(assertion, buffer: str, query: str, result: str = "") -> (bo
         assertion("    Selfrepairing '" + buffer + "' with '" + query.strip() + "' works as expected", is_valid)
     return is_valid, "" if match is None else " ".join([token.text for token in buffer_tokens]).replace("  ", " ").strip()
 
-def selection_tests(assertion, skip_known_invalid = True, highlight_only = False) -> [int, int, [], [], []]:
+def selection_tests(assertion, skip_known_invalid = True, highlight_only = False, matcher_engine = "") -> [int, int, [], [], []]:
     rows = 0
     valid = 0
     regressions = []
@@ -146,7 +149,7 @@ def selection_tests(assertion, skip_known_invalid = True, highlight_only = False
             pass_skip_known_invalid = (not highlight_only and (not skip_known_invalid or not row["buffer"].startswith("#")))
             
             if invalid_query and (pass_highlight or pass_skip_known_invalid):
-                result, actual = test_selection(assertion, row["buffer"], row["query"], row["result"])
+                result, actual = test_selection(assertion, row["buffer"], row["query"], row["result"], matcher_engine)
                 if result:
                     valid += 1
                     if row["buffer"].startswith("#"):
@@ -159,7 +162,7 @@ def selection_tests(assertion, skip_known_invalid = True, highlight_only = False
 
     return [rows, valid, improvements, regressions, invalid] 
 
-def correction_tests(assertion, skip_known_invalid = True) -> [int, int, [], [], []]:
+def correction_tests(assertion, skip_known_invalid = True, matcher_engine = "") -> [int, int, [], [], []]:
     rows = 0
     valid = 0
     regressions = []
@@ -170,7 +173,7 @@ def correction_tests(assertion, skip_known_invalid = True) -> [int, int, [], [],
         for row in reader:
             rows += 1
             if row["correction"] != "" and (not skip_known_invalid or not row["buffer"].startswith("#")):
-                result, actual = test_correction(assertion, row["buffer"], row["correction"], row["result"])
+                result, actual = test_correction(assertion, row["buffer"], row["correction"], row["result"], matcher_engine)
                 if result:
                     valid += 1
                     if row["buffer"].startswith("#"):
@@ -183,7 +186,7 @@ def correction_tests(assertion, skip_known_invalid = True) -> [int, int, [], [],
 
     return [rows, valid, improvements, regressions, invalid]
 
-def selfrepair_tests(assertion, skip_known_invalid = True) -> [int, int, [], [], []]:
+def selfrepair_tests(assertion, skip_known_invalid = True, matcher_engine = "") -> [int, int, [], [], []]:
     rows = 0
     valid = 0
     regressions = []
@@ -194,7 +197,7 @@ def selfrepair_tests(assertion, skip_known_invalid = True) -> [int, int, [], [],
         for row in reader:
             rows += 1
             if row["inserted"] != "" and (not skip_known_invalid or not row["buffer"].startswith("#")):
-                result, actual = test_selfrepair(assertion, row["buffer"], row["inserted"], row["selfrepaired"])
+                result, actual = test_selfrepair(assertion, row["buffer"], row["inserted"], row["selfrepaired"], matcher_engine)
                 if result:
                     valid += 1
                     if row["buffer"].startswith("#"):
@@ -736,9 +739,22 @@ def percentage_test_correction(assertion):
 def percentage_test_selfrepair(assertion):
     percentage_tests(assertion, False, False, True, 0.95)
 
+# Compare the accuracy and the duration of every matcher engine side by side
+def matcher_engine_tests(assertion, matcher_engines = ["", ALIGNMENT_ENGINE]):
+    for matcher_engine in matcher_engines:
+        assertion("Using the " + ("default" if matcher_engine == "" else matcher_engine) + " matcher engine")
+        for name, csv_tests in [("selection", selection_tests), ("correction", correction_tests), ("self repair", selfrepair_tests)]:
+            start_time = time.perf_counter()
+            results = csv_tests(noop_assertion, False, matcher_engine=matcher_engine)
+            duration = time.perf_counter() - start_time
+            percentage = round((results[1] / results[0]) * 1000) / 10
+            assertion("    " + name.capitalize() + ": " + str(percentage) + "% valid in " + str(round(duration * 1000)) + "ms, " + \
+                str(round(duration * 1000 / results[0], 2)) + "ms per query")
+
 suite = create_test_suite("Selecting whole phrases inside of a selection")
 #suite.add_test(percentage_test_selection)
 #suite.add_test(percentage_test_correction)
 #suite.add_test(percentage_test_selfrepair)
 #suite.add_test(percentage_tests)
+#suite.add_test(matcher_engine_tests)
 #suite.run()
\ No newline at end of file
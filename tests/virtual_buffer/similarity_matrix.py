@@ -0,0 +1,70 @@
+from ...virtual_buffer.similarity_matrix import VirtualBufferSimilarityMatrix, get_query_variants
+from ...virtual_buffer.vocabulary import VirtualBufferVocabulary
+from ...virtual_buffer.matcher import VirtualBufferMatcher
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...phonetics.phonetics import PhoneticSearch
+from ..test import create_test_suite
+
+def get_tokens_from_sentence(sentence: str):
+    text_tokens = sentence.split(" ")
+    tokens = []
+    for index, text_token in enumerate(text_tokens):
+        tokens.extend(text_to_virtual_buffer_tokens(text_token + (" " if index < len(text_tokens) - 1 else "")))
+    return tokens
+
+def get_phonetic_search() -> PhoneticSearch:
+    phonetic_search = PhoneticSearch()
+    phonetic_search.set_homophones("where,wear,ware")
+    phonetic_search.set_phonetic_similiarities("")
+    phonetic_search.set_semantic_similarities("")
+    return phonetic_search
+
+def test_query_variants(assertion):
+    assertion("Generating the query variants of a similarity matrix")
+    assertion("    should contain the single words", get_query_variants(["a"]) == ["a"])
+    assertion("    should contain the combined words up to three words", get_query_variants(["an", "ex", "ample", "text"]) == \
+        ["an", "ex", "ample", "text", "anex", "example", "ampletext", "anexample", "exampletext"])
+    assertion("    should not contain duplicate variants", get_query_variants(["the", "the"]) == ["the", "thethe"])
+
+def test_similarity_matrix(assertion):
+    phonetic_search = get_phonetic_search()
+    vocabulary = VirtualBufferVocabulary(phonetic_search)
+    vocabulary.sync(get_tokens_from_sentence("Where did the quick brown fox jump over the lazy dog?"))
+    matrix = VirtualBufferSimilarityMatrix(phonetic_search, get_query_variants(["wear", "fax"]))
+    matrix.add_words(vocabulary)
+
+    assertion("Scoring the query against the buffer in a similarity matrix")
+    assertion("    should give the same scores as the phonetic search", matrix.get("wear", "where") == phonetic_search.phonetic_similarity_score("where", "wear"))
+    assertion("    should find a score in both directions", matrix.get("fox", "fax") == matrix.get("fax", "fox"))
+    assertion("    should score the combined query words", matrix.get("wearfax", "quick") == phonetic_search.phonetic_similarity_score("quick", "wearfax"))
+    assertion("    should not find words that are not in the buffer", matrix.get("wear", "shoes") is None)
+    vocabulary.sync(get_tokens_from_sentence("Where are the shoes?"))
+    matrix.add_words(vocabulary)
+    assertion("    should score new words in the buffer", matrix.get("wear", "shoes") == phonetic_search.phonetic_similarity_score("shoes", "wear"))
+    assertion("    should keep the words that left the buffer", matrix.get("fax", "fox") is not None)
+    assertion("    should be valid for the same query", matrix.is_valid(get_query_variants(["wear", "fax"])))
+    assertion("    should not be valid for a different query", not matrix.is_valid(get_query_variants(["fax"])))
+    phonetic_search.add_phonetic_similarity("fax", "fox")
+    assertion("    should not be valid after the phonetic search has changed", not matrix.is_valid(get_query_variants(["wear", "fax"])))
+
+def test_matcher_similarity_matrix(assertion):
+    matcher = VirtualBufferMatcher(get_phonetic_search())
+    matcher.vocabulary.sync(get_tokens_from_sentence("Where did the quick brown fox jump over the lazy dog?"))
+    matcher.update_similarity_matrix(matcher.generate_match_calculation(["brown", "box"]))
+    first_matrix = matcher.similarity_matrix
+
+    assertion("Using a similarity matrix in the matcher")
+    assertion("    should look up the scores from the matrix", matcher.get_memoized_similarity_score("fox", "box") == first_matrix.get("fox", "box"))
+    assertion("    should not memoize the scores in the matrix", matcher.similarity_memo.get("fox", "box") is None)
+    matcher.update_similarity_matrix(matcher.generate_match_calculation(["brown", "box"]))
+    assertion("    should reuse the matrix for the same query", matcher.similarity_matrix is first_matrix)
+    matcher.update_similarity_matrix(matcher.generate_match_calculation(["lazy", "dog"]))
+    assertion("    should create a new matrix for a different query", matcher.similarity_matrix is not first_matrix)
+    matcher.phonetic_search.add_phonetic_similarity("dog", "dock")
+    matcher.validate_similarity_memos()
+    assertion("    should drop the matrix after the phonetic search has changed", matcher.similarity_matrix is None)
+
+suite = create_test_suite("Similarity matrix of the query against the buffer")
+suite.add_test(test_query_variants)
+suite.add_test(test_similarity_matrix)
+suite.add_test(test_matcher_similarity_matrix)
@@ -0,0 +1,51 @@
+from ...virtual_buffer.matcher import VirtualBufferMatcher
+from ...virtual_buffer.similarity_memo import SimilarityMemo
+from ...phonetics.phonetics import PhoneticSearch
+from ..test import create_test_suite
+
+def get_phonetic_search() -> PhoneticSearch:
+    phonetic_search = PhoneticSearch()
+    phonetic_search.set_homophones("where,wear,ware")
+    phonetic_search.set_phonetic_similiarities("")
+    phonetic_search.set_semantic_similarities("")
+    return phonetic_search
+
+def test_bounded_memo(assertion):
+    memo = SimilarityMemo(3)
+    memo.set("where", "wear", 1.16)
+    memo.set("where", "were", 0.8)
+
+    assertion("Memoizing similarity scores")
+    assertion("    should find a score in both directions", memo.get("wear", "where") == 1.16 and memo.get("where", "wear") == 1.16)
+    assertion("    should not find a score that wasn't memoized", memo.get("where", "what") is None)
+    memo.set("an", "and", 0.5)
+    memo.get("where", "were")
+    memo.set("a", "an", 0.6)
+    assertion("    should evict the least recently used words when the maximum size is exceeded", memo.get("where", "wear") is None and memo.size() == 3)
+    assertion("    should keep the recently used words", memo.get("were", "where") == 0.8)
+    assertion("    should keep track of the hit rate", memo.get_stats()["hits"] == 4 and memo.get_stats()["misses"] == 2)
+    memo.set_max_size(1)
+    assertion("    should evict words when the maximum size is lowered", memo.size() == 1)
+    memo.validate(2)
+    assertion("    should be cleared when a different version is validated", memo.size() == 0)
+
+def test_invalidating_learned_similarities(assertion):
+    phonetic_search = get_phonetic_search()
+    matcher = VirtualBufferMatcher(phonetic_search)
+    matcher.validate_similarity_memos()
+    score = matcher.get_memoized_similarity_score("to", "two")
+
+    assertion("Learning similarities while scores are memoized")
+    assertion("    should memoize the score", matcher.get_similarity_memo_stats()["size"] == 1)
+    phonetic_search.add_homophone("to", "two")
+    matcher.validate_similarity_memos()
+    assertion("    should clear the memoized scores after a homophone is learned", matcher.get_similarity_memo_stats()["size"] == 0)
+    assertion("    should use the learned homophone right away", matcher.get_memoized_similarity_score("to", "two") > score)
+    phonetic_search.set_language("nl")
+    matcher.validate_similarity_memos()
+    assertion("    should clear the memoized scores after the language changes", matcher.get_similarity_memo_stats()["size"] == 0)
+    phonetic_search.set_language("en")
+
+suite = create_test_suite("Memoizing similarity scores")
+suite.add_test(test_bounded_memo)
+suite.add_test(test_invalidating_learned_similarities)
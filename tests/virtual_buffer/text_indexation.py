@@ -1,4 +1,4 @@
-from ...virtual_buffer.indexer import VirtualBufferIndexer
+from ...virtual_buffer.indexer import VirtualBufferIndexer, reindex_tokens, reindex_tokens_from, text_to_virtual_buffer_tokens
 from ..test import create_test_suite
 
 input_indexer = VirtualBufferIndexer()
@@ -34,7 +34,37 @@ def test_index_sentence_with_unorthodox_spacing(assertion):
     assertion("    the first word of the first line shouldn't be capitalized", [token for token in sentence_tokens if token.line_index == 0][0].text == "this  ")
     assertion("    the last word of the first line should contain the dot", [token for token in sentence_tokens if token.line_index == 0][-1].text == "sentence  . ")
 
+def test_reindex_from_changed_line(assertion):
+    tokens = input_indexer.index_text("""This is the first sentence.
+And this is a second sentence!
+And a third one.""")
+    first_line_tokens = [token for token in tokens if token.line_index == 0]
+    second_line_start = len(first_line_tokens)
+    tokens.insert(second_line_start + 1, text_to_virtual_buffer_tokens("new\n")[0])
+    expected_tokens = reindex_tokens(tokens)
+    reindexed_tokens = reindex_tokens_from(tokens, second_line_start + 1)
+
+    assertion( "Reindexing the tokens after inserting a line ending in the second sentence...")
+    assertion("    should result in the same line and character counts as reindexing all tokens", \
+        [(token.line_index, token.index_from_line_end) for token in reindexed_tokens] == [(token.line_index, token.index_from_line_end) for token in expected_tokens])
+    assertion("    should keep the tokens on the lines before the change", all([reindexed_tokens[index] is token for index, token in enumerate(first_line_tokens)]))
+    assertion("    should shift the line numbers of the lines after the change", reindexed_tokens[-1].text == "one." and reindexed_tokens[-1].line_index == 3)
+    assertion("    should not reindex anything when starting after the last token", reindex_tokens_from(reindexed_tokens, len(reindexed_tokens))[0] is first_line_tokens[0])
+
+    tokens = input_indexer.index_text("""This is the first sentence.
+And this is a second sentence!
+And a third one.""")
+    third_line_start = len([token for token in tokens if token.line_index < 2]) + 1
+    tokens.insert(second_line_start + 1, text_to_virtual_buffer_tokens("new\n")[0])
+    third_line_tokens = tokens[third_line_start:]
+    reindexed_tokens = reindex_tokens_from(tokens, second_line_start + 1, third_line_start)
+    assertion( "Reindexing the tokens after inserting a line ending with the third sentence left untouched...")
+    assertion("    should result in the same line and character counts as reindexing all tokens", \
+        [(token.line_index, token.index_from_line_end) for token in reindexed_tokens] == [(token.line_index, token.index_from_line_end) for token in expected_tokens])
+    assertion("    should keep the tokens on the untouched lines and shift their line numbers", all([reindexed_tokens[third_line_start + index] is token and token.line_index == 3 for index, token in enumerate(third_line_tokens)]))
+
 suite = create_test_suite("Text indexation")
 suite.add_test(test_index_single_sentence)
 suite.add_test(test_index_multiple_sentences)
-suite.add_test(test_index_sentence_with_unorthodox_spacing)
\ No newline at end of file
+suite.add_test(test_index_sentence_with_unorthodox_spacing)
+suite.add_test(test_reindex_from_changed_line)
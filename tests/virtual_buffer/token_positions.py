@@ -0,0 +1,44 @@
+from ...virtual_buffer.buffer import VirtualBuffer
+from ..test import create_test_suite
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...virtual_buffer.settings import VirtualBufferSettings
+
+def get_virtual_buffer() -> VirtualBuffer:
+    settings = VirtualBufferSettings(live_checking=False)
+    return VirtualBuffer(settings)
+
+def find_token_index_by_scanning(vb: VirtualBuffer, line_index: int, character_index: int) -> (int, int):
+    for token_index, token in enumerate(vb.tokens):
+        if token.line_index == line_index and \
+            token.index_from_line_end <= character_index and token.index_from_line_end + len(token.text) >= character_index:
+            return token_index, (len(token.text.replace("\n", "")) + token.index_from_line_end) - character_index
+    return -1, -1
+
+def test_token_positions(assertion):
+    vb = get_virtual_buffer()
+    vb.insert_tokens(text_to_virtual_buffer_tokens("Insert ", "insert"))
+    vb.insert_tokens(text_to_virtual_buffer_tokens("a ", "a"))
+    vb.insert_tokens(text_to_virtual_buffer_tokens("new ", "new"))
+    vb.insert_tokens(text_to_virtual_buffer_tokens("line.\n", "line"))
+    vb.insert_tokens(text_to_virtual_buffer_tokens("With ", "with"))
+    vb.insert_tokens(text_to_virtual_buffer_tokens("words.", "words"))
+
+    assertion( "Resolving caret positions to tokens with the token positions of 'Insert a new line.' followed by 'With words.'")
+    assertion("    should be up to date after inserting tokens", not vb.token_positions.outdated)
+    positions = [(line_index, character_index) for line_index, line_length in [(0, 18), (1, 11)] for character_index in range(line_length + 1)]
+    assertion("    should find the same tokens as scanning through all the tokens", \
+        all([vb.determine_token_index(position) == find_token_index_by_scanning(vb, *position) for position in positions]))
+    assertion("    should find the 'new line.' token at the end of the first line", vb.determine_token_index((0, 8)) == (2, 1))
+    assertion("    should find the 'words.' token at the end of the buffer", vb.determine_token_index((1, 0)) == (4, 6))
+    assertion("    should not find tokens on lines that do not exist", vb.determine_token_index((3, 0)) == (-1, -1))
+
+    vb.apply_key("up home right:7")
+    vb.insert_tokens(text_to_virtual_buffer_tokens("brand ", "brand"))
+    assertion("    should be up to date after inserting a token in the middle of the buffer", not vb.token_positions.outdated)
+    assertion("    should find the inserted 'brand ' token", vb.tokens[vb.determine_token_index((0, 14))[0]].text == "brand ")
+    assertion("    should find the 'words.' token on the next line", vb.tokens[vb.determine_token_index((1, 0))[0]].text == "words.")
+    vb.apply_key("backspace:6")
+    assertion("    should no longer find the removed 'brand ' token", vb.tokens[vb.determine_token_index((0, 14))[0]].text == "Insert ")
+
+suite = create_test_suite("Resolving caret positions to tokens")
+suite.add_test(test_token_positions)
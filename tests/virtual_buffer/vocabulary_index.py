@@ -0,0 +1,91 @@
+from ...virtual_buffer.vocabulary import VirtualBufferVocabulary
+from ...phonetics.phonetics import PhoneticSearch
+from ...virtual_buffer.indexer import text_to_virtual_buffer_tokens
+from ...virtual_buffer.buffer import VirtualBuffer
+from ...virtual_buffer.settings import VirtualBufferSettings
+from ...virtual_buffer.typing import SELECTION_THRESHOLD
+from ..test import create_test_suite
+
+def get_tokens_from_sentence(sentence: str):
+    text_tokens = sentence.split(" ")
+    tokens = []
+    for index, text_token in enumerate(text_tokens):
+        tokens.extend(text_to_virtual_buffer_tokens(text_token + (" " if index < len(text_tokens) - 1 else "")))
+    return tokens
+
+def get_phonetic_search() -> PhoneticSearch:
+    phonetic_search = PhoneticSearch()
+    phonetic_search.set_homophones("where,wear,ware")
+    phonetic_search.set_phonetic_similiarities("")
+    phonetic_search.set_semantic_similarities("")
+    return phonetic_search
+
+def test_vocabulary_upper_bounds(assertion):
+    phonetic_search = get_phonetic_search()
+    vocabulary = VirtualBufferVocabulary(phonetic_search)
+    tokens = get_tokens_from_sentence("Where did the quick brown fox jump over the lazy dog and where did it wear its new shoes to?")
+    vocabulary.sync(tokens)
+
+    assertion("Calculating the highest possible scores from the vocabulary")
+    for query in ["where", "fox", "wear", "jumping", "shoes", "sentence", "a", "laser"]:
+        upper_bounds = vocabulary.get_score_upper_bounds(query)
+        words = [token.phrase.replace(" ", "") for token in tokens]
+        lower_words = [word for word in words if phonetic_search.phonetic_similarity_score(word, query) > upper_bounds[word]]
+        assertion("    should never give a lower bound than the actual score for '" + query + "'", len(lower_words) == 0)
+    assertion("    should give an exact match for a known homophone", vocabulary.get_score_upper_bounds("ware")["wear"] >= 1)
+    assertion("    should give a low bound for words that are far apart", vocabulary.get_score_upper_bounds("sentence")["to"] < 0.29)
+
+def test_vocabulary_syncing(assertion):
+    vocabulary = VirtualBufferVocabulary(get_phonetic_search())
+    tokens = get_tokens_from_sentence("the quick brown fox")
+    vocabulary.sync(tokens)
+
+    assertion("Syncing the vocabulary with the buffer tokens")
+    assertion("    should index every distinct word", sorted(vocabulary.word_counts.keys()) == ["brown", "fox", "quick", "the"])
+    tokens[3].phrase = "box"
+    vocabulary.sync(tokens + get_tokens_from_sentence("the end"))
+    assertion("    should add new words and remove words that are no longer in the buffer", sorted(vocabulary.word_counts.keys()) == ["box", "brown", "end", "quick", "the"])
+    assertion("    should count the words that occur multiple times", vocabulary.word_counts["the"] == 2)
+    assertion("    should remove the bigrams of removed words", not any(["fox" in words for words in vocabulary.phonetic_bigrams.values()]))
+    assertion("    should find the bounds of added words", "box" in vocabulary.get_score_upper_bounds("fox"))
+    vocabulary.sync([])
+    assertion("    should be empty after syncing with an empty buffer", len(vocabulary.word_phonetics) == 0 and len(vocabulary.homophone_bigrams) == 0)
+
+def test_vocabulary_matching_words(assertion):
+    phonetic_search = get_phonetic_search()
+    vocabulary = VirtualBufferVocabulary(phonetic_search)
+    tokens = get_tokens_from_sentence("Where did the quick brown fox jump over the lazy dog?")
+    vocabulary.sync(tokens)
+    words = [token.phrase for token in tokens]
+
+    assertion("Checking whether a word matches with the vocabulary")
+    assertion("    should find an exact word", vocabulary.has_matching_word("fox", SELECTION_THRESHOLD))
+    assertion("    should find a known homophone", vocabulary.has_matching_word("wear", SELECTION_THRESHOLD))
+    for query in ["brow", "jumping", "lacy", "box", "sentence", "shoes", "a"]:
+        expected = any([phonetic_search.phonetic_similarity_score(query, word, min_score=SELECTION_THRESHOLD) >= SELECTION_THRESHOLD for word in words])
+        assertion("    should give the same result as scoring every word for '" + query + "'", vocabulary.has_matching_word(query, SELECTION_THRESHOLD) == expected)
+
+    vb = VirtualBuffer(VirtualBufferSettings(live_checking=False))
+    vb.insert_tokens(get_tokens_from_sentence("the quick brown fox"))
+    assertion("    should find a phrase inside of a buffer", vb.has_matching_phrase("brown"))
+    assertion("    should not walk through the tokens again if the buffer has not changed", vb.matcher.vocabulary.outdated == False)
+    vb.apply_backspace(4)
+    assertion("    should update the words directly when the buffer changes", not vb.matcher.vocabulary.outdated and "fox" not in vb.matcher.vocabulary.word_counts)
+    assertion("    should no longer find a removed phrase inside of a buffer", not vb.has_matching_phrase("fox"))
+    vb.insert_tokens(get_tokens_from_sentence("lazy dog and the"))
+    vb.apply_key("left:9 backspace:2 delete:4")
+    vb.insert_tokens(get_tokens_from_sentence("cat "))
+    word_counts = {}
+    for token in vb.tokens:
+        word_counts[token.phrase.replace(" ", "")] = word_counts.get(token.phrase.replace(" ", ""), 0) + 1
+    assertion("    should count the same words as the tokens after inserting and removing in the middle of the buffer", vb.matcher.vocabulary.word_counts == word_counts)
+    assertion("    should index the phonetics of every counted word", sorted(vb.matcher.vocabulary.word_phonetics.keys()) == sorted(word_counts.keys()))
+    word_counts = vb.matcher.vocabulary.word_counts
+    vb.insert_tokens(get_tokens_from_sentence("jumps "))
+    vb.select_phrases(["lazy", "cat"])
+    assertion("    should not rebuild the vocabulary when searching after the buffer has changed", vb.matcher.vocabulary.word_counts is word_counts and "jumps" in word_counts)
+
+suite = create_test_suite("Vocabulary index for finding matching words")
+suite.add_test(test_vocabulary_upper_bounds)
+suite.add_test(test_vocabulary_syncing)
+suite.add_test(test_vocabulary_matching_words)
@@ -1,3 +1,14 @@
+from typing import List
+
+# NumPy is optional, batch distance calculations fall back to pure Python without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Below this amount of words the overhead of setting up the arrays outweighs the vectorized calculation
+NUMPY_BATCH_MINIMUM = 16
+
 # Levenshtein text distance
 def levenshtein(a: str, b: str) -> int:
     a_len = len(a)
@@ -25,4 +36,68 @@ def levenshtein(a: str, b: str) -> int:
                 token_list[i-1][j] + 1  # deletion
             )
 
-    return token_list[b_len][a_len]
\ No newline at end of file
+    return token_list[b_len][a_len]
+
+# Levenshtein text distance that stops calculating once it exceeds the maximum distance
+# Only keeps two rows in memory, and returns max_distance + 1 when the distance is larger than allowed
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    a_len = len(a)
+    b_len = len(b)
+    if abs(a_len - b_len) > max_distance:
+        return max_distance + 1
+    if a_len == 0 or b_len == 0:
+        return a_len + b_len
+
+    previous_row = list(range(a_len + 1))
+    for i in range(1, b_len + 1):
+        b_char = b[i - 1]
+        current_row = [i]
+        row_minimum = i
+        for j in range(1, a_len + 1):
+            distance = min(
+                previous_row[j - 1] + (0 if b_char == a[j - 1] else 1), # substitution
+                current_row[j - 1] + 1, # insertion
+                previous_row[j] + 1 # deletion
+            )
+            current_row.append(distance)
+            if distance < row_minimum:
+                row_minimum = distance
+
+        # Every path through the matrix goes through this row, so the distance can only grow from here
+        if row_minimum > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+
+    return previous_row[a_len] if previous_row[a_len] <= max_distance else max_distance + 1
+
+
+# Levenshtein text distance of a single word compared to a list of words
+def levenshtein_many(a: str, words: List[str]) -> List[int]:
+    if numpy is None or len(words) < NUMPY_BATCH_MINIMUM:
+        return [levenshtein(a, word) for word in words]
+
+    word_lengths = [len(word) for word in words]
+    max_length = max(word_lengths)
+    if len(a) == 0 or max_length == 0:
+        return [len(a) + word_length for word_length in word_lengths]
+
+    # Encode the words as fixed width rows of code points, padding with a character that never matches
+    padded_words = "".join([word.ljust(max_length, "\0") for word in words])
+    word_codes = numpy.frombuffer(padded_words.encode("utf-32-le"), dtype=numpy.uint32).reshape(len(words), max_length)
+
+    # Calculate the rows of every word matrix at the same time
+    columns = numpy.arange(max_length + 1)
+    previous_rows = numpy.tile(columns, (len(words), 1))
+    current_rows = numpy.empty_like(previous_rows)
+    for i, char in enumerate(a, 1):
+        current_rows[:, 0] = i
+        numpy.minimum(
+            previous_rows[:, :-1] + (word_codes != ord(char)), # substitution
+            previous_rows[:, 1:] + 1, # deletion
+            out=current_rows[:, 1:]
+        )
+
+        # Insertions depend on the cell to the left, which is a running minimum over the row
+        previous_rows = numpy.minimum.accumulate(current_rows - columns, axis=1) + columns
+
+    return previous_rows[numpy.arange(len(words)), word_lengths].tolist()
@@ -0,0 +1,184 @@
+from ..phonetics.detection import PHONETIC_MATCH
+from .typing import VirtualBufferMatchCalculation, VirtualBufferTokenList, VirtualBufferMatch
+from typing import List, Tuple, Dict
+
+# Name of the matcher engine setting that enables the alignment engine
+# The default engine expands match trees branch by branch
+ALIGNMENT_ENGINE = "alignment"
+
+# Mirrors the penalty for skipped buffer words in the match trees
+SKIP_SCORE_PENALTY = 0.08
+
+# Mirrors the threshold a combined score needs to be better than the separate scores
+COMBINED_BETTER_THRESHOLD = 0.075
+
+# The amount of best alignments kept in every direction, which are combined into match trees
+MAX_ALIGNMENTS = 3
+
+# A single step in an alignment, where the query words are matched with the buffer words
+# Skipped buffer words are the gaps between the buffer words of consecutive steps
+AlignmentStep = Tuple[List[int], List[int]]
+
+# A scored alignment in a direction, with the resulting score potential, the amount of skips and the steps taken
+Alignment = Tuple[float, int, List[AlignmentStep]]
+
+# Aligns the query words around a match root with dynamic programming, instead of enumerating every branch of the match tree
+# The transitions mirror the match tree expansions: single words, 2 or 3 query words on a buffer word,
+# a query word on 2 or 3 buffer words, and skipping a single buffer word with the same skip rules
+# Every state only keeps the best scoring path towards it, so the amount of work grows with the query and buffer size
+# Rather than with the amount of branches
+class VirtualBufferAlignmentEngine:
+
+    # The matcher used for scoring, typed loosely to prevent circular imports
+    matcher = None
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+
+    # Expand the match root backward and forward, and combine the best alignments into match trees
+    # The match trees still need to be filtered by the matcher
+    def align_match_tree(self, match_tree: VirtualBufferMatch, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, verbose: bool = False) -> List[VirtualBufferMatch]:
+        backward_alignments = self.align_in_direction(match_tree, match_calculation, sublist, -1) \
+            if match_tree.can_expand_backward(sublist) else [(match_tree.score_potential, 0, [])]
+        forward_alignments = self.align_in_direction(match_tree, match_calculation, sublist, 1) \
+            if match_tree.can_expand_forward(match_calculation, sublist) else [(match_tree.score_potential, 0, [])]
+        if verbose:
+            print( "---- BACKWARD ALIGNMENTS", backward_alignments )
+            print( "---- FORWARD ALIGNMENTS", forward_alignments )
+
+        match_trees = []
+        for _, backward_skips, backward_steps in backward_alignments:
+            for _, forward_skips, forward_steps in forward_alignments:
+                if backward_skips + forward_skips > max(0, match_calculation.allowed_skips):
+                    continue
+
+                aligned_match_tree = match_tree
+                for query_indices, buffer_indices in backward_steps:
+                    aligned_match_tree = self.matcher.add_tokens_to_match_tree(aligned_match_tree, match_calculation, sublist, query_indices, buffer_indices, -1)
+                for query_indices, buffer_indices in forward_steps:
+                    aligned_match_tree = self.matcher.add_tokens_to_match_tree(aligned_match_tree, match_calculation, sublist, query_indices, buffer_indices, 1)
+                self.matcher.expansion_counters.created += 1
+                if aligned_match_tree.score_potential >= match_calculation.match_threshold:
+                    match_trees.append(aligned_match_tree)
+                else:
+                    self.matcher.expansion_counters.pruned += 1
+
+        return match_trees
+
+    # Find the best alignments of the remaining query words with the buffer words in a single direction
+    def align_in_direction(self, match_tree: VirtualBufferMatch, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, direction: int) -> List[Alignment]:
+        if direction > 0:
+            query_order = list(range(match_tree.query_indices[-1][-1] + 1, match_calculation.length))
+            buffer_order = list(range(match_tree.buffer_indices[-1][-1] + 1, sublist.length))
+            last_score = match_tree.scores[-1]
+        else:
+            query_order = list(range(match_tree.query_indices[0][0] - 1, -1, -1))
+            buffer_order = list(range(match_tree.buffer_indices[0][0] - 1, -1, -1))
+            last_score = match_tree.scores[0]
+
+        allowed_skips = max(0, match_calculation.allowed_skips - match_tree.scores.count(0.0))
+        query_length = len(query_order)
+        buffer_length = min(len(buffer_order), query_length * 3 + allowed_skips)
+
+        # Every state is the amount of query words, buffer words and skips used, with the best path towards it
+        states: Dict[Tuple[int, int, int], Tuple[float, float, Tuple[int, int, int], AlignmentStep]] = {(0, 0, 0): (match_tree.score_potential, last_score, None, None)}
+        for query_position in range(0, query_length + 1):
+            for buffer_position in range(0, buffer_length + 1):
+                for skips in range(0, allowed_skips + 1):
+                    state = (query_position, buffer_position, skips)
+                    if state not in states or query_position == query_length or buffer_position == buffer_length:
+                        continue
+
+                    score_potential, previous_score, _, _ = states[state]
+                    for skipped in range(0, 2 if skips < allowed_skips else 1):
+                        for query_indices, buffer_indices, score in self.get_transitions(match_calculation, sublist, query_order, buffer_order[:buffer_length], \
+                            query_position, buffer_position, skipped, previous_score, direction):
+                            weight = sum([match_calculation.weights[query_index] for query_index in query_indices])
+                            next_score_potential = score_potential - (match_calculation.max_score - score) * weight - SKIP_SCORE_PENALTY * skipped
+                            if next_score_potential < match_calculation.match_threshold:
+                                continue
+
+                            next_state = (query_position + len(query_indices), buffer_position + skipped + len(buffer_indices), skips + skipped)
+                            if next_state not in states or states[next_state][0] < next_score_potential:
+                                states[next_state] = (next_score_potential, score, state, (sorted(query_indices), sorted(buffer_indices)))
+
+        # Alignments end when either the query or the buffer has been used up
+        final_states = [state for state in states if state != (0, 0, 0) and (state[0] == query_length or state[1] == len(buffer_order))]
+        final_states.sort(key=lambda state: states[state][0], reverse=True)
+        alignments = []
+        for final_state in final_states[:MAX_ALIGNMENTS]:
+            steps = []
+            state = final_state
+            while states[state][2] is not None:
+                steps.insert(0, states[state][3])
+                state = states[state][2]
+            alignments.append((states[final_state][0], final_state[2], steps))
+        return alignments
+
+    # Determine the single, combined query and combined buffer steps from a position in the alignment
+    # Combined steps are only taken if they score better than the separate words, like in the match tree expansions
+    def get_transitions(self, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, query_order: List[int], buffer_order: List[int], \
+        query_position: int, buffer_position: int, skipped: int, previous_score: float, direction: int) -> List[Tuple[List[int], List[int], float]]:
+        buffer_position += skipped
+        if buffer_position >= len(buffer_order):
+            return []
+
+        query_index = query_order[query_position]
+        buffer_index = buffer_order[buffer_position]
+        single_score = self.get_score(match_calculation, sublist, [query_index], [buffer_index])
+
+        transitions = []
+        if skipped == 0 or self.can_skip(match_calculation, sublist, query_index, buffer_index, previous_score, single_score, direction):
+            transitions.append(([query_index], [buffer_index], single_score))
+
+        # Combine query words on a single buffer word
+        if query_position + 1 < len(query_order) and query_order[query_position + 1] < sublist.length:
+            combined_query_indices = query_order[query_position:query_position + 2]
+            combined_score = self.get_score(match_calculation, sublist, combined_query_indices, [buffer_index])
+            next_score = self.get_score(match_calculation, sublist, [combined_query_indices[-1]], [buffer_index])
+            if combined_score - COMBINED_BETTER_THRESHOLD >= single_score and combined_score - COMBINED_BETTER_THRESHOLD >= next_score:
+                transitions.append((combined_query_indices, [buffer_index], combined_score))
+
+                if query_position + 2 < len(query_order) and query_order[query_position + 2] < sublist.length:
+                    triple_query_indices = query_order[query_position:query_position + 3]
+                    triple_score = self.get_score(match_calculation, sublist, triple_query_indices, [buffer_index])
+                    if triple_score > combined_score:
+                        transitions.append((triple_query_indices, [buffer_index], triple_score))
+
+        # Combine buffer words for a single query word, as long as the syllables do not exceed those of the query word
+        if buffer_position + 1 < len(buffer_order):
+            combined_buffer_indices = buffer_order[buffer_position:buffer_position + 2]
+            combined_buffer_words = "".join([sublist.tokens[index].phrase for index in sorted(combined_buffer_indices)])
+            if self.matcher.phonetic_search.syllable_count(match_calculation.words[query_index]) >= self.matcher.phonetic_search.syllable_count(combined_buffer_words):
+                combined_score = self.get_score(match_calculation, sublist, [query_index], combined_buffer_indices)
+                skipped_score = self.get_score(match_calculation, sublist, [query_index], [combined_buffer_indices[-1]])
+                if combined_score - COMBINED_BETTER_THRESHOLD > single_score and combined_score - COMBINED_BETTER_THRESHOLD > skipped_score:
+                    transitions.append(([query_index], combined_buffer_indices, combined_score))
+
+                    if buffer_position + 2 < len(buffer_order):
+                        triple_buffer_indices = buffer_order[buffer_position:buffer_position + 3]
+                        triple_score = self.get_score(match_calculation, sublist, [query_index], triple_buffer_indices)
+                        if triple_score > combined_score:
+                            transitions.append(([query_index], triple_buffer_indices, triple_score))
+
+        return transitions
+
+    # Mirrors the skip rules of the match tree expansions for single word matches
+    def can_skip(self, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, query_index: int, buffer_index: int, previous_score: float, score: float, direction: int) -> bool:
+        skipped_index = buffer_index - direction
+        if match_calculation.selfrepair:
+            return self.get_score(match_calculation, sublist, [query_index], [skipped_index]) < score
+        elif match_calculation.purpose != "selection":
+            return True
+
+        previous_syllables = self.matcher.get_token_phonetics(sublist.tokens[skipped_index - direction]).syllables
+        skipped_syllables = self.matcher.get_token_phonetics(sublist.tokens[skipped_index]).syllables
+        next_syllables = self.matcher.get_token_phonetics(sublist.tokens[buffer_index]).syllables
+        long_word_skip_rule = skipped_syllables <= previous_syllables and skipped_syllables <= next_syllables
+        perfect_skip_rule = score >= PHONETIC_MATCH and previous_score >= PHONETIC_MATCH
+        return long_word_skip_rule or perfect_skip_rule
+
+    def get_score(self, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, query_indices: List[int], buffer_indices: List[int]) -> float:
+        query_words = "".join([match_calculation.words[query_index] for query_index in sorted(query_indices)])
+        buffer_words = "".join([sublist.tokens[buffer_index].phrase for buffer_index in sorted(buffer_indices)])
+        return self.matcher.get_memoized_similarity_score(query_words, buffer_words)
@@ -1,10 +1,12 @@
 from talon import Module, Context
-from .typing import VirtualBufferToken, VirtualBufferTokenContext, SELECTION_THRESHOLD, CORRECTION_THRESHOLD
+from .typing import VirtualBufferToken, VirtualBufferTokenContext, VirtualBufferFormatterContext, SELECTION_THRESHOLD, CORRECTION_THRESHOLD
 from .matcher import VirtualBufferMatcher
+from .match_cursor import VirtualBufferMatchCursor
+from .token_positions import VirtualBufferTokenPositions
 from typing import List
 from .caret_tracker import CaretTracker
 from ..phonetics.actions import phonetic_search
-from .indexer import text_to_phrase, normalize_text, reindex_tokens, text_to_virtual_buffer_tokens
+from .indexer import text_to_phrase, normalize_text, reindex_tokens_from, text_to_virtual_buffer_tokens
 from .input_history import InputHistory, InputEventType
 import re
 from .settings import VirtualBufferSettings, virtual_buffer_settings
@@ -25,7 +27,12 @@ class VirtualBuffer:
     input_history: InputHistory = None
     virtual_selection = None
     last_direction = None
+    match_cursor: VirtualBufferMatchCursor = None
     settings: VirtualBufferSettings = None
+    reindex_from_index: int = 0
+    reindex_tail_length: int = 0
+    token_positions: VirtualBufferTokenPositions = None
+    version: int = 0
 
     def __init__(self, settings: VirtualBufferSettings = None):
         global virtual_buffer_settings
@@ -33,7 +40,12 @@ class VirtualBuffer:
         self.caret_tracker = CaretTracker(settings=self.settings)
         self.input_history = InputHistory()
         self.last_direction = 0
-        self.matcher = VirtualBufferMatcher(phonetic_search)
+        self.match_cursor = None
+        self.matcher = VirtualBufferMatcher(phonetic_search, settings=self.settings)
+        self.reindex_from_index = 0
+        self.reindex_tail_length = 0
+        self.token_positions = VirtualBufferTokenPositions()
+        self.version = 0
         self.set_tokens()
 
     def is_selecting(self) -> bool:
@@ -47,12 +59,15 @@ class VirtualBuffer:
         self.last_direction = 0
 
     def set_tokens(self, tokens: List[VirtualBufferToken] = None, move_cursor_to_end: bool = False):
+        self.mark_tokens_changed()
         self.virtual_selection = []
         if tokens is None:
             self.caret_tracker.clear()
             self.tokens = []
+            self.matcher.vocabulary.clear()
         else:
             self.tokens = tokens
+            self.matcher.vocabulary.mark_outdated()
 
         if move_cursor_to_end:
             self.reformat_tokens()
@@ -60,6 +75,8 @@ class VirtualBuffer:
             self.caret_tracker.append_before_caret("".join([token.text for token in self.tokens]))
 
     def set_and_merge_tokens(self, tokens: List[VirtualBufferToken] = None, indices_to_insert: List[int] = None):
+        self.mark_tokens_changed()
+        self.matcher.vocabulary.mark_outdated()
         if indices_to_insert is None or len(indices_to_insert) == 0:
             self.set_tokens(tokens)
         else:
@@ -83,6 +100,7 @@ class VirtualBuffer:
 
                 # Insert the remaining tokens
                 if index_of_index + 1 >= len(indices_to_insert) and index_to_insert < len(tokens) - 1:
+                    self.mark_tokens_changed(len(self.tokens))
                     self.tokens.extend(tokens[index_to_insert + 1:])
                     self.caret_tracker.set_buffer("".join([token.text for token in self.tokens]))
 
@@ -90,6 +108,7 @@ class VirtualBuffer:
                 elif index_of_index + 1 < len(indices_to_insert) - 1:
                     next_index_to_insert = indices_to_insert[index_of_index + 1]
                     if next_index_to_insert - 1 > index_to_insert:
+                        self.mark_tokens_changed(len(self.tokens))
                         self.tokens.extend(tokens[index_to_insert + 1:next_index_to_insert])
                         self.caret_tracker.set_buffer("".join([token.text for token in self.tokens]))
                         self.reformat_tokens()                        
@@ -112,11 +131,18 @@ class VirtualBuffer:
 
         line_index, character_index = caret_index
         if line_index > -1 and character_index > -1: 
-            for token_index, token in enumerate(self.tokens):
-                if token.line_index == line_index and \
-                    token.index_from_line_end <= character_index and token.index_from_line_end + len(token.text) >= character_index:
-                    token_character_index = (len(token.text.replace("\n", "")) + token.index_from_line_end) - character_index
+            # Use the positions of the reindexed tokens, only scan the tokens if they are being changed
+            if not self.token_positions.outdated:
+                token_index, token_character_index = self.token_positions.find(self.tokens, line_index, character_index)
+                if token_index > -1:
                     return token_index, token_character_index
+
+            else:
+                for token_index, token in enumerate(self.tokens):
+                    if token.line_index == line_index and \
+                        token.index_from_line_end <= character_index and token.index_from_line_end + len(token.text) >= character_index:
+                        token_character_index = (len(token.text.replace("\n", "")) + token.index_from_line_end) - character_index
+                        return token_index, token_character_index
             
             # Detect new lines properly
             if len(self.tokens) > 0 and "\n" in self.tokens[-1].text:
@@ -139,11 +165,52 @@ class VirtualBuffer:
         reformat_after_each_token = starting_token_index < len(self.tokens) - 1
         starting_token_text = "" if starting_token_index == -1 else self.tokens[starting_token_index].text
 
-        for index, token in enumerate(tokens):
-            self.insert_token(token, reformat_after_each_token or index == len(tokens) - 1)
+        if not reformat_after_each_token or not self.splice_tokens(tokens):
+            for index, token in enumerate(tokens):
+                self.insert_token(token, reformat_after_each_token or index == len(tokens) - 1)
 
         self.reconstruct_insert_token_events(tokens, starting_token_text, starting_token_index, starting_token_character_index)
 
+    # Insert multiple tokens in between two tokens at once, rather than one token at a time with a reindex after every token
+    # This is only possible if every token would be appended after the previous one without merging,
+    # So only the merge strategy at the caret needs to be detected, returns False if the tokens need to be inserted one by one
+    def splice_tokens(self, tokens: List[VirtualBufferToken]) -> bool:
+        if len(tokens) < 2 or self.is_selecting() or len(self.virtual_selection) > 0:
+            return False
+
+        for token in tokens:
+            if "\n" in token.text or not normalize_text(token.text).endswith(" "):
+                return False
+
+        line_index, character_index = self.caret_tracker.get_caret_index()
+        if line_index < 0 or character_index < 0:
+            return False
+
+        token_index, token_character_index = self.determine_token_index()
+        if token_index < 0 or token_index >= len(self.tokens) - 1 or \
+            self.detect_merge_strategy(token_index, token_character_index, tokens[0]) != (MERGE_STRATEGY_IGNORE, MERGE_STRATEGY_APPEND_AFTER, MERGE_STRATEGY_IGNORE):
+            return False
+
+        # The first token is inserted regularly, which also reindexes the line of the caret
+        # After that the caret should be right after the first token, unless the tokens did not match the text around the caret
+        self.insert_token(tokens[0])
+        token_index += 1
+        if self.determine_token_index() != (token_index, len(tokens[0].text)):
+            for token in tokens[1:]:
+                self.insert_token(token)
+            return True
+
+        # Only the line of the caret changes, the reindex updates the character counts of the tokens before the splice on that line
+        spliced_tokens = tokens[1:]
+        self.mark_tokens_changed(token_index, token_index)
+        for token in spliced_tokens:
+            token.line_index = self.tokens[token_index].line_index
+        self.tokens[token_index + 1:token_index + 1] = spliced_tokens
+        self.matcher.vocabulary.add_tokens(spliced_tokens)
+        self.caret_tracker.append_before_caret("".join([token.text for token in spliced_tokens]))
+        self.reformat_tokens(token_index)
+        return True
+
     def insert_token(self, token_to_insert: VirtualBufferToken, reformat = True):
         if token_to_insert != "":
             if self.is_selecting():
@@ -167,14 +234,22 @@ class VirtualBuffer:
         line_index, character_index = self.caret_tracker.get_caret_index()
         if line_index > -1 and character_index > -1:
             token_index, token_character_index = self.determine_token_index()
+            self.mark_tokens_changed(token_index - 1, None if token_index < 0 else token_index + 1)
 
             merge_strategies = self.detect_merge_strategy(token_index, token_character_index, token_to_insert)
 
             appended = False
             if merge_strategies[0] == MERGE_STRATEGY_APPEND_AFTER or merge_strategies[1] == MERGE_STRATEGY_APPEND_AFTER:
                 # Update the previous tokens on this line to have accurate character count
-                for token in self.tokens:
-                    if token_to_insert.line_index == line_index:
+                if token_to_insert.line_index == line_index:
+                    line_starting_index = max(0, token_index)
+                    while line_starting_index > 0 and self.tokens[line_starting_index - 1].line_index == line_index:
+                        line_starting_index -= 1
+                    line_ending_index = max(0, token_index)
+                    while line_ending_index < len(self.tokens) and self.tokens[line_ending_index].line_index == line_index:
+                        line_ending_index += 1
+                    self.mark_tokens_changed(line_starting_index, line_ending_index)
+                    for token in self.tokens[line_starting_index:line_ending_index]:
                         token.index_from_line_end += len(token.text.replace("\n", ""))
                 token_to_insert.line_index += line_index
                 
@@ -183,8 +258,9 @@ class VirtualBuffer:
                         self.append_token_after(token_index, token_to_insert, reformat)
                     else:
                         self.tokens.append(token_to_insert)
+                        self.matcher.vocabulary.add_tokens([token_to_insert])
                         if reformat:
-                            self.reformat_tokens()
+                            self.reformat_tokens(len(self.tokens) - 1)
                 else:
                     self.append_token_after(token_index - 1, token_to_insert, reformat)
 
@@ -206,7 +282,7 @@ class VirtualBuffer:
                     elif merge_strategies[2] == MERGE_STRATEGY_JOIN:
                         self.merge_tokens(token_index + 1, 0, token_to_insert)
                     if reformat:
-                        self.reformat_tokens()
+                        self.reformat_tokens(token_index - 1)
 
                 elif MERGE_STRATEGY_SPLIT in merge_strategies or \
                     MERGE_STRATEGY_JOIN_LEFT_SPLIT_RIGHT in merge_strategies or MERGE_STRATEGY_SPLIT_LEFT_JOIN_RIGHT in merge_strategies:
@@ -214,22 +290,32 @@ class VirtualBuffer:
         else:
             self.clear_tokens()
             self.tokens.append(token_to_insert)
+            self.matcher.vocabulary.add_tokens([token_to_insert])
             self.caret_tracker.append_before_caret(token_to_insert.text)
 
     def append_token_after(self, token_index: int, appended_token: VirtualBufferToken, should_reindex = True):
+        self.mark_tokens_changed(token_index, token_index)
         appended_token.line_index = self.tokens[token_index].line_index
         if self.tokens[token_index].text.endswith("\n"):
             appended_token.line_index += 1
 
         reindex = should_reindex and token_index + 1 < len(self.tokens)
         self.tokens.insert(token_index + 1, appended_token)
+        self.matcher.vocabulary.add_tokens([appended_token])
         if reindex:
-            self.reformat_tokens()
+            self.reformat_tokens(token_index)
 
     def find_self_repair(self, phrase: List[str], verbose: bool = False):
         self_repair_matches = self.matcher.find_self_repair_match(self, phrase, verbose=verbose)
         return self_repair_matches
 
+    # Find the self repair of tokens that were tracked earlier, falling back to a fuzzy search if they are no longer in place
+    def find_self_repair_by_tokens(self, tokens: List[VirtualBufferToken], verbose: bool = False):
+        self_repair_match = self.matcher.find_self_repair_match_by_tokens(self, tokens)
+        if self_repair_match is None:
+            self_repair_match = self.find_self_repair([token.phrase for token in tokens], verbose=verbose)
+        return self_repair_match
+
     def detect_self_repair(self, phrase: List[str], verbose: bool = False) -> bool:
         return self.find_self_repair(phrase, verbose=verbose) is not None
 
@@ -289,28 +375,27 @@ class VirtualBuffer:
         return (previous_strategy, current_strategy, next_strategy)
 
     def split_tokens(self, token_index: int, token_character_index: int, token: VirtualBufferToken, merge_strategy: (int, int, int)):
+        self.mark_tokens_changed(token_index, token_index)
         before_text = self.tokens[token_index].text[:token_character_index]
         after_text = self.tokens[token_index].text[token_character_index:]
         if merge_strategy[1] == MERGE_STRATEGY_SPLIT:
-            self.tokens[token_index].text = before_text
-            self.tokens[token_index].phrase = text_to_phrase(before_text)
+            self.set_token_text(self.tokens[token_index], before_text)
             self.append_token_after(token_index, token)
             self.append_token_after(token_index + 1, VirtualBufferToken(after_text, text_to_phrase(after_text), self.tokens[token_index].format))
 
         elif merge_strategy[1] == MERGE_STRATEGY_JOIN_LEFT_SPLIT_RIGHT:
-            self.tokens[token_index].text = before_text + token.text
-            self.tokens[token_index].phrase = text_to_phrase(before_text + token.text)
+            self.set_token_text(self.tokens[token_index], before_text + token.text)
             self.append_token_after(token_index, VirtualBufferToken(after_text, text_to_phrase(after_text), self.tokens[token_index].format))
 
         elif merge_strategy[1] == MERGE_STRATEGY_SPLIT_LEFT_JOIN_RIGHT:
-            self.tokens[token_index].text = before_text
-            self.tokens[token_index].phrase = text_to_phrase(before_text)
+            self.set_token_text(self.tokens[token_index], before_text)
             token.text = token.text + after_text
             token.phrase = text_to_phrase(token.text)
             self.append_token_after(token_index, token)
-        self.reformat_tokens()
+        self.reformat_tokens(token_index)
 
     def merge_tokens(self, token_index: int, token_character_index: int, token: VirtualBufferToken):
+        self.mark_tokens_changed(token_index, token_index)
         previous_token = self.tokens[token_index]
 
         if "\n" in token.text:
@@ -338,8 +423,7 @@ class VirtualBuffer:
 
         for index, new_token in enumerate(tokens):
             if index == 0:
-                self.tokens[token_index].text = new_token.text
-                self.tokens[token_index].phrase = new_token.phrase
+                self.set_token_text(self.tokens[token_index], new_token.text)
                 if new_token.text.endswith("\n"):
                     self.tokens[token_index].index_from_line_end = 0
             else:
@@ -481,67 +565,73 @@ class VirtualBuffer:
                     deleted_tokens[-1].index_from_line_end,
                 )
 
+            # Only the tokens inside of the selection are replaced, the tokens before and after it are kept
+            first_index = max(0, start_index[0])
+            last_index = end_index[0]
+            self.mark_tokens_changed(first_index - 1, last_index + 1)
+            self.matcher.vocabulary.remove_tokens(self.tokens[first_index:last_index + 1])
             merge_token = None
             should_detect_merge = False
 
             tokens = []
-            for token_index, token in enumerate(self.tokens):
-                if token_index < start_index[0] or token_index > end_index[0]:
-
-                    # Attempt merge if the tokens can be combined
-                    if should_detect_merge and not re.sub(r"[^\w\s]", ' ', token.text).replace("\n", " ").startswith(" ") and \
-                            not re.sub(r"[^\w\s]", ' ', tokens[-1].text).replace("\n", " ").endswith(" "):
-
-                        merge_token = tokens[-1]
-                        text = merge_token.text + token.text
-                        tokens[-1].text = text
-                        tokens[-1].phrase = text_to_phrase(text)
-                        merge_token = None
-                        should_detect_merge = False
-
-                    # Otherwise just add the token
-                    else:
+            for token_index in range(first_index, last_index + 1):
+                token = self.tokens[token_index]
+                text = token.text
+
+                # Same token - No overlap between tokens
+                if token_index == start_index[0] and token_index == end_index[0]:
+                    text = text[:start_index[1]] + text[end_index[1]:]
+                    if text != "":
+                        tokens.append(VirtualBufferToken(text, text_to_phrase(text), "", token.line_index))
+                        should_detect_merge = start_index[1] == 0 or end_index[1] >= len(text.replace("\n", ""))
+                # Split token, remember the first token from the selection
+                elif token_index == start_index[0]:
+                    text = text[:start_index[1]]
+                    should_detect_merge = not re.sub(r"[^\w\s]", ' ', text).replace("\n", " ").endswith(" ")
+                    if start_index[1] == len(token.text.replace('\n', '')) and not should_detect_merge:
                         tokens.append(token)
-                else:
-                    text = token.text
-
-                    # Same token - No overlap between tokens
-                    if token_index == start_index[0] and token_index == end_index[0]:
-                        text = text[:start_index[1]] + text[end_index[1]:]
-                        if text != "":
-                            tokens.append(VirtualBufferToken(text, text_to_phrase(text), "", token.line_index))
-                            should_detect_merge = start_index[1] == 0 or end_index[1] >= len(text.replace("\n", ""))
-                    # Split token, remember the first token from the selection
-                    elif token_index == start_index[0]:
-                        text = text[:start_index[1]]
-                        should_detect_merge = not re.sub(r"[^\w\s]", ' ', text).replace("\n", " ").endswith(" ")
-                        if start_index[1] == len(token.text.replace('\n', '')) and not should_detect_merge:
-                            tokens.append(token)
-                        elif start_index[1] > 0:
-                            merge_token = VirtualBufferToken(text, text_to_phrase(text), "", token.line_index)
-                    # Split token, attempt to merge the first token with the current token
-                    elif token_index == end_index[0]:
-                        text = text[end_index[1]:]
-
-                        if merge_token is not None and should_detect_merge and not re.sub(r"[^\w\s]", ' ', text).replace("\n", " ").startswith(" "):
-                            text = merge_token.text + text
-                        elif merge_token is not None:
-                            tokens.append(merge_token)
-
-                        merge_token = None
-                        should_detect_merge = False
-                        if text != "":
-                            tokens.append(VirtualBufferToken(text, text_to_phrase(text), "", token.line_index))
-            
-            self.input_history.add_event(InputEventType.REMOVE, [])
-            self.input_history.append_target_to_last_event(deleted_tokens)
+                    elif start_index[1] > 0:
+                        merge_token = VirtualBufferToken(text, text_to_phrase(text), "", token.line_index)
+                # Split token, attempt to merge the first token with the current token
+                elif token_index == end_index[0]:
+                    text = text[end_index[1]:]
+
+                    if merge_token is not None and should_detect_merge and not re.sub(r"[^\w\s]", ' ', text).replace("\n", " ").startswith(" "):
+                        text = merge_token.text + text
+                    elif merge_token is not None:
+                        tokens.append(merge_token)
+
+                    merge_token = None
+                    should_detect_merge = False
+                    if text != "":
+                        tokens.append(VirtualBufferToken(text, text_to_phrase(text), "", token.line_index))
 
             # If we are left with a merge token, add it anyway
             if merge_token is not None:
                 tokens.append(merge_token)
 
-            self.tokens = tokens
-            self.reformat_tokens()
+            # Attempt merge with the token after the selection if the tokens can be combined
+            last_index = max(last_index, first_index - 1)
+            seam_token = tokens[-1] if len(tokens) > 0 else None if first_index == 0 else self.tokens[first_index - 1]
+            if should_detect_merge and seam_token is not None and last_index + 1 < len(self.tokens):
+                token = self.tokens[last_index + 1]
+                if not re.sub(r"[^\w\s]", ' ', token.text).replace("\n", " ").startswith(" ") and \
+                    not re.sub(r"[^\w\s]", ' ', seam_token.text).replace("\n", " ").endswith(" "):
+                    self.matcher.vocabulary.remove_tokens([token])
+                    text = seam_token.text + token.text
+                    if len(tokens) == 0:
+                        self.set_token_text(seam_token, text)
+                    else:
+                        seam_token.text = text
+                        seam_token.phrase = text_to_phrase(text)
+                    last_index += 1
+
+            self.input_history.add_event(InputEventType.REMOVE, [])
+            self.input_history.append_target_to_last_event(deleted_tokens)
+
+            self.tokens[first_index:last_index + 1] = tokens
+            self.matcher.vocabulary.add_tokens(tokens)
+            self.reformat_tokens(first_index - 1)
 
             return True
         else:
@@ -559,6 +649,8 @@ class VirtualBuffer:
         line_index, character_index = self.caret_tracker.get_caret_index()
         if line_index > -1 and character_index > -1:
             token_index, token_character_index = self.determine_token_index()
+            changed_token_index = max(0, token_index - 1)
+            self.mark_tokens_changed(changed_token_index, None if token_index < 0 else token_index + 1)
             text = self.tokens[token_index].text
             remove_from_token = min(len(text) - token_character_index, delete_count)
             remove_from_next_tokens = delete_count - (len(text) - token_character_index)
@@ -569,6 +661,7 @@ class VirtualBuffer:
 
             if text == "":
                 deleted_tokens.append(self.tokens[token_index])
+                self.matcher.vocabulary.remove_tokens([self.tokens[token_index]])
                 del self.tokens[token_index]
                 token_index -= 1
             else:
@@ -581,32 +674,36 @@ class VirtualBuffer:
                   self.tokens[token_index].index_from_line_end
                 ))
 
-                self.tokens[token_index].text = text
-                self.tokens[token_index].phrase = text_to_phrase(text)
+                self.set_token_text(self.tokens[token_index], text)
 
             next_token_index = token_index + 1
             if remove_from_next_tokens > 0:
-                while next_token_index < len(self.tokens) and remove_from_next_tokens > 0:
-                    if len(self.tokens[next_token_index].text) <= remove_from_next_tokens:
-                        remove_from_next_tokens -= len(self.tokens[next_token_index].text)
-                        deleted_tokens.append(self.tokens[next_token_index])
-                        del self.tokens[next_token_index]
-                    else:
-                        # Mark a partially deleted start token
-                        deleted_tokens.append(VirtualBufferToken(
-                            self.tokens[token_index].text[:remove_from_next_tokens],
-                            self.tokens[token_index].phrase,
-                            self.tokens[token_index].format,
-                            self.tokens[token_index].line_index,
-                            self.tokens[token_index].index_from_line_end
-                        ))
-
-                        next_text = self.tokens[next_token_index].text[remove_from_next_tokens:]
-                        self.tokens[next_token_index].text = next_text
-                        self.tokens[next_token_index].phrase = text_to_phrase(next_text)
-
-                        remove_from_next_tokens = 0
-                        self.reformat_tokens()
+                # Remove all the fully removed tokens after the caret at once
+                last_removed_index = next_token_index
+                while last_removed_index < len(self.tokens) and remove_from_next_tokens > 0 and \
+                    len(self.tokens[last_removed_index].text) <= remove_from_next_tokens:
+                    remove_from_next_tokens -= len(self.tokens[last_removed_index].text)
+                    last_removed_index += 1
+                self.mark_tokens_changed(next_token_index, last_removed_index)
+                deleted_tokens.extend(self.tokens[next_token_index:last_removed_index])
+                self.matcher.vocabulary.remove_tokens(self.tokens[next_token_index:last_removed_index])
+                del self.tokens[next_token_index:last_removed_index]
+
+                if next_token_index < len(self.tokens) and remove_from_next_tokens > 0:
+                    # Mark a partially deleted start token
+                    deleted_tokens.append(VirtualBufferToken(
+                        self.tokens[token_index].text[:remove_from_next_tokens],
+                        self.tokens[token_index].phrase,
+                        self.tokens[token_index].format,
+                        self.tokens[token_index].line_index,
+                        self.tokens[token_index].index_from_line_end
+                    ))
+
+                    next_text = self.tokens[next_token_index].text[remove_from_next_tokens:]
+                    self.set_token_text(self.tokens[next_token_index], next_text)
+
+                    remove_from_next_tokens = 0
+                    self.reformat_tokens(changed_token_index)
 
             # Detect if we should merge the tokens if the text combines
             if should_detect_merge and next_token_index - 1 >= 0:
@@ -619,10 +716,11 @@ class VirtualBuffer:
 
                     if should_detect_merge and (text == "\n" or not re.sub(r"[^\w\s]", ' ', text).replace("\n", " ").startswith(" ") ) and not re.sub(r"[^\w\s]", ' ', previous_text).replace("\n", " ").endswith(" "):
                         text = previous_text + text
-                        self.tokens[token_index].text = text
-                        self.tokens[token_index].phrase = text_to_phrase(text)
+                        self.mark_tokens_changed(token_index, next_token_index)
+                        self.set_token_text(self.tokens[token_index], text)
+                        self.matcher.vocabulary.remove_tokens([self.tokens[next_token_index]])
                         del self.tokens[next_token_index]
-                        self.reformat_tokens()            
+                        self.reformat_tokens(changed_token_index)
 
             self.input_history.add_event(InputEventType.REMOVE, [])
             self.input_history.append_target_to_last_event(deleted_tokens)
@@ -639,6 +737,7 @@ class VirtualBuffer:
         line_index, character_index = self.caret_tracker.get_caret_index()
         if line_index > -1 and character_index > -1:
             token_index, token_character_index = self.determine_token_index()
+            self.mark_tokens_changed(token_index - 1, None if token_index < 0 else token_index + 2)
             remove_from_previous_tokens = abs(min(0, token_character_index - backspace_count ))
             remove_from_token = backspace_count - remove_from_previous_tokens
             text = self.tokens[token_index].text
@@ -648,6 +747,7 @@ class VirtualBuffer:
             should_detect_merge = token_character_index - backspace_count <= 0 or token_character_index >= len(text.replace("\n", ""))            
             if text == "" and token_index < len(self.tokens) - 1:
                 deleted_tokens.insert(0, self.tokens[token_index])
+                self.matcher.vocabulary.remove_tokens([self.tokens[token_index]])
                 del self.tokens[token_index]
             else:
                 # Mark a partially deleted start token
@@ -659,34 +759,37 @@ class VirtualBuffer:
                   self.tokens[token_index].index_from_line_end
                 ))
 
-                self.tokens[token_index].text = text
-                self.tokens[token_index].phrase = text_to_phrase(text)
+                self.set_token_text(self.tokens[token_index], text)
             
             previous_token_index = token_index - 1
             if remove_from_previous_tokens > 0:
-                while previous_token_index >= 0 and remove_from_previous_tokens > 0:
-                    if len(self.tokens[previous_token_index].text) <= remove_from_previous_tokens:
-                        remove_from_previous_tokens -= len(self.tokens[previous_token_index].text)
-                        deleted_tokens.insert(0, self.tokens[previous_token_index])
-                        del self.tokens[previous_token_index]
-                        previous_token_index -= 1
-                    else:
-                        # Mark a partially deleted start token from the end
-                        deleted_tokens.insert(0, VirtualBufferToken(
-                            self.tokens[token_index].text[:-remove_from_previous_tokens],
-                            self.tokens[token_index].phrase,
-                            self.tokens[token_index].format,
-                            self.tokens[token_index].line_index,
-                            self.tokens[token_index].index_from_line_end
-                        ))
-
-                        previous_text = self.tokens[previous_token_index].text
-                        previous_text = previous_text[:len(previous_text) - remove_from_previous_tokens]
-                        self.tokens[previous_token_index].text = previous_text
-                        self.tokens[previous_token_index].phrase = text_to_phrase(previous_text)
-
-                        remove_from_previous_tokens = 0
-                        self.reformat_tokens()
+                # Remove all the fully removed tokens before the caret at once
+                first_removed_index = previous_token_index + 1
+                while first_removed_index > 0 and remove_from_previous_tokens > 0 and \
+                    len(self.tokens[first_removed_index - 1].text) <= remove_from_previous_tokens:
+                    first_removed_index -= 1
+                    remove_from_previous_tokens -= len(self.tokens[first_removed_index].text)
+                deleted_tokens[0:0] = self.tokens[first_removed_index:previous_token_index + 1]
+                self.matcher.vocabulary.remove_tokens(self.tokens[first_removed_index:previous_token_index + 1])
+                del self.tokens[first_removed_index:previous_token_index + 1]
+                previous_token_index = first_removed_index - 1
+
+                if previous_token_index >= 0 and remove_from_previous_tokens > 0:
+                    # Mark a partially deleted start token from the end
+                    deleted_tokens.insert(0, VirtualBufferToken(
+                        self.tokens[token_index].text[:-remove_from_previous_tokens],
+                        self.tokens[token_index].phrase,
+                        self.tokens[token_index].format,
+                        self.tokens[token_index].line_index,
+                        self.tokens[token_index].index_from_line_end
+                    ))
+
+                    previous_text = self.tokens[previous_token_index].text
+                    previous_text = previous_text[:len(previous_text) - remove_from_previous_tokens]
+                    self.set_token_text(self.tokens[previous_token_index], previous_text)
+
+                    remove_from_previous_tokens = 0
+                    self.reformat_tokens(previous_token_index)
 
             # Detect if we should merge the tokens if the text combines
             if should_detect_merge:
@@ -700,20 +803,46 @@ class VirtualBuffer:
 
                     if should_detect_merge and (text == "\n" or not re.sub(r"[^\w\s]", ' ', text).replace("\n", " ").startswith(" ") ) and not re.sub(r"[^\w\s]", ' ', previous_text).replace("\n", " ").endswith(" "):
                         text = previous_text + text
-                        self.tokens[previous_token_index].text = text
-                        self.tokens[previous_token_index].phrase = text_to_phrase(text)
+                        self.mark_tokens_changed(previous_token_index, previous_token_index + 1)
+                        self.set_token_text(self.tokens[previous_token_index], text)
+                        self.matcher.vocabulary.remove_tokens([self.tokens[previous_token_index + 1]])
                         del self.tokens[previous_token_index + 1]
 
 
             # Always reformat the tokens as the indices from the line end are always changed
-            self.reformat_tokens()
+            self.reformat_tokens(previous_token_index)
 
             self.input_history.add_event(InputEventType.REMOVE, [])
             self.input_history.append_target_to_last_event(deleted_tokens, before=True)
             self.caret_tracker.remove_before_caret(backspace_count)
 
-    def reformat_tokens(self):
-        self.tokens = reindex_tokens(self.tokens)
+    # Let the indexes over the tokens know that they need to be synced again before they are used
+    # The lowest changed token index is kept so the next reformat only has to reindex from that line onward
+    # Along with the amount of tokens at the end that are left untouched, up to the last token index that can change
+    # Without a last token index, for instance when the caret could not be found in the tokens, all tokens after the first can change
+    # The version is raised on every change, so state kept on the buffer can cheaply check whether the tokens are still the same
+    def mark_tokens_changed(self, token_index: int = 0, last_token_index: int = None):
+        self.version += 1
+        self.token_positions.mark_outdated()
+        self.reindex_from_index = min(self.reindex_from_index, max(0, token_index))
+        tail_length = 0 if last_token_index is None else len(self.tokens) - 1 - max(token_index, last_token_index)
+        self.reindex_tail_length = max(0, min(self.reindex_tail_length, tail_length))
+
+    # Change the text of a token inside of the buffer, and keep the vocabulary in sync with its new phrase
+    def set_token_text(self, token: VirtualBufferToken, text: str):
+        self.matcher.vocabulary.remove_tokens([token])
+        token.text = text
+        token.phrase = text_to_phrase(text)
+        self.matcher.vocabulary.add_tokens([token])
+
+    # Reindex the changed lines from the first changed token onward, the untouched lines after them only have their line index shifted
+    def reformat_tokens(self, token_index: int = 0):
+        self.reindex_from_index = min(self.reindex_from_index, max(0, token_index))
+        unchanged_index = len(self.tokens) - self.reindex_tail_length
+        self.tokens = reindex_tokens_from(self.tokens, self.reindex_from_index, unchanged_index)
+        self.token_positions.update(self.tokens, self.reindex_from_index)
+        self.reindex_from_index = len(self.tokens)
+        self.reindex_tail_length = len(self.tokens)
 
     def apply_key(self, keystring: str, remember_key_presses: bool = False):
         keys = keystring.lower().split(" ")
@@ -804,7 +933,11 @@ class VirtualBuffer:
         self.last_direction = self.last_direction \
             if should_go_to_next_occurrence and self.input_history.is_repetition() else 0
 
-        best_match_tokens, match = self.matcher.find_best_match_by_phrases(self, phrases, match_threshold, should_go_to_next_occurrence, selecting=True, for_correction=for_correction, verbose=verbose, direction=self.last_direction)
+        # Repeated selections step through all the matches in the buffer in the same direction
+        if self.last_direction != 0:
+            best_match_tokens, match = self.matcher.find_next_occurrence_by_phrases(self, phrases, match_threshold, for_correction=for_correction, verbose=verbose, direction=self.last_direction)
+        else:
+            best_match_tokens, match = self.matcher.find_best_match_by_phrases(self, phrases, match_threshold, should_go_to_next_occurrence, selecting=True, for_correction=for_correction, verbose=verbose, direction=self.last_direction)
         if best_match_tokens is not None and len(best_match_tokens) > 0:            
             # Determine the last used direction
             # Give a direction if we are repeating a search so we can repeat a loop                
@@ -945,6 +1078,10 @@ class VirtualBuffer:
                 formatters = token.format.split("|")
         return formatters
     
+    # Get the bounded text around the caret, or a possible selection, to format an insert with
+    def get_formatter_context(self) -> VirtualBufferFormatterContext:
+        return VirtualBufferFormatterContext(self.tokens, self.determine_leftmost_token_index(), self.determine_rightmost_token_index())
+
     # Get the text before the caret, or a possible selection
     def get_previous_text(self):
         token_index = self.determine_leftmost_token_index()
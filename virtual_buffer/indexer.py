@@ -4,6 +4,8 @@ import re
 from typing import List, Tuple
 from ..formatters.formatters import DICTATION_FORMATTERS
 from .caret_tracker import _CARET_MARKER, _COARSE_MARKER
+from ..phonetics.phonetics import PhoneticSearch
+from ..phonetics.actions import phonetic_search
 
 def text_to_phrase(text: str) -> str:
     return " ".join(re.sub(r"[^\w\s]", ' ', text.replace("'", "").replace("’", "")).lower().split()).strip()
@@ -11,6 +13,17 @@ def text_to_phrase(text: str) -> str:
 def normalize_text(text: str) -> str:
     return re.sub(r"[^\w\s]", ' ', text).replace("\n", " ")
 
+# Attach the phonetic keys and syllable count of the phrase to the token
+# They are only recalculated when the phrase of the token has changed
+def update_token_phonetics(token: VirtualBufferToken, search: PhoneticSearch = None) -> VirtualBufferToken:
+    search = search if search is not None else phonetic_search
+    if not token.has_phonetics(search.language):
+        token.strict_phonetics, token.loose_phonetics, _ = search.get_phonetic_keys(token.phrase.replace(" ", ""))
+        token.syllables = search.syllable_count(token.phrase)
+        token.phonetic_phrase = token.phrase
+        token.phonetic_language = search.language
+    return token
+
 # Transform raw text to virtual buffer tokens
 def text_to_virtual_buffer_tokens(text: str, phrase: str = None, format: str = None) -> List[VirtualBufferToken]:
     lines = text.splitlines()
@@ -23,13 +36,13 @@ def text_to_virtual_buffer_tokens(text: str, phrase: str = None, format: str = N
             token.phrase = phrase
         else:
             token.phrase = text_to_phrase(text)
-        return [token]
+        return [update_token_phonetics(token)]
         # If there are line endings, split them up properly
     else:
         for line_index, line in enumerate(lines):
             token = VirtualBufferToken(line + "\n" if line_index < len(lines) - 1 else line, "", "" if format is None else format)
             token.phrase = text_to_phrase(line)
-            tokens.append(token)
+            tokens.append(update_token_phonetics(token))
         return tokens
 
 # Make sure the line numbers and character counts from the end of the line are properly kept
@@ -43,7 +56,8 @@ def reindex_tokens(tokens: List[VirtualBufferToken]) -> List[VirtualBufferToken]
     previous_line_index = tokens[0].line_index
     new_tokens = []
     for index, token in enumerate(tokens):
-        new_tokens.append(VirtualBufferToken(token.text, token.phrase, token.format, line_index, token.index_from_line_end))
+        new_tokens.append(VirtualBufferToken(token.text, token.phrase, token.format, line_index, token.index_from_line_end,
+            token.phonetic_phrase, token.phonetic_language, token.strict_phonetics, token.loose_phonetics, token.syllables))
 
         if token.text.endswith("\n"):
             line_index += 1
@@ -63,6 +77,46 @@ def reindex_tokens(tokens: List[VirtualBufferToken]) -> List[VirtualBufferToken]
 
     return new_tokens
 
+# Reindex the tokens in place, starting from the line of the first token that has changed
+# The lines before it keep their tokens as is, and the tokens on the changed lines are replaced with reindexed copies
+# Lines starting at the unchanged index have not been touched, so only their line index is shifted in place
+def reindex_tokens_from(tokens: List[VirtualBufferToken], token_index: int = 0, unchanged_index: int = None) -> List[VirtualBufferToken]:
+    length = len(tokens)
+    if token_index >= length:
+        return tokens
+    unchanged_index = length if unchanged_index is None else max(unchanged_index, token_index + 1)
+
+    # Start at the first token of the line
+    starting_index = max(0, token_index)
+    while starting_index > 0 and not tokens[starting_index - 1].text.endswith("\n"):
+        starting_index -= 1
+    line_index = 0 if starting_index == 0 else tokens[starting_index - 1].line_index + 1
+
+    line_starting_index = starting_index
+    for index in range(starting_index, length):
+        if index == line_starting_index and index >= unchanged_index:
+            line_shift = line_index - tokens[index].line_index
+            if line_shift != 0:
+                for token in tokens[index:]:
+                    token.line_index += line_shift
+            break
+
+        if not tokens[index].text.endswith("\n") and index < length - 1:
+            continue
+
+        # Sync the character count from the end of the line
+        index_from_line_end = 0
+        for line_token_index in range(index, line_starting_index - 1, -1):
+            token = tokens[line_token_index]
+            tokens[line_token_index] = VirtualBufferToken(token.text, token.phrase, token.format, line_index, index_from_line_end,
+                token.phonetic_phrase, token.phonetic_language, token.strict_phonetics, token.loose_phonetics, token.syllables)
+            index_from_line_end += len(token.text.replace("\n", ""))
+
+        line_index += 1
+        line_starting_index = index + 1
+
+    return tokens
+
 # Class used to split off text into properly matched virtual buffer tokens
 class VirtualBufferIndexer:
 
@@ -105,6 +159,7 @@ class VirtualBufferIndexer:
                     if (is_only_line_ending and not is_line_ending_word) or is_punctuation_only or can_merge_letters:
                         tokens[-1].text += token.text
                         tokens[-1].phrase = text_to_phrase(tokens[-1].text)
+                        update_token_phonetics(tokens[-1])
                     else:
                         tokens.append(token)
                 
@@ -560,7 +560,7 @@ class InputFixer:
                     if biggest_score < EXACT_MATCH and biggest_score >= CORRECTION_THRESHOLD:
 
                         # Automatically find and persist homophones as similarties
-                        if (one_to_one_similarity_score >= 1 and one_to_one_similarity_score <= 2) and to_word.lower() not in self.phonetic_search.find_homophones(from_word):
+                        if (one_to_one_similarity_score >= 1 and one_to_one_similarity_score <= 2) and not self.phonetic_search.is_homophone(from_word, to_word):
                             self.phonetic_search.add_phonetic_similarity(from_word.lower(), to_word.lower())
                         
                         # If one to one word replacement is more likely, add a fix for that
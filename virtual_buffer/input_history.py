@@ -1,6 +1,6 @@
 from enum import Enum
 from typing import List
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from .typing import VirtualBufferToken
 import time
 
@@ -219,8 +219,9 @@ class InputHistory:
         if len(self.history) > 0:
             self.history[-1].phrases = phrases
     
+    # The tokens are copied, as the buffer updates the positions of its tokens in place when lines before them change
     def append_target_to_last_event(self, target: List[VirtualBufferToken], before: bool = False):
-        target = [token for token in target if token.text != ""]
+        target = [replace(token) for token in target if token.text != ""]
         if len(self.history) > 0 and "".join([token.text for token in target]) != "":
 
             if self.history[-1].target is None:
@@ -266,7 +267,7 @@ class InputHistory:
     
     def append_insert_to_last_event(self, insert: List[VirtualBufferToken]):
         if len(self.history) > 0:
-            self.history[-1].insert = insert
+            self.history[-1].insert = [replace(token) for token in insert]
     
     # Check if this is an exact repetition of a previous event
     # To see if we need to 
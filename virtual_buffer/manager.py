@@ -273,13 +273,13 @@ class VirtualBufferManager:
             # For the first SKIP event, always search based on the previous uncombined insert
             # As the target and insert will be combined and put out later
             elif repetition_count == 0 and is_skip_event and previous_event is not None:
-                self_repair_match = vbm.find_self_repair([token.phrase for token in previous_event.insert])
+                self_repair_match = vbm.find_self_repair_by_tokens(previous_event.insert)
 
             # For repeated self repairs, use the previous (combined) insert for the match
             # Also for skip events
-            # TODO IMPROVE PERFORMANCE AS WE TECHNICALLY DO NOT NEED TO DO A SEARCH BUT JUST USE THE INSERTED TOKENS
+            # As we already know the inserted tokens, we do not need to search for them unless they have moved
             else:
-                self_repair_match = vbm.find_self_repair([token.phrase for token in input_history.get_last_insert()])
+                self_repair_match = vbm.find_self_repair_by_tokens(input_history.get_last_insert())
 
             if self_repair_match is not None:
                 # If we are dealing with a continuation, change the insert to remove the first few words
@@ -376,8 +376,10 @@ class VirtualBufferManager:
         next_text = ""
         token_index = vbm.determine_leftmost_token_index()
         if token_index[0] > -1:
-            previous_text = vbm.get_previous_text()
-            next_text = vbm.get_next_text()
+            # Only the words around the caret are used for formatting, so the rest of the document is left alone
+            formatter_context = vbm.get_formatter_context()
+            previous_text = formatter_context.get_previous_text()
+            next_text = formatter_context.get_next_text()
 
             context_formatters = vbm.get_current_formatters()
             context_formatter = context_formatters[0] if len(context_formatters) > 0 else None
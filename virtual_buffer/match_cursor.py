@@ -0,0 +1,44 @@
+from .typing import VirtualBufferMatch
+from typing import List, Tuple
+import bisect
+
+# Keeps all the matches of a query in the buffer, ordered by their position
+# So repeating a selection in a direction steps through the matches instead of searching the buffer again
+# The key contains the version of the buffer, which changes whenever its tokens change, so any change to the buffer content invalidates the cursor
+class VirtualBufferMatchCursor:
+    key: Tuple = None
+    matches: List[VirtualBufferMatch]
+    starting_indices: List[int]
+    ending_indices: List[int]
+    position: int = -1
+
+    def __init__(self, key: Tuple, matches: List[VirtualBufferMatch]):
+        self.key = key
+        self.matches = matches
+        self.starting_indices = [match.buffer_indices[0][0] for match in matches]
+        self.ending_indices = [match.buffer_indices[-1][-1] for match in matches]
+        self.position = -1
+
+    @staticmethod
+    def create_key(buffer_version: int, phrases: List[str], match_threshold: float, for_correction: bool, phonetic_version: int) -> Tuple:
+        return (buffer_version, tuple(phrases), match_threshold, for_correction, phonetic_version)
+
+    def is_valid(self, key: Tuple) -> bool:
+        return self.key == key
+
+    # Move to the next match after the selection, or the previous match before it
+    # If the current match is still selected we can step directly, otherwise we look up the closest match
+    def step(self, leftmost_token_index: int, rightmost_token_index: int, direction: int) -> VirtualBufferMatch:
+        if len(self.matches) == 0:
+            return None
+
+        if self.position != -1 and self.starting_indices[self.position] == leftmost_token_index and \
+            self.ending_indices[self.position] == rightmost_token_index:
+            position = self.position + (1 if direction >= 0 else -1)
+        elif direction >= 0:
+            position = bisect.bisect_right(self.starting_indices, rightmost_token_index)
+        else:
+            position = bisect.bisect_left(self.ending_indices, leftmost_token_index) - 1
+
+        self.position = position % len(self.matches)
+        return self.matches[self.position]
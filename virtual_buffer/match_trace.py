@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import List, Dict, Callable
+import time
+
+# A phase of a search, with the total time spent in it and the amount of items it resulted in
+# Phases can run multiple times in a single search, for example once for every windowed sublist
+@dataclass
+class VirtualBufferMatchTracePhase:
+    name: str
+    duration: float = 0.0
+    calls: int = 0
+    items: int = 0
+
+# Structured timings of the phases of a single search inside the virtual buffer
+# Only created when a sink is connected to the matcher, so searches without tracing do not pay for the timings
+class VirtualBufferMatchTrace:
+    search: str
+    phrases: List[str]
+    phases: Dict[str, VirtualBufferMatchTracePhase]
+    start_time: float = 0.0
+    duration: float = 0.0
+
+    def __init__(self, search: str, phrases: List[str]):
+        self.search = search
+        self.phrases = phrases
+        self.phases = {}
+        self.start_time = time.perf_counter()
+        self.duration = 0.0
+
+    # Add the time since the phase started, along with the amount of items it resulted in
+    def add_phase(self, name: str, start_time: float, items: int = 0):
+        if name not in self.phases:
+            self.phases[name] = VirtualBufferMatchTracePhase(name)
+        phase = self.phases[name]
+        phase.duration += time.perf_counter() - start_time
+        phase.calls += 1
+        phase.items += items
+
+    # Add items to a phase that were only known after the phase had ended, for example windows that were generated lazily
+    def add_items(self, name: str, items: int):
+        if name not in self.phases:
+            self.phases[name] = VirtualBufferMatchTracePhase(name)
+        self.phases[name].items += items
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start_time
+
+    def to_dict(self) -> Dict:
+        return {
+            "search": self.search,
+            "phrases": self.phrases,
+            "duration": self.duration,
+            "phases": {name: {"duration": phase.duration, "calls": phase.calls, "items": phase.items} for name, phase in self.phases.items()}
+        }
+
+    def __str__(self) -> str:
+        phases = ", ".join([phase.name + " " + str(round(phase.duration * 1000, 2)) + "ms (" + str(phase.calls) + "x, " + str(phase.items) + " items)" for phase in self.phases.values()])
+        return self.search + " '" + " ".join(self.phrases) + "' in " + str(round(self.duration * 1000, 2)) + "ms: " + phases
+
+# A sink receives every finished trace, for example print to send them to the log
+VirtualBufferMatchTraceSink = Callable[[VirtualBufferMatchTrace], None]
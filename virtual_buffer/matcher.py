@@ -1,15 +1,33 @@
 from ..phonetics.phonetics import PhoneticSearch
 from ..phonetics.detection import EXACT_MATCH, HOMOPHONE_MATCH, PHONETIC_MATCH
-from .typing import VirtualBufferToken, VirtualBufferTokenMatch, VirtualBufferMatchCalculation, VirtualBufferTokenList, VirtualBufferMatch, VirtualBufferTokenContext, VirtualBufferMatchVisitCache, SELECTION_THRESHOLD, CORRECTION_THRESHOLD
+from .indexer import update_token_phonetics
+from .vocabulary import VirtualBufferVocabulary
+from .similarity_memo import SimilarityMemo, DEFAULT_SIMILARITY_MEMO_SIZE
+from .similarity_matrix import VirtualBufferSimilarityMatrix, get_query_variants, MAX_COMBINED_QUERY_WORDS
+from .match_cursor import VirtualBufferMatchCursor
+from .alignment import VirtualBufferAlignmentEngine, ALIGNMENT_ENGINE
+from .settings import VirtualBufferSettings
+from .match_trace import VirtualBufferMatchTrace, VirtualBufferMatchTraceSink
+from .typing import VirtualBufferToken, VirtualBufferTokenMatch, VirtualBufferMatchCalculation, VirtualBufferTokenList, VirtualBufferMatch, VirtualBufferTokenContext, VirtualBufferMatchVisitCache, VirtualBufferExpansionCounters, VirtualBufferTokenView, get_token_view, SELECTION_THRESHOLD, CORRECTION_THRESHOLD
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable
 import math
+import time
+import heapq
 from functools import cmp_to_key
 
 # Number found through experimentation
 # A combined score needs to be at least this number better of a match to be considered a valid root
 combined_better_threshold = 0.075
 
+# The maximum amount of match trees kept while expanding a match root in a direction
+# The largest frontier found in the test cases is 22 match trees, so this only bounds pathological searches
+DEFAULT_BEAM_WIDTH = 32
+
+# Name of the window search setting that searches the windows with the highest upper bound first
+# The default window search goes from the nearest to the furthest window from the cursor
+BEST_FIRST_WINDOW_SEARCH = "best_first"
+
 def normalize_text(text: str) -> str:
     return re.sub(r"[^\w\s]", ' ', text).replace("\n", " ")
 
@@ -17,11 +35,26 @@ def normalize_text(text: str) -> str:
 class VirtualBufferMatcher:
 
     phonetic_search: PhoneticSearch = None
-    similarity_token_list: Dict[str, float] = None
-
-    def __init__(self, phonetic_search: PhoneticSearch):
+    similarity_memo: SimilarityMemo = None
+    similarity_upper_bounds: SimilarityMemo = None
+    vocabulary: VirtualBufferVocabulary = None
+    similarity_matrix: VirtualBufferSimilarityMatrix = None
+    alignment_engine: VirtualBufferAlignmentEngine = None
+    settings: VirtualBufferSettings = None
+    beam_width: int = DEFAULT_BEAM_WIDTH
+    expansion_counters: VirtualBufferExpansionCounters = None
+    trace_sink: VirtualBufferMatchTraceSink = None
+    trace: VirtualBufferMatchTrace = None
+
+    def __init__(self, phonetic_search: PhoneticSearch, similarity_memo_size: int = DEFAULT_SIMILARITY_MEMO_SIZE, settings: VirtualBufferSettings = None, beam_width: int = DEFAULT_BEAM_WIDTH):
         self.phonetic_search = phonetic_search
-        self.similarity_token_list = {}
+        self.beam_width = beam_width
+        self.expansion_counters = VirtualBufferExpansionCounters()
+        self.settings = settings if settings is not None else VirtualBufferSettings()
+        self.alignment_engine = VirtualBufferAlignmentEngine(self)
+        self.similarity_memo = SimilarityMemo(similarity_memo_size)
+        self.similarity_upper_bounds = SimilarityMemo(similarity_memo_size)
+        self.vocabulary = VirtualBufferVocabulary(phonetic_search)
 
     # Calculate the best matching score
     # Based on the similarity score times the amount of syllables
@@ -32,17 +65,13 @@ class VirtualBufferMatcher:
     def is_phrase_selected(self, virtual_buffer, phrase: str) -> bool:
         if virtual_buffer.is_selecting():
             selection = virtual_buffer.caret_tracker.get_selection_text()
-            return self.phonetic_search.phonetic_similarity_score(normalize_text(selection.lower()).replace(" ", ''), phrase) >= PHONETIC_MATCH
+            return self.phonetic_search.phonetic_similarity_score(normalize_text(selection.lower()).replace(" ", ''), phrase, min_score=PHONETIC_MATCH) >= PHONETIC_MATCH
         return False
 
+    # Check whether the phrase is in the buffer through the vocabulary, instead of scoring every token in the buffer
     def has_matching_phrase(self, virtual_buffer, phrase: str) -> bool:
-        score = 0
-        for token in virtual_buffer.tokens:
-            score = self.phonetic_search.phonetic_similarity_score(phrase, token.phrase)
-            if score >= SELECTION_THRESHOLD:
-                return True
-
-        return False
+        self.vocabulary.sync_changes(virtual_buffer.tokens)
+        return self.vocabulary.has_matching_word(phrase.replace(" ", ""), SELECTION_THRESHOLD)
     
     def get_threshold_for_selection(self, phrases: List[str], match_threshold: float = SELECTION_THRESHOLD) -> float:
         # Taper the threshold according to the amount of queried words
@@ -51,97 +80,103 @@ class VirtualBufferMatcher:
         match_threshold += 0.1 * max(0, (3 - len(phrases)))
         return min(0.83, match_threshold)
 
+    # Words that score below this threshold everywhere in a window can be skipped in later windows
+    def get_non_match_threshold(self, match_calculation: VirtualBufferMatchCalculation) -> float:
+        return 0.1 if match_calculation.purpose == "correction" else 0.29
+
     def find_top_three_matches_in_token_list(self, virtual_buffer, phrases: List[str], match_threshold: float = SELECTION_THRESHOLD, selecting: bool = False, for_correction: bool = False, verbose: bool = False, direction: int = 0, overwrite_token_index: int = -1):
         # Don't change the match threshold for corrections
         if not for_correction:
             match_threshold = self.get_threshold_for_selection(phrases, match_threshold)
 
-        # Make sure to split at the right left token index for the leftmost character
-        # To only exclude tokens that should be filtered out
-        leftmost_token_index, leftmost_character_index = virtual_buffer.determine_leftmost_token_index()
-        if leftmost_token_index != -1 and len(virtual_buffer.tokens[leftmost_token_index].text) == leftmost_character_index:
-            leftmost_token_index += 1
+        leftmost_token_index, rightmost_token_index = self.get_caret_token_indices(virtual_buffer)
         leftmost_token_index = leftmost_token_index if overwrite_token_index == -1 else overwrite_token_index
-
-        # Make sure to split at the right token index for the rightmost character
-        # To only exclude tokens that should be filtered out
-        rightmost_token_index, rightmost_character_index = virtual_buffer.determine_rightmost_token_index()
-        if rightmost_token_index != -1 and rightmost_character_index == 0:
-            rightmost_token_index -= 1
         rightmost_token_index = rightmost_token_index if overwrite_token_index == -1 else overwrite_token_index
         
         starting_index = 0
         ending_index = len(virtual_buffer.tokens)
-        token_list = VirtualBufferTokenList(starting_index, virtual_buffer.tokens[starting_index:ending_index])
-        match_calculation = self.generate_match_calculation(phrases, match_threshold, purpose=("correction" if for_correction else "selection"))
-        match_calculation.cache.index_token_list(token_list)
+        token_list = VirtualBufferTokenList(starting_index, VirtualBufferTokenView(virtual_buffer.tokens, starting_index, ending_index))
+        is_tracing = self.start_trace("correction" if for_correction else "selection", phrases)
+        try:
+            self.validate_similarity_memos()
+            self.expansion_counters.reset()
+            self.vocabulary.sync_changes(virtual_buffer.tokens)
+            match_calculation = self.generate_match_calculation(phrases, match_threshold, purpose=("correction" if for_correction else "selection"))
+            self.update_similarity_matrix(match_calculation)
+            match_calculation.cache.index_token_list(token_list)
     
-        windowed_sublists = token_list.get_windowed_sublists(leftmost_token_index, match_calculation)
+            phase_start = time.perf_counter() if self.trace is not None else 0
+            windowed_sublists = token_list.get_windowed_sublists(leftmost_token_index, match_calculation)
 
-        # If we have reached the end after a loop - Make sure to not find any tokens in the current selection
-        if overwrite_token_index == -1:
-            if direction == -1 and leftmost_token_index <= 0:
-                windowed_sublists = []
-            elif direction == 1 and rightmost_token_index >= len(virtual_buffer.tokens) - 1:
-                windowed_sublists = []
+            # If we have reached the end after a loop - Make sure to not find any tokens in the current selection
+            if overwrite_token_index == -1:
+                if direction == -1 and leftmost_token_index <= 0:
+                    windowed_sublists = []
+                elif direction == 1 and rightmost_token_index >= len(virtual_buffer.tokens) - 1:
+                    windowed_sublists = []
 
-        # Filter out all the sublists before or after the current selection if we are using a specific direction
-        if verbose:
-            if direction != -1:
-                print(" - Repeating in direction: " + ("right" if direction == 1 else "left" ))
-        if direction == 1:
-            windowed_sublists = list(map(lambda sublist: sublist.filter_after_index(rightmost_token_index), windowed_sublists))
-        elif direction == -1:
-            windowed_sublists = list(map(lambda sublist: sublist.filter_before_index(leftmost_token_index), windowed_sublists))
-        windowed_sublists = list(filter(lambda mapped: mapped.length > 0, windowed_sublists))
+            # Filter out all the sublists before or after the current selection if we are using a specific direction
+            if verbose:
+                if direction != -1:
+                    print(" - Repeating in direction: " + ("right" if direction == 1 else "left" ))
+            if direction == 1:
+                windowed_sublists = map(lambda sublist: sublist.filter_after_index(rightmost_token_index), windowed_sublists)
+            elif direction == -1:
+                windowed_sublists = map(lambda sublist: sublist.filter_before_index(leftmost_token_index), windowed_sublists)
+            windowed_sublists = filter(lambda mapped: mapped.length > 0, windowed_sublists)
+            if self.trace is not None:
+                self.trace.add_phase("windowing", phase_start)
 
-        if verbose:
-            print( "- Using match threshold: " + str(match_calculation.match_threshold))
-            print( "- Splitting into " + str(len(windowed_sublists)) + " windowed sublists for rapid searching")
-            print( windowed_sublists )
+            if verbose:
+                windowed_sublists = list(windowed_sublists)
+                print( "- Using match threshold: " + str(match_calculation.match_threshold))
+                print( "- Splitting into " + str(len(windowed_sublists)) + " windowed sublists for rapid searching")
+                print( windowed_sublists )
+
+            if self.settings.get_matcher_window_search() == BEST_FIRST_WINDOW_SEARCH:
+                matches, match_calculation = self.find_best_first_matches_in_windows(match_calculation, token_list, windowed_sublists, leftmost_token_index, rightmost_token_index, selecting, for_correction, direction, verbose)
+            else:
+                matches, match_calculation = self.find_nearest_matches_in_windows(match_calculation, token_list, windowed_sublists, leftmost_token_index, rightmost_token_index, selecting, for_correction, direction, verbose)
+            if self.trace is not None:
+                self.trace.add_items("windowing", self.expansion_counters.windows_expanded + self.expansion_counters.windows_skipped)
 
+            if verbose:
+                print( "- Visit cache statistics", match_calculation.cache.get_statistics())
+                print( "- Expansion statistics", self.get_expansion_statistics())
+
+            # If we are doing repeats and looping
+            # We want to loop back around to the start of the field once we hit the end
+            # So retry finding matches from either the end or the start, but only one time
+            if len(matches) == 0 and direction != 0 and overwrite_token_index == -1:
+                max_window_size = max(25, len(match_calculation.words) * 5)
+                retry_index = -1
+                if direction == 1 and rightmost_token_index > ( ending_index - 1 - max_window_size):
+                    retry_index = 0
+                elif direction == -1 and leftmost_token_index < max_window_size:
+                    retry_index = ending_index
+            
+                if retry_index != -1:
+                    if verbose:
+                        print("LOOPING AROUND!")
+                    matches = self.find_top_three_matches_in_token_list(virtual_buffer, phrases, match_threshold, selecting, for_correction, verbose, direction, retry_index)
+
+            return matches
+        finally:
+            if is_tracing:
+                self.finish_trace()
+
+    # Search the windows from the nearest to the furthest away from the cursor
+    # Only the matches of the last searched window are kept, as later windows need to score higher than the earlier ones to be searched at all
+    def find_nearest_matches_in_windows(self, match_calculation: VirtualBufferMatchCalculation, token_list: VirtualBufferTokenList, windowed_sublists: Iterable[VirtualBufferTokenList], \
+        leftmost_token_index: int, rightmost_token_index: int, selecting: bool = False, for_correction: bool = False, direction: int = 0, verbose: bool = False) -> Tuple[List[VirtualBufferMatch], VirtualBufferMatchCalculation]:
+        match_threshold = match_calculation.match_threshold
         matches = []
         highest_score_achieved = False
         for windowed_sublist in windowed_sublists:
-            sublists, match_calculation = self.find_potential_sublists(match_calculation, windowed_sublist, verbose=verbose)
-            split_sublists = self.split_sublists_by_cursor_position(sublists, leftmost_token_index, rightmost_token_index, direction)
-            matches = []
-
-            highest_found_match = match_threshold
-            for index, token_list_group in enumerate(split_sublists):
-                match_calculation.match_threshold = match_threshold
-                token_list_group_matches = []
-                highest_match = 0
-                for sublist in token_list_group:
-                    sublist_matches, match_calculation = self.find_matches_in_token_list(match_calculation, sublist, highest_match, verbose=verbose)
-                    if len(sublist_matches) > 0:
-                        highest_match = max(highest_match, sublist_matches[0].score_potential)
-                        #if verbose:
-                        #    print( "- Updating threshold to: " + str(highest_match))
-                        token_list_group_matches.extend(sublist_matches)
-                        if not for_correction:
-                            highest_score_achieved = highest_match == match_calculation.max_score
-
-                    # Do not seek any further if we have reached the highest possible score
-                    # Since no improvement is possible
-                    # Also do not seek further for correction cases as we never look beyond matches closest to the cursor anyway
-                    if highest_score_achieved or (for_correction and len(sublist_matches) > 0):
-                        break
-                
-                if verbose:
-                    print( "- Found matches for split " + str(index), token_list_group_matches )
-
-                # Calculate the distance from the cursor
-                for token_list_group_match in token_list_group_matches:
-                    token_list_group_match.calculate_distance(leftmost_token_index, rightmost_token_index)
-
-                if len(token_list_group_matches) > 0:
-                    if selecting:
-                        token_list_group_matches.sort(key = cmp_to_key(self.compare_match_trees_for_selection), reverse=True)
-                    if for_correction:
-                        token_list_group_matches.sort(key = cmp_to_key(self.compare_match_trees_for_correction), reverse=True)
-                    matches.append(token_list_group_matches[0])
-                    highest_found_match = max(highest_found_match, highest_match)
+            self.expansion_counters.windows_expanded += 1
+            window_matches, highest_found_match, highest_score_achieved, match_calculation = self.find_matches_in_window(match_calculation, windowed_sublist, match_threshold, \
+                leftmost_token_index, rightmost_token_index, selecting, for_correction, direction, highest_score_achieved, verbose)
+            matches = [match for match in window_matches if match is not None]
 
             if highest_score_achieved:
                 break
@@ -155,37 +190,280 @@ class VirtualBufferMatcher:
                 match_calculation.cache.skip_word_sequence(match.buffer)
             
             # Add indices to skip because they do not match anything in the total token_list
-            if verbose and windowed_sublist.index == 0:
-                print( "BUFFER INDEX SCORES", match_calculation.cache.buffer_index_scores)
-            non_match_threshold = 0.1 if match_calculation.purpose == "correction" else 0.29
-            for windowed_index in range(windowed_sublist.index, windowed_sublist.end_index):
-                if not match_calculation.cache.should_skip_index(windowed_index):
-                    score_for_index = match_calculation.cache.get_highest_score_for_buffer_index(windowed_index)
-                    if score_for_index >= 0 and score_for_index < non_match_threshold:
-                        if verbose:
-                            print("SKIP SPECIFIC WORD!", score_for_index, windowed_index, token_list.tokens[windowed_index - token_list.index].phrase)
-                        match_calculation.cache.skip_word_sequence([token_list.tokens[windowed_index - token_list.index].phrase])
-                    elif verbose:
-                        print("DO NOT SKIP WORD", score_for_index, non_match_threshold, windowed_index)
-                elif verbose:
-                    print("SKIP INDEX", windowed_index)
-
-        # If we are doing repeats and looping
-        # We want to loop back around to the start of the field once we hit the end
-        # So retry finding matches from either the end or the start, but only one time
-        if len(matches) == 0 and direction != 0 and overwrite_token_index == -1:
-            max_window_size = max(25, len(match_calculation.words) * 5)
-            retry_index = -1
-            if direction == 1 and rightmost_token_index > ( ending_index - 1 - max_window_size):
-                retry_index = 0
-            elif direction == -1 and leftmost_token_index < max_window_size:
-                retry_index = ending_index
-            
-            if retry_index != -1:
+            self.skip_non_matching_indices(match_calculation, token_list, windowed_sublist, verbose)
+
+        return matches, match_calculation
+
+    # Search the windows with the highest upper bound first, and keep the best match for every position around the cursor
+    # Windows whose upper bound cannot beat the best matches found so far are never searched
+    # No words are skipped in later windows, as those windows can be closer to the cursor, and the bounds already leave out windows without matching words
+    def find_best_first_matches_in_windows(self, match_calculation: VirtualBufferMatchCalculation, token_list: VirtualBufferTokenList, windowed_sublists: Iterable[VirtualBufferTokenList], \
+        leftmost_token_index: int, rightmost_token_index: int, selecting: bool = False, for_correction: bool = False, direction: int = 0, verbose: bool = False) -> Tuple[List[VirtualBufferMatch], VirtualBufferMatchCalculation]:
+        # Every window needs to be bounded before the first one can be searched
+        windowed_sublists = list(windowed_sublists)
+        match_threshold = match_calculation.match_threshold
+        word_scores = {}
+        window_queue = []
+        first_index = min([windowed_sublist.index for windowed_sublist in windowed_sublists], default=0)
+        last_end_index = max([windowed_sublist.end_index for windowed_sublist in windowed_sublists], default=0)
+        for window_index, windowed_sublist in enumerate(windowed_sublists):
+            # Matches cut off at a window edge are complete in the overlapping window next to it
+            # But matches cut off at the start or end of the document or at the cursor are not, so those windows cannot be bounded
+            if windowed_sublist.index in (first_index, rightmost_token_index + 1) or windowed_sublist.end_index in (last_end_index, leftmost_token_index - 1):
+                upper_bound = match_calculation.max_score
+            else:
+                upper_bound = self.get_window_upper_bound(match_calculation, windowed_sublist, word_scores)
+            if upper_bound >= match_threshold:
+                # Windows with the same bound are searched from the nearest to the furthest away from the cursor
+                heapq.heappush(window_queue, (-upper_bound, window_index))
+            else:
+                self.expansion_counters.windows_skipped += 1
+
+        best_matches = {}
+        while len(window_queue) > 0:
+            negative_upper_bound, window_index = heapq.heappop(window_queue)
+            windowed_sublist = windowed_sublists[window_index]
+            window_distance = self.get_window_distance(windowed_sublist, leftmost_token_index, rightmost_token_index)
+            split_indices = self.get_window_split_indices(windowed_sublist, leftmost_token_index, rightmost_token_index, direction)
+            if all([split_index in best_matches and not self.can_window_beat_match(-negative_upper_bound, window_distance, best_matches[split_index], for_correction) \
+                for split_index in split_indices]):
                 if verbose:
-                    print("LOOPING AROUND!")
-                matches = self.find_top_three_matches_in_token_list(virtual_buffer, phrases, match_threshold, selecting, for_correction, verbose, direction, retry_index)
-        return matches
+                    print("- Skipping window " + str(windowed_sublist.index) + " with upper bound " + str(-negative_upper_bound))
+                self.expansion_counters.windows_skipped += 1
+                continue
+
+            self.expansion_counters.windows_expanded += 1
+            match_calculation.match_threshold = match_threshold
+            window_matches, _, _, match_calculation = self.find_matches_in_window(match_calculation, windowed_sublist, match_threshold, \
+                leftmost_token_index, rightmost_token_index, selecting, for_correction, direction, False, verbose)
+            for split_index, window_match in enumerate(window_matches):
+                if window_match is not None and (split_index not in best_matches or \
+                    self.compare_match_trees_for_search(window_match, best_matches[split_index], selecting, for_correction) > 0):
+                    best_matches[split_index] = window_match
+        match_calculation.match_threshold = match_threshold
+
+        matches = [best_matches[split_index] for split_index in sorted(best_matches.keys())]
+        return matches, match_calculation
+
+    # Find the best match for every position around the cursor inside of a single window
+    def find_matches_in_window(self, match_calculation: VirtualBufferMatchCalculation, windowed_sublist: VirtualBufferTokenList, match_threshold: float, \
+        leftmost_token_index: int, rightmost_token_index: int, selecting: bool, for_correction: bool, direction: int, highest_score_achieved: bool, verbose: bool = False):
+        sublists, match_calculation = self.find_potential_sublists(match_calculation, windowed_sublist, verbose=verbose)
+        split_sublists = self.split_sublists_by_cursor_position(sublists, leftmost_token_index, rightmost_token_index, direction)
+        matches = []
+
+        highest_found_match = match_threshold
+        for index, token_list_group in enumerate(split_sublists):
+            match_calculation.match_threshold = match_threshold
+            token_list_group_matches = []
+            highest_match = 0
+            for sublist in token_list_group:
+                phase_start = time.perf_counter() if self.trace is not None else 0
+                sublist_matches, match_calculation = self.find_matches_in_token_list(match_calculation, sublist, highest_match, verbose=verbose)
+                if self.trace is not None:
+                    self.trace.add_phase("find_matches_in_token_list", phase_start, len(sublist_matches))
+                if len(sublist_matches) > 0:
+                    highest_match = max(highest_match, sublist_matches[0].score_potential)
+                    #if verbose:
+                    #    print( "- Updating threshold to: " + str(highest_match))
+                    token_list_group_matches.extend(sublist_matches)
+                    if not for_correction:
+                        highest_score_achieved = highest_match == match_calculation.max_score
+
+                # Do not seek any further if we have reached the highest possible score
+                # Since no improvement is possible
+                # Also do not seek further for correction cases as we never look beyond matches closest to the cursor anyway
+                if highest_score_achieved or (for_correction and len(sublist_matches) > 0):
+                    break
+            
+            if verbose:
+                print( "- Found matches for split " + str(index), token_list_group_matches )
+
+            # Calculate the distance from the cursor
+            for token_list_group_match in token_list_group_matches:
+                token_list_group_match.calculate_distance(leftmost_token_index, rightmost_token_index)
+
+            if len(token_list_group_matches) > 0:
+                phase_start = time.perf_counter() if self.trace is not None else 0
+                if selecting:
+                    token_list_group_matches.sort(key = cmp_to_key(self.compare_match_trees_for_selection), reverse=True)
+                if for_correction:
+                    token_list_group_matches.sort(key = cmp_to_key(self.compare_match_trees_for_correction), reverse=True)
+                if self.trace is not None:
+                    self.trace.add_phase("sorting", phase_start, len(token_list_group_matches))
+                matches.append(token_list_group_matches[0])
+                highest_found_match = max(highest_found_match, highest_match)
+            else:
+                matches.append(None)
+
+        return matches, highest_found_match, highest_score_achieved, match_calculation
+
+    # The highest score a complete match inside of the window can reach, based on the best single word scores of every query word
+    # Query words combined on a buffer word give their score to every query word they contain
+    def get_window_upper_bound(self, match_calculation: VirtualBufferMatchCalculation, windowed_sublist: VirtualBufferTokenList, word_scores: Dict[str, List[float]]) -> float:
+        best_scores = [0.0 for _ in match_calculation.words]
+        for token in windowed_sublist.tokens:
+            word = token.phrase.replace(" ", "")
+            if word not in word_scores:
+                word_scores[word] = self.get_best_query_word_scores(match_calculation, word)
+            best_scores = [max(best_score, score) for best_score, score in zip(best_scores, word_scores[word])]
+
+        max_score = match_calculation.max_score
+        return max_score - sum([weight * (max_score - best_score) for weight, best_score in zip(match_calculation.weights, best_scores)])
+
+    # The best score of every query word against a single buffer word, alone or combined with its neighbouring query words
+    # Scores missing from the similarity matrix were below the non-match threshold, so their vocabulary upper bound is used instead
+    def get_best_query_word_scores(self, match_calculation: VirtualBufferMatchCalculation, word: str) -> List[float]:
+        best_scores = [0.0 for _ in match_calculation.words]
+        if word == "":
+            return best_scores
+
+        for length in range(1, MAX_COMBINED_QUERY_WORDS + 1):
+            for start_index in range(0, match_calculation.length - length + 1):
+                query = "".join(match_calculation.words[start_index:start_index + length])
+                score = self.similarity_matrix.get(query, word) if self.similarity_matrix is not None else None
+                if score is None:
+                    score = self.vocabulary.get_score_upper_bounds(query).get(word, EXACT_MATCH)
+                for query_index in range(start_index, start_index + length):
+                    best_scores[query_index] = max(best_scores[query_index], score)
+        return best_scores
+
+    # The smallest distance from the cursor a match inside of the window can have
+    def get_window_distance(self, windowed_sublist: VirtualBufferTokenList, leftmost_token_index: int, rightmost_token_index: int) -> int:
+        if windowed_sublist.end_index < leftmost_token_index:
+            return leftmost_token_index - windowed_sublist.end_index
+        elif windowed_sublist.index > rightmost_token_index:
+            return windowed_sublist.index - rightmost_token_index
+        return 0
+
+    # The positions around the cursor that the matches inside of the window can be split into
+    def get_window_split_indices(self, windowed_sublist: VirtualBufferTokenList, leftmost_token_index: int, rightmost_token_index: int, direction: int) -> List[int]:
+        if direction != 0:
+            return [0]
+        elif windowed_sublist.end_index < leftmost_token_index:
+            return [0]
+        elif windowed_sublist.index > rightmost_token_index:
+            return [2]
+        return [0, 1, 2]
+
+    # Whether a match with the upper bound score and window distance could be sorted above the best match
+    # Follows the comparisons of the match trees, where equal scores are sorted by skips and distance,
+    # And corrections prefer the closest match unless the scores differ significantly
+    def can_window_beat_match(self, upper_bound: float, window_distance: int, best_match: VirtualBufferMatch, for_correction: bool) -> bool:
+        if len(best_match.query_indices) != len(best_match.buffer_indices):
+            return True
+
+        # Allow for rounding differences between the bound and the score potential
+        rounding = 0.0001
+        if for_correction:
+            return upper_bound + rounding >= best_match.score_potential or \
+                (upper_bound + rounding >= best_match.score_potential - 0.1 and window_distance <= best_match.distance)
+
+        has_skips = len(best_match.scores) > len(best_match.query_indices)
+        return upper_bound - rounding > best_match.score_potential or \
+            (upper_bound + rounding >= best_match.score_potential and (has_skips or window_distance < best_match.distance))
+
+    def compare_match_trees_for_search(self, a: VirtualBufferMatch, b: VirtualBufferMatch, selecting: bool, for_correction: bool) -> int:
+        if for_correction:
+            return self.compare_match_trees_for_correction(a, b)
+        return self.compare_match_trees_for_selection(a, b)
+
+    # Determine the token indices at the left and the right of the caret or selection
+    # Tokens that are only touched by the caret at their edge are not counted as part of the selection
+    def get_caret_token_indices(self, virtual_buffer) -> Tuple[int, int]:
+        leftmost_token_index, leftmost_character_index = virtual_buffer.determine_leftmost_token_index()
+        if leftmost_token_index != -1 and len(virtual_buffer.tokens[leftmost_token_index].text) == leftmost_character_index:
+            leftmost_token_index += 1
+
+        rightmost_token_index, rightmost_character_index = virtual_buffer.determine_rightmost_token_index()
+        if rightmost_token_index != -1 and rightmost_character_index == 0:
+            rightmost_token_index -= 1
+        return leftmost_token_index, rightmost_token_index
+
+    # Skip the words in the window whose best score is too low to be part of any match
+    def skip_non_matching_indices(self, match_calculation: VirtualBufferMatchCalculation, token_list: VirtualBufferTokenList, windowed_sublist: VirtualBufferTokenList, verbose: bool = False):
+        if verbose and windowed_sublist.index == 0:
+            print( "BUFFER INDEX SCORES", match_calculation.cache.buffer_index_scores)
+        non_match_threshold = self.get_non_match_threshold(match_calculation)
+        for windowed_index in range(windowed_sublist.index, windowed_sublist.end_index):
+            if not match_calculation.cache.should_skip_index(windowed_index):
+                score_for_index = match_calculation.cache.get_highest_score_for_buffer_index(windowed_index)
+                if score_for_index >= 0 and score_for_index < non_match_threshold:
+                    if verbose:
+                        print("SKIP SPECIFIC WORD!", score_for_index, windowed_index, token_list.tokens[windowed_index - token_list.index].phrase)
+                    match_calculation.cache.skip_word_sequence([token_list.tokens[windowed_index - token_list.index].phrase])
+                elif verbose:
+                    print("DO NOT SKIP WORD", score_for_index, non_match_threshold, windowed_index)
+            elif verbose:
+                print("SKIP INDEX", windowed_index)
+
+    # Find every match of the phrases inside of the buffer, ordered by their position in the buffer
+    # Overlapping matches are reduced to the best scoring match among them
+    # Words are never skipped, as that would skip over other occurrences of the same match
+    def find_all_matches_in_token_list(self, virtual_buffer, phrases: List[str], match_threshold: float = SELECTION_THRESHOLD, for_correction: bool = False, verbose: bool = False) -> List[VirtualBufferMatch]:
+        if not for_correction:
+            match_threshold = self.get_threshold_for_selection(phrases, match_threshold)
+
+        token_list = VirtualBufferTokenList(0, VirtualBufferTokenView(virtual_buffer.tokens))
+        is_tracing = self.start_trace("all " + ("correction" if for_correction else "selection"), phrases)
+        try:
+            self.validate_similarity_memos()
+            self.expansion_counters.reset()
+            self.vocabulary.sync_changes(virtual_buffer.tokens)
+            match_calculation = self.generate_match_calculation(phrases, match_threshold, purpose=("correction" if for_correction else "selection"))
+            self.update_similarity_matrix(match_calculation)
+            match_calculation.cache.index_token_list(token_list)
+
+            # The roots are searched in the entire buffer at once, so no occurrences are missed between windows
+            matches = []
+            sublists, match_calculation = self.find_potential_sublists(match_calculation, token_list, verbose=verbose)
+            for sublist in sublists:
+                phase_start = time.perf_counter() if self.trace is not None else 0
+                sublist_matches, match_calculation = self.find_matches_in_token_list(match_calculation, sublist, verbose=verbose)
+                if self.trace is not None:
+                    self.trace.add_phase("find_matches_in_token_list", phase_start, len(sublist_matches))
+                matches.extend(sublist_matches)
+
+            phase_start = time.perf_counter() if self.trace is not None else 0
+            matches.sort(key = cmp_to_key(self.compare_match_trees_by_score), reverse=True)
+            used_indices = set()
+            ranked_matches = []
+            for match in matches:
+                match_indices = range(match.buffer_indices[0][0], match.buffer_indices[-1][-1] + 1)
+                if not any(index in used_indices for index in match_indices):
+                    used_indices.update(match_indices)
+                    ranked_matches.append(match)
+
+            ranked_matches.sort(key = lambda match: match.buffer_indices[0][0])
+            if self.trace is not None:
+                self.trace.add_phase("sorting", phase_start, len(matches))
+            if verbose:
+                print( "- Found all matches", ranked_matches )
+
+            return ranked_matches
+        finally:
+            if is_tracing:
+                self.finish_trace()
+
+    # Step to the next occurrence of the phrases in the given direction, looping around at the start and end of the buffer
+    # All the matches are calculated once and kept in a cursor on the buffer, which is reused until the buffer or the query changes
+    def find_next_occurrence_by_phrases(self, virtual_buffer, phrases: List[str], match_threshold: float = SELECTION_THRESHOLD, for_correction: bool = False, verbose: bool = False, direction: int = 1) -> (List[VirtualBufferToken], VirtualBufferMatch):
+        key = VirtualBufferMatchCursor.create_key(virtual_buffer.version, phrases, match_threshold, for_correction, self.phonetic_search.version)
+        if virtual_buffer.match_cursor is None or not virtual_buffer.match_cursor.is_valid(key):
+            virtual_buffer.match_cursor = VirtualBufferMatchCursor(key, self.find_all_matches_in_token_list(virtual_buffer, phrases, match_threshold, for_correction, verbose))
+        elif verbose:
+            print( "- Reusing the match cursor" )
+
+        leftmost_token_index, rightmost_token_index = self.get_caret_token_indices(virtual_buffer)
+        match = virtual_buffer.match_cursor.step(leftmost_token_index, rightmost_token_index, direction)
+        if match is None:
+            return (None, None)
+
+        best_match_tokens = []
+        for index_list in match.buffer_indices:
+            for subindex in index_list:
+                best_match_tokens.append(virtual_buffer.tokens[subindex])
+        return (best_match_tokens, match)
 
     # Generate a match calculation based on the words to search for weighted by syllable count
     def generate_match_calculation(self, query_words: List[str], threshold: float = SELECTION_THRESHOLD, max_score_per_word: float = EXACT_MATCH, purpose: str = "selection") -> VirtualBufferMatchCalculation:
@@ -213,15 +491,21 @@ class VirtualBufferMatcher:
         elif verbose:
             print( "    - CAN USE token_list BECAUSE THERE IS A BIG ENOUGH MAX SEQUENCE")
 
+        phase_start = time.perf_counter() if self.trace is not None else 0
         for word_index in word_indices:
             potential_sublists, match_calculation = self.find_potential_sublists_for_words(token_list, match_calculation, word_index, max_sublist_size, verbose=verbose)
             sub_token_lists.extend(potential_sublists)
+        if self.trace is not None:
+            self.trace.add_phase("find_potential_sublists", phase_start, len(sub_token_lists))
 
         if verbose:
             print( "    - FOUND ROOTS FOR THESE token_lists", len(sub_token_lists))
             print( match_calculation.starting_branches )
 
+        phase_start = time.perf_counter() if self.trace is not None else 0
         sub_token_lists = self.simplify_sublists(sub_token_lists)
+        if self.trace is not None:
+            self.trace.add_phase("simplify_sublists", phase_start, len(sub_token_lists))
         if verbose:
             print("    - Simplified to these token_lists", len(sub_token_lists))
 
@@ -299,20 +583,16 @@ class VirtualBufferMatcher:
         return filtered_searches, match_calculation
 
     def expand_match_tree(self, match_tree: VirtualBufferMatch, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, verbose: bool = False) -> Tuple[List[VirtualBufferTokenList], VirtualBufferMatchCalculation]:
+        if self.settings.get_matcher_engine() == ALIGNMENT_ENGINE:
+            match_trees = self.alignment_engine.align_match_tree(match_tree, match_calculation, sublist, verbose=verbose)
+            return self.filter_expanded_match_trees(match_trees, match_calculation, verbose=verbose), match_calculation
+
         match_trees = [match_tree]
         expanded_match_trees: List[VirtualBufferMatch] = []
 
         # First expand backwards if we haven't already walked that path
         if match_tree.can_expand_backward(sublist):
-            can_expand_backward_count = 1
-            while can_expand_backward_count != 0:
-                expanded_match_trees = []
-                for match_tree in match_trees:
-                    backward_expanded_match_tree, match_calculation = self.expand_match_tree_backward(match_tree, match_calculation, sublist, verbose=verbose)
-                    expanded_match_trees.extend(backward_expanded_match_tree)
-                can_expand_backward_count = sum([expanded_match_tree.can_expand_backward(sublist) for expanded_match_tree in expanded_match_trees])
-                match_trees = list(set(expanded_match_trees))
-            
+            match_trees, match_calculation = self.expand_match_trees_in_direction(match_trees, match_calculation, sublist, -1, verbose=verbose)
             if verbose:
                 print( "---- BACKWARD", match_trees )
         elif verbose:
@@ -320,15 +600,7 @@ class VirtualBufferMatcher:
 
         # Then expand forwards if possible
         if match_tree.can_expand_forward(match_calculation, sublist):
-            can_expand_forward_count = 1
-            while can_expand_forward_count != 0:
-                expanded_match_trees = []
-                for match_tree in match_trees:
-                    forward_expanded_match_tree, match_calculation = self.expand_match_tree_forward(match_tree, match_calculation, sublist, verbose=verbose)
-                    expanded_match_trees.extend(forward_expanded_match_tree)
-                can_expand_forward_count = sum([expanded_match_tree.can_expand_forward(match_calculation, sublist) for expanded_match_tree in expanded_match_trees])
-                match_trees = list(set(expanded_match_trees))
-            
+            match_trees, match_calculation = self.expand_match_trees_in_direction(match_trees, match_calculation, sublist, 1, verbose=verbose)
             if verbose:
                 print( "---- FORWARD", match_trees )
         elif verbose:
@@ -336,7 +608,40 @@ class VirtualBufferMatcher:
 
         return self.filter_expanded_match_trees(match_trees, match_calculation, verbose=verbose), match_calculation
     
+    # Keep expanding the match trees in a direction until none of them can be expanded any further
+    # When the frontier grows beyond the beam width, only the trees with the highest score potential are kept
+    # Ties are broken by the position of the trees, so the same trees are pruned on every run
+    def expand_match_trees_in_direction(self, match_trees: List[VirtualBufferMatch], match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, direction: int, verbose: bool = False) -> Tuple[List[VirtualBufferMatch], VirtualBufferMatchCalculation]:
+        can_expand_count = 1
+        while can_expand_count != 0:
+            expanded_match_trees = []
+            for match_tree in match_trees:
+                if direction < 0:
+                    directed_match_trees, match_calculation = self.expand_match_tree_backward(match_tree, match_calculation, sublist, verbose=verbose)
+                else:
+                    directed_match_trees, match_calculation = self.expand_match_tree_forward(match_tree, match_calculation, sublist, verbose=verbose)
+                expanded_match_trees.extend(directed_match_trees)
+
+            match_trees = list(dict.fromkeys(expanded_match_trees))
+            self.expansion_counters.deduplicated += len(expanded_match_trees) - len(match_trees)
+            self.expansion_counters.track_frontier(len(match_trees))
+            if self.beam_width > 0 and len(match_trees) > self.beam_width:
+                if verbose:
+                    print( "---- Limiting " + str(len(match_trees)) + " match trees to a beam width of " + str(self.beam_width))
+                self.expansion_counters.beam_pruned += len(match_trees) - self.beam_width
+                match_trees.sort(key=lambda match_tree: (-match_tree.score_potential, match_tree.buffer_indices, match_tree.query_indices))
+                match_trees = match_trees[:self.beam_width]
+
+            if direction < 0:
+                can_expand_count = sum([match_tree.can_expand_backward(sublist) for match_tree in match_trees])
+            else:
+                can_expand_count = sum([match_tree.can_expand_forward(match_calculation, sublist) for match_tree in match_trees])
+
+        return match_trees, match_calculation
+
     def filter_expanded_match_trees(self, match_trees: List[VirtualBufferMatch], match_calculation: VirtualBufferMatchCalculation, verbose=False) -> List[VirtualBufferMatch]:
+        phase_start = time.perf_counter() if self.trace is not None else 0
+
         # Filter out results with multiple consecutive bad results
         low_score_threshold = match_calculation.match_threshold / 2
         single_word_score_threshold = -1 if match_calculation.purpose == "correction" else 0.29
@@ -430,6 +735,9 @@ class VirtualBufferMatcher:
                 filtered_trees.append(match_tree)
             elif verbose:
                 print( "--- FILTERING OUT BECAUSE OF BAD CONSECUTIVE SCORES", match_tree)
+
+        if self.trace is not None:
+            self.trace.add_phase("filter_expanded_match_trees", phase_start, len(filtered_trees))
         return filtered_trees
 
     def expand_match_tree_backward(self, match_tree: VirtualBufferMatch, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, verbose: bool = False) -> Tuple[List[VirtualBufferMatch], VirtualBufferMatchCalculation]:
@@ -440,9 +748,10 @@ class VirtualBufferMatcher:
             expanded_match_trees.append(match_tree)
         else:
             expanded_match_trees, match_calculation = self.expand_match_tree_in_direction(match_tree, match_calculation, sublist, -1, verbose=verbose)
+            self.expansion_counters.created += len(expanded_match_trees)
 
         # Only keep the branches that have a possibility to become the best
-        return [expanded_match_tree for expanded_match_tree in expanded_match_trees if expanded_match_tree.score_potential >= match_calculation.match_threshold], match_calculation
+        return self.prune_match_trees(expanded_match_trees, match_calculation), match_calculation
         
     def expand_match_tree_forward(self, match_tree: VirtualBufferMatch, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, verbose: bool = False) -> Tuple[List[VirtualBufferMatch], VirtualBufferMatchCalculation]:
         expanded_match_trees = []
@@ -452,9 +761,15 @@ class VirtualBufferMatcher:
             expanded_match_trees.append(match_tree)
         else:
             expanded_match_trees, match_calculation = self.expand_match_tree_in_direction(match_tree, match_calculation, sublist, 1, verbose=verbose)
+            self.expansion_counters.created += len(expanded_match_trees)
 
         # Prune the branches that do not have a possibility to become the best
-        return [expanded_match_tree for expanded_match_tree in expanded_match_trees if expanded_match_tree.score_potential >= match_calculation.match_threshold], match_calculation
+        return self.prune_match_trees(expanded_match_trees, match_calculation), match_calculation
+
+    def prune_match_trees(self, match_trees: List[VirtualBufferMatch], match_calculation: VirtualBufferMatchCalculation) -> List[VirtualBufferMatch]:
+        kept_match_trees = [match_tree for match_tree in match_trees if match_tree.score_potential >= match_calculation.match_threshold]
+        self.expansion_counters.pruned += len(match_trees) - len(kept_match_trees)
+        return kept_match_trees
 
     def expand_match_tree_in_direction(self, match_tree: VirtualBufferMatch, match_calculation: VirtualBufferMatchCalculation, sublist: VirtualBufferTokenList, direction: int = 1, verbose: bool = False) -> Tuple[List[VirtualBufferMatch], VirtualBufferMatchCalculation]:
         expanded_match_trees = []
@@ -502,9 +817,9 @@ class VirtualBufferMatcher:
             previous_word = sublist.tokens[next_buffer_index - (1 * direction)].phrase
             skipped_word = sublist.tokens[next_buffer_index].phrase
             next_word = sublist.tokens[next_buffer_skip_index].phrase
-            previous_word_syllables = self.phonetic_search.syllable_count(previous_word)
-            skipped_word_syllables = self.phonetic_search.syllable_count(skipped_word)
-            next_word_syllables = self.phonetic_search.syllable_count(next_word)
+            previous_word_syllables = self.get_token_phonetics(sublist.tokens[next_buffer_index - (1 * direction)]).syllables
+            skipped_word_syllables = self.get_token_phonetics(sublist.tokens[next_buffer_index]).syllables
+            next_word_syllables = self.get_token_phonetics(sublist.tokens[next_buffer_skip_index]).syllables
 
             if verbose:
                 print( " - SKIP! PREVIOUS '" + previous_word + "'", previous_word_syllables )
@@ -660,7 +975,11 @@ class VirtualBufferMatcher:
         query_words = [match_calculation.words[query_index] for query_index in query_indices]
         buffer_words = [sublist.tokens[buffer_index].phrase for buffer_index in buffer_indices]
         weight = sum([match_calculation.weights[query_index] for query_index in query_indices])
-        score = self.get_memoized_similarity_score("".join(query_words), "".join(buffer_words))
+        if len(buffer_indices) == 1:
+            buffer_token = self.get_token_phonetics(sublist.tokens[buffer_indices[0]])
+            score = self.get_memoized_similarity_score("".join(query_words), "".join(buffer_words), None, (buffer_token.strict_phonetics, buffer_token.loose_phonetics))
+        else:
+            score = self.get_memoized_similarity_score("".join(query_words), "".join(buffer_words))
         skipped_scores = []
         skipped_words = []
 
@@ -811,32 +1130,45 @@ class VirtualBufferMatcher:
         # Due to multiple different fuzzy matches being possible, it isn't possible to do token skipping
         # Like in the Boyer–Moore string-search algorithm
         # But if we have exact matches that we need to filter out, we can do something similar to Boyer-Moore
+        query_tokens = "".join([match_calculation.words[word_index] for word_index in word_indices])
+        query_words = [match_calculation.words[word_index] for word_index in word_indices]
+
+        # Use a high threshold if we explore all branches, otherwise use a weighed threshold
+        threshold = match_calculation.match_threshold
+        if match_calculation.has_initial_branch_pruning():
+            threshold = threshold * sum([match_calculation.weights[word_index] for word_index in word_indices])
+
+        # Words that cannot reach the threshold, or the score needed to be skipped later on, do not need an exact score
+        # Their upper bound gives the same results in the comparisons below
+        upper_bounds = self.vocabulary.get_score_upper_bounds(query_tokens)
+        minimum_score = min(threshold, self.get_non_match_threshold(match_calculation))
+        self.fill_memoized_similarity_scores(query_tokens, [token for token_list_index, token in enumerate(token_list.tokens) \
+            if token_list_index >= word_indices[0] and not match_calculation.cache.should_skip_index(token_list.index + token_list_index) \
+            and upper_bounds.get(token.phrase.replace(" ", ""), EXACT_MATCH) >= minimum_score])
+
         for token_list_index in range(word_indices[0], len(token_list.tokens)):
             if match_calculation.cache.should_skip_index(token_list.index + token_list_index):
                 continue
             token_list_token = token_list.tokens[token_list_index]
+            token_word = token_list_token.phrase.replace(" ", "")
 
-            # Use a high threshold if we explore all branches, otherwise use a weighed threshold
-            threshold = match_calculation.match_threshold
-            if match_calculation.has_initial_branch_pruning():
-                threshold = threshold * sum([match_calculation.weights[word_index] for word_index in word_indices])
-
-            query_tokens = "".join([match_calculation.words[word_index] for word_index in word_indices])
-            score = self.get_memoized_similarity_score(token_list_token.phrase.replace(" ", ""), query_tokens)
+            upper_bound = upper_bounds.get(token_word, EXACT_MATCH)
+            if upper_bound < minimum_score:
+                score = upper_bound
+            else:
+                score = self.get_memoized_similarity_score(token_word, query_tokens)
             single_score = score
             buffer_indices = [token_list_index]
             match_calculation.cache.cache_buffer_index_score(score, buffer_indices, token_list)
             is_multiple_query_match = len(word_indices) > 1
 
-            query_words = [match_calculation.words[word_index] for word_index in word_indices]
-            individual_scores = [0.0] if match_calculation.selfrepair else [self.get_memoized_similarity_score(word, token_list_token.phrase.replace(" ", "")) for word in query_words]
-
             # Add single combination
             if score >= threshold:
                 if verbose:
                     print( "Score for " + query_tokens + " = " + token_list_token.phrase.replace(" ", "") + " " + ",".join([str(bufin) for bufin in buffer_indices]) + ": " + str(score) + " with weighted thresh:" + str(threshold), score >= threshold)
 
                 # Only add a match branch for a combined query search if the combined search scores higher than individual scores
+                individual_scores = [0.0] if match_calculation.selfrepair else [self.get_memoized_similarity_score(word, token_word) for word in query_words]
                 if not is_multiple_query_match or max(individual_scores) < score:
                     match_calculation.append_starting_branch(word_indices, [token_list.index + index for index in buffer_indices], score)
             biggest_score = score
@@ -847,11 +1179,11 @@ class VirtualBufferMatcher:
                 # Combine forward
                 if token_list_index + 1 < len(token_list.tokens):
                     phrases = [token_list_token.phrase, token_list.tokens[token_list_index + 1].phrase]
-                    combined_score = self.get_memoized_similarity_score("".join(phrases).replace(" ", ""), query_tokens)
+                    combined_score = self.get_bounded_similarity_score("".join(phrases).replace(" ", ""), query_tokens, max(threshold, single_score) + combined_better_threshold)
                     if (combined_score - combined_better_threshold ) > single_score and (combined_score - combined_better_threshold) >= threshold:
                         if token_list_index + 2 < len(token_list.tokens):
                             triple_phrases = [token_list_token.phrase, token_list.tokens[token_list_index + 1].phrase, token_list.tokens[token_list_index + 2].phrase]
-                            triple_combined_score = self.get_memoized_similarity_score("".join(triple_phrases).replace(" ", ""), query_tokens)
+                            triple_combined_score = self.get_bounded_similarity_score("".join(triple_phrases).replace(" ", ""), query_tokens, combined_score + combined_better_threshold)
                             if (triple_combined_score - combined_better_threshold) > combined_score:
                                 buffer_indices = [token_list_index, token_list_index + 1, token_list_index + 2]
                                 score = triple_combined_score
@@ -873,11 +1205,11 @@ class VirtualBufferMatcher:
                 # Combine backwards
                 if token_list_index - 1 >= 0:
                     phrases = [token_list.tokens[token_list_index - 1].phrase, token_list_token.phrase]
-                    combined_score = self.get_memoized_similarity_score("".join(phrases).replace(" ", ""), query_tokens)
+                    combined_score = self.get_bounded_similarity_score("".join(phrases).replace(" ", ""), query_tokens, max(threshold, single_score) + combined_better_threshold)
                     if (combined_score - combined_better_threshold) > single_score and (combined_score - combined_better_threshold) >= threshold:
                         if token_list_index - 2 >= 0:
                             triple_phrases = [token_list.tokens[token_list_index - 2].phrase, token_list.tokens[token_list_index - 1].phrase, token_list_token.phrase]
-                            triple_combined_score = self.get_memoized_similarity_score("".join(triple_phrases).replace(" ", ""), query_tokens)
+                            triple_combined_score = self.get_bounded_similarity_score("".join(triple_phrases).replace(" ", ""), query_tokens, combined_score + combined_better_threshold)
                             if (triple_combined_score - combined_better_threshold) > combined_score:
                                 buffer_indices = [token_list_index - 2, token_list_index - 1, token_list_index]
                                 score = triple_combined_score
@@ -945,6 +1277,11 @@ class VirtualBufferMatcher:
         starting_token_list = a if a.index < b.index else b
         ending_token_list = b if a.index < b.index else a
 
+        # Overlapping views on the same tokens are merged by extending the view
+        if isinstance(starting_token_list.tokens, VirtualBufferTokenView) and isinstance(ending_token_list.tokens, VirtualBufferTokenView) \
+            and starting_token_list.tokens.source is ending_token_list.tokens.source:
+            return VirtualBufferTokenList(starting_token_list.index, get_token_view(starting_token_list.tokens, 0, ending_token_list.end_index - starting_token_list.index + 1))
+
         combined_tokens = []
         combined_tokens.extend(starting_token_list.tokens)
         if ending_token_list.end_index > starting_token_list.end_index:
@@ -977,6 +1314,41 @@ class VirtualBufferMatcher:
 
         return None
 
+    # Resolve a self repair directly from tokens that were tracked in the input history, like the last insert
+    # As we know the exact tokens, we only need to verify that they still end at the cursor instead of doing a fuzzy search
+    # Returns None when the tokens cannot be resolved, so the fuzzy self repair search can be used instead
+    def find_self_repair_match_by_tokens(self, virtual_buffer, tracked_tokens: List[VirtualBufferToken]) -> VirtualBufferMatch:
+        if virtual_buffer.is_selecting() or tracked_tokens is None or len(tracked_tokens) == 0:
+            return None
+
+        # Punctuation changes which words the fuzzy search can match, so leave those to the fuzzy search
+        for token in tracked_tokens:
+            normalized_text = token.text.replace("\n", ".").replace(" ", "")
+            if token.phrase == "" or normalized_text.startswith((",", ".", "!", "?")) or normalized_text.endswith((",", ".", "!", "?")):
+                return None
+
+        # The tracked tokens need to be at their original positions, right before the cursor
+        ending_index = virtual_buffer.determine_rightmost_token_index()[0]
+        starting_index = ending_index + 1 - len(tracked_tokens)
+        if ending_index == -1 or starting_index < 0:
+            return None
+
+        for index, token in enumerate(tracked_tokens):
+            buffer_token = virtual_buffer.tokens[starting_index + index]
+            if buffer_token.text != token.text or buffer_token.line_index != token.line_index or \
+                buffer_token.index_from_line_end != token.index_from_line_end:
+                return None
+
+        phrases = [token.phrase for token in tracked_tokens]
+        return VirtualBufferMatch(
+            [[index] for index in range(len(phrases))],
+            [[starting_index + index] for index in range(len(phrases))],
+            phrases,
+            list(phrases),
+            [EXACT_MATCH for _ in phrases],
+            EXACT_MATCH
+        )
+
     def find_best_match_by_phrases_for_self_repair(self, virtual_buffer, phrases: List[str], match_threshold: float = CORRECTION_THRESHOLD, verbose=False):
         rightmost_token_index = virtual_buffer.determine_rightmost_token_index()[0]
         starting_index = max(0, rightmost_token_index + 1 - (len(phrases) * 3))
@@ -994,118 +1366,117 @@ class VirtualBufferMatcher:
         if starting_index >= ending_index:
             return None
 
-        token_list = VirtualBufferTokenList(starting_index, virtual_buffer.tokens[starting_index:ending_index])
-
-        match_calculation = self.generate_match_calculation(phrases, match_threshold, purpose="selfrepair")
-        match_calculation.cache.index_token_list(token_list)
-        starting_match = VirtualBufferMatch([], [], [], [], [], match_calculation.max_score, 0)
-        query = match_calculation.words
-        buffer = [token.phrase for token in token_list.tokens]
-        matches = []
+        token_list = VirtualBufferTokenList(starting_index, VirtualBufferTokenView(virtual_buffer.tokens, starting_index, ending_index))
+        is_tracing = self.start_trace("selfrepair", phrases)
+        try:
+            self.validate_similarity_memos()
+            self.expansion_counters.reset()
+
+            match_calculation = self.generate_match_calculation(phrases, match_threshold, purpose="selfrepair")
+            match_calculation.cache.index_token_list(token_list)
+            starting_match = VirtualBufferMatch([], [], [], [], [], match_calculation.max_score, 0)
+            query = match_calculation.words
+            buffer = [token.phrase for token in token_list.tokens]
+            matches = []
 
-        # Because self repair only activates if the start matches, we only use the first (combined) tokens for matching
-        # For performance improvements without impacting accuracy
-        match_calculation = self.fill_starting_branches_for_self_repair(token_list, match_threshold, match_calculation, verbose)
-        starting_branches = match_calculation.get_starting_branches(token_list)
-        if verbose:
-            print( "    - FOUND ROOTS FOR SELF-REPAIR" )
-            print( match_calculation.starting_branches )
+            # Because self repair only activates if the start matches, we only use the first (combined) tokens for matching
+            # For performance improvements without impacting accuracy
+            match_calculation = self.fill_starting_branches_for_self_repair(token_list, match_threshold, match_calculation, verbose)
+            starting_branches = match_calculation.get_starting_branches(token_list)
+            if verbose:
+                print( "    - FOUND ROOTS FOR SELF-REPAIR" )
+                print( match_calculation.starting_branches )
         
-        for branch in starting_branches:
-            combined_weight = sum([match_calculation.weights[index] for index in branch.query_indices])
-            if branch.score_potential >= match_calculation.match_threshold:
-                match_branch = starting_match.clone()
-                match_branch.query_indices.append(branch.query_indices)
-                match_branch.query.extend([query[index] for index in branch.query_indices])
-                normalized_buffer_indices = [index - token_list.index for index in branch.buffer_indices]
-                match_branch.buffer_indices.append(normalized_buffer_indices)
-                match_branch.buffer.extend([buffer[buffer_index] for buffer_index in normalized_buffer_indices])
-                match_branch.scores.append(branch.score)
-                match_branch.reduce_potential(match_calculation.max_score, branch.score, combined_weight)
-
-                # Expand backwards, because sometimes we have matches that have direct matches not on the first tokens
-                match_trees = [match_branch]
-                if match_branch.can_expand_backward(token_list):
-                    can_expand_backward_count = 1
-                    while can_expand_backward_count != 0:
-                        expanded_match_trees = []
-                        for match_tree in match_trees:
-                            backward_expanded_match_tree, match_calculation = self.expand_match_tree_backward(match_tree, match_calculation, token_list, verbose=verbose)
-                            expanded_match_trees.extend(backward_expanded_match_tree)
-                        can_expand_backward_count = sum([expanded_match_tree.can_expand_backward(token_list) for expanded_match_tree in expanded_match_trees])
-                        match_trees = list(set(expanded_match_trees))
-
-                # Expand forwards until it is no longer possible within the token_list
-                # Because the query can contain words beyond the token_list that will be used for insertion
-                if match_branch.can_expand_forward(match_calculation, token_list):
-                    can_expand_forward_count = 1
-                    while can_expand_forward_count != 0:
-                        expanded_match_trees = []
-                        for match_tree in match_trees:
-                            forward_expanded_match_tree, match_calculation = self.expand_match_tree_forward(match_tree, match_calculation, token_list, verbose=verbose)
-                            expanded_match_trees.extend(forward_expanded_match_tree)
-                        can_expand_forward_count = sum([expanded_match_tree.can_expand_forward(match_calculation, token_list) for expanded_match_tree in expanded_match_trees])
-                        match_trees = list(set(expanded_match_trees))
-
-                match_trees = self.filter_expanded_match_trees(match_trees, match_calculation, verbose=verbose)
+            for branch in starting_branches:
+                combined_weight = sum([match_calculation.weights[index] for index in branch.query_indices])
+                if branch.score_potential >= match_calculation.match_threshold:
+                    match_branch = starting_match.clone()
+                    match_branch.query_indices.append(branch.query_indices)
+                    match_branch.query.extend([query[index] for index in branch.query_indices])
+                    normalized_buffer_indices = [index - token_list.index for index in branch.buffer_indices]
+                    match_branch.buffer_indices.append(normalized_buffer_indices)
+                    match_branch.buffer.extend([buffer[buffer_index] for buffer_index in normalized_buffer_indices])
+                    match_branch.scores.append(branch.score)
+                    match_branch.reduce_potential(match_calculation.max_score, branch.score, combined_weight)
+
+                    # Expand backwards, because sometimes we have matches that have direct matches not on the first tokens
+                    match_trees = [match_branch]
+                    if self.settings.get_matcher_engine() == ALIGNMENT_ENGINE:
+                        match_trees = self.alignment_engine.align_match_tree(match_branch, match_calculation, token_list, verbose=verbose)
+                    elif match_branch.can_expand_backward(token_list):
+                        match_trees, match_calculation = self.expand_match_trees_in_direction(match_trees, match_calculation, token_list, -1, verbose=verbose)
+
+                    # Expand forwards until it is no longer possible within the token_list
+                    # Because the query can contain words beyond the token_list that will be used for insertion
+                    if self.settings.get_matcher_engine() != ALIGNMENT_ENGINE and match_branch.can_expand_forward(match_calculation, token_list):
+                        match_trees, match_calculation = self.expand_match_trees_in_direction(match_trees, match_calculation, token_list, 1, verbose=verbose)
+
+                    match_trees = self.filter_expanded_match_trees(match_trees, match_calculation, verbose=verbose)
 
-                if verbose:
-                    print( "FOUND MATCH TREES FOR SELF-REPAIR", match_trees )
-
-                # Filter out all the match trees that don't connect with the end of the token_list
-                for match_tree in match_trees:
-                    match_tree.to_global_index(token_list)
-                    if match_tree.buffer_indices[-1][-1] + 1 >= token_list.index + token_list.length:
-
-                        # When the first word of the match isn't exact it is not a self repair
-                        first_token_matches = match_tree.scores[0] >= SELECTION_THRESHOLD
-
-                        # Check if the found match is a direct continuation of the uttered word
-                        if not first_token_matches:
-                            starting_buffer_length = len(match_tree.buffer_indices[0])
-                            buffer_words = ""
-                            for buffer_index, buffer_word in enumerate(match_tree.buffer):
-                                buffer_words += buffer_word
-                                if buffer_index + 1 >= starting_buffer_length:
-                                    break
-
-                            starting_query_length = len(match_tree.query_indices[0])
-                            query_words = ""
-                            for query_index, query_word in enumerate(match_tree.query):
-                                query_words += query_word
-                                if query_index + 1 >= starting_query_length:
-                                    break
-
-                            is_continuation = query_words.startswith(buffer_words)
-                            first_token_matches = is_continuation
-
-                        second_token_matches = len(match_tree.scores) > 1 and not first_token_matches and \
-                            match_tree.scores[1] >= SELECTION_THRESHOLD and match_tree.score_potential > CORRECTION_THRESHOLD
-
-                        has_skip_before_end = len(match_tree.scores) > 2 and match_tree.scores[-2] == 0
-                        final_combined_tokens_bad = ( has_skip_before_end or len(match_tree.query_indices[-1]) > 1 or len(match_tree.buffer_indices[-1]) > 1 ) and \
-                            match_tree.scores[-1] < CORRECTION_THRESHOLD
-
-                        # If it is only the first token that doesn't match, but the rest is very confident
-                        # We expect we need to replace the first item
-                        first_token_doesnt_match_but_others_high = match_tree.scores[0] < CORRECTION_THRESHOLD and \
-                            match_tree.score_potential > SELECTION_THRESHOLD
-                        if not final_combined_tokens_bad and (first_token_matches or first_token_doesnt_match_but_others_high or second_token_matches):
-                            if verbose:
-                                print("FOUND SELF-REPAIR MATCH", match_tree)
+                    if verbose:
+                        print( "FOUND MATCH TREES FOR SELF-REPAIR", match_trees )
+
+                    # Filter out all the match trees that don't connect with the end of the token_list
+                    for match_tree in match_trees:
+                        match_tree.to_global_index(token_list)
+                        if match_tree.buffer_indices[-1][-1] + 1 >= token_list.index + token_list.length:
+
+                            # When the first word of the match isn't exact it is not a self repair
+                            first_token_matches = match_tree.scores[0] >= SELECTION_THRESHOLD
+
+                            # Check if the found match is a direct continuation of the uttered word
+                            if not first_token_matches:
+                                starting_buffer_length = len(match_tree.buffer_indices[0])
+                                buffer_words = ""
+                                for buffer_index, buffer_word in enumerate(match_tree.buffer):
+                                    buffer_words += buffer_word
+                                    if buffer_index + 1 >= starting_buffer_length:
+                                        break
+
+                                starting_query_length = len(match_tree.query_indices[0])
+                                query_words = ""
+                                for query_index, query_word in enumerate(match_tree.query):
+                                    query_words += query_word
+                                    if query_index + 1 >= starting_query_length:
+                                        break
+
+                                is_continuation = query_words.startswith(buffer_words)
+                                first_token_matches = is_continuation
+
+                            second_token_matches = len(match_tree.scores) > 1 and not first_token_matches and \
+                                match_tree.scores[1] >= SELECTION_THRESHOLD and match_tree.score_potential > CORRECTION_THRESHOLD
+
+                            has_skip_before_end = len(match_tree.scores) > 2 and match_tree.scores[-2] == 0
+                            final_combined_tokens_bad = ( has_skip_before_end or len(match_tree.query_indices[-1]) > 1 or len(match_tree.buffer_indices[-1]) > 1 ) and \
+                                match_tree.scores[-1] < CORRECTION_THRESHOLD
+
+                            # If it is only the first token that doesn't match, but the rest is very confident
+                            # We expect we need to replace the first item
+                            first_token_doesnt_match_but_others_high = match_tree.scores[0] < CORRECTION_THRESHOLD and \
+                                match_tree.score_potential > SELECTION_THRESHOLD
+                            if not final_combined_tokens_bad and (first_token_matches or first_token_doesnt_match_but_others_high or second_token_matches):
+                                if verbose:
+                                    print("FOUND SELF-REPAIR MATCH", match_tree)
+                                    print("Final combined tokens bad", final_combined_tokens_bad, "First token matches", first_token_matches, "second token matches", second_token_matches, " or rest matches well", first_token_doesnt_match_but_others_high)
+                                matches.append(match_tree)
+                            elif verbose:
+                                print("SKIPPING MATCH TREE", match_tree)
                                 print("Final combined tokens bad", final_combined_tokens_bad, "First token matches", first_token_matches, "second token matches", second_token_matches, " or rest matches well", first_token_doesnt_match_but_others_high)
-                            matches.append(match_tree)
                         elif verbose:
-                            print("SKIPPING MATCH TREE", match_tree)
-                            print("Final combined tokens bad", final_combined_tokens_bad, "First token matches", first_token_matches, "second token matches", second_token_matches, " or rest matches well", first_token_doesnt_match_but_others_high)
-                    elif verbose:
-                        print( "SKIPPING MATCH TREE BECAUSE IT DOES NOT REACH THE END", match_tree)
+                            print( "SKIPPING MATCH TREE BECAUSE IT DOES NOT REACH THE END", match_tree)
 
-        # Sort matches by longest selection
-        matches.sort(key = cmp_to_key(self.compare_match_trees_for_selfrepair), reverse=True)
-        if verbose:
-            print("TOTAL MATCHES", matches)
-        return None if len(matches) == 0 else matches[0]
+            # Sort matches by longest selection
+            phase_start = time.perf_counter() if self.trace is not None else 0
+            matches.sort(key = cmp_to_key(self.compare_match_trees_for_selfrepair), reverse=True)
+            if self.trace is not None:
+                self.trace.add_phase("sorting", phase_start, len(matches))
+            if verbose:
+                print("TOTAL MATCHES", matches)
+
+            return None if len(matches) == 0 else matches[0]
+        finally:
+            if is_tracing:
+                self.finish_trace()
 
     def fill_starting_branches_for_self_repair(self, token_list: VirtualBufferTokenList, starting_threshold: float, match_calculation: VirtualBufferMatchCalculation, verbose = False) -> VirtualBufferMatchCalculation:
         for query_indices in match_calculation.get_possible_branches():
@@ -1114,7 +1485,8 @@ class VirtualBufferMatcher:
             query_tokens = "".join([match_calculation.words[word_index] for word_index in query_indices])
             for token_list_index in range(token_list.length - 1, -1, -1):
                 token_list_token = token_list.tokens[token_list_index]
-                score = self.get_memoized_similarity_score(token_list_token.phrase.replace(" ", ""), query_tokens)
+                token_phonetics = self.get_token_phonetics(token_list_token)
+                score = self.get_memoized_similarity_score(token_list_token.phrase.replace(" ", ""), query_tokens, (token_phonetics.strict_phonetics, token_phonetics.loose_phonetics))
                 single_score = score
                 buffer_indices = [token_list_index]
                 match_calculation.cache.cache_buffer_index_score(score, buffer_indices, token_list)
@@ -1152,35 +1524,43 @@ class VirtualBufferMatcher:
         return match_calculation
 
     def find_best_match_by_phrases(self, virtual_buffer, phrases: List[str], match_threshold: float = SELECTION_THRESHOLD, next_occurrence: bool = True, selecting: bool = False, for_correction: bool = False, verbose: bool = False, direction: int = 0) -> (List[VirtualBufferToken], VirtualBufferMatch):
-        matches = self.find_top_three_matches_in_token_list(virtual_buffer, phrases, match_threshold, selecting, for_correction, verbose, direction)
+        is_tracing = self.start_trace("correction" if for_correction else "selection", phrases)
+        try:
+            matches = self.find_top_three_matches_in_token_list(virtual_buffer, phrases, match_threshold, selecting, for_correction, verbose, direction)
 
-        if verbose:
-            print( "All available matches:", matches, next_occurrence )
-
-        if len(matches) > 0:
-            best_match_tokens = []
+            if verbose:
+                print( "All available matches:", matches, next_occurrence )
 
-            # Use the closest one in the center
-            best_match = matches[0]
+            best_match_tokens = None
+            best_match = None
+            if len(matches) > 0:
+                best_match_tokens = []
 
-            if len(matches) > 1:
-                # Sort matches
-                if selecting:
-                    matches.sort(key = cmp_to_key(self.compare_match_trees_for_selection), reverse=True)
-                if for_correction:
-                    matches.sort(key = cmp_to_key(self.compare_match_trees_for_correction), reverse=True)
+                # Use the closest one in the center
                 best_match = matches[0]
 
-            for index_list in best_match.buffer_indices:
-                for subindex in index_list:
-                    best_match_tokens.append(virtual_buffer.tokens[subindex])
+                if len(matches) > 1:
+                    # Sort matches
+                    phase_start = time.perf_counter() if self.trace is not None else 0
+                    if selecting:
+                        matches.sort(key = cmp_to_key(self.compare_match_trees_for_selection), reverse=True)
+                    if for_correction:
+                        matches.sort(key = cmp_to_key(self.compare_match_trees_for_correction), reverse=True)
+                    if self.trace is not None:
+                        self.trace.add_phase("sorting", phase_start, len(matches))
+                    best_match = matches[0]
 
-            if verbose:
-                print( "BEST MATCH TOKENS", best_match_tokens )
+                for index_list in best_match.buffer_indices:
+                    for subindex in index_list:
+                        best_match_tokens.append(virtual_buffer.tokens[subindex])
+
+                if verbose:
+                    print( "BEST MATCH TOKENS", best_match_tokens )
 
             return (best_match_tokens, best_match)
-        else:
-            return (None, None)
+        finally:
+            if is_tracing:
+                self.finish_trace()
     
     def find_single_match_by_phrase(self, virtual_buffer, phrase: str, char_position: int = -1, next_occurrence: bool = True, selecting: bool = False, verbose: bool = False) -> VirtualBufferToken:
         direction = 0
@@ -1193,16 +1573,109 @@ class VirtualBufferMatcher:
         best_match_tokens, match = self.find_best_match_by_phrases(virtual_buffer, [phrase], SELECTION_THRESHOLD, next_occurrence, selecting, True, verbose, direction)
         return best_match_tokens[0] if best_match_tokens else None
         
-    def get_memoized_similarity_score(self, word_a: str, word_b: str) -> float:
+    # Score all the tokens against the query in a single batch and memoize the scores
+    # So they can be looked up one by one afterwards
+    def fill_memoized_similarity_scores(self, query: str, tokens: List[VirtualBufferToken]):
+        self.validate_similarity_memos()
+        words = []
+        phonetics = []
+        seen_words = set()
+        for token in tokens:
+            word = token.phrase.replace(" ", "")
+            if word not in seen_words:
+                seen_words.add(word)
+                if (self.similarity_matrix is None or self.similarity_matrix.get(word, query) is None) and \
+                    self.similarity_memo.get(word, query) is None:
+                    token = self.get_token_phonetics(token)
+                    words.append(word)
+                    phonetics.append((token.strict_phonetics, token.loose_phonetics))
+
+        if len(words) > 0:
+            for word, score in zip(words, self.phonetic_search.score_many(query, words, phonetics)):
+                self.similarity_memo.set(word, query, score)
+
+    # Score every query variant against all the words in the buffer up front
+    # The matrix is kept for as long as the query stays the same, so only new words in the buffer need to be scored
+    def update_similarity_matrix(self, match_calculation: VirtualBufferMatchCalculation):
+        queries = get_query_variants(match_calculation.words)
+        if self.similarity_matrix is None or not self.similarity_matrix.is_valid(queries):
+            self.similarity_matrix = VirtualBufferSimilarityMatrix(self.phonetic_search, queries)
+        self.similarity_matrix.add_words(self.vocabulary, self.get_non_match_threshold(match_calculation))
+
+    # Make sure the precomputed phonetic keys of the token match its current phrase and our language
+    def get_token_phonetics(self, token: VirtualBufferToken) -> VirtualBufferToken:
+        return update_token_phonetics(token, self.phonetic_search)
+
+    # Drop the memoized scores if they were calculated before the similarities or the language changed
+    # This is checked at the start of every search, as similarities are only learned in between searches
+    def validate_similarity_memos(self):
+        self.similarity_memo.validate(self.phonetic_search.version)
+        self.similarity_upper_bounds.validate(self.phonetic_search.version)
+        if self.similarity_matrix is not None and self.similarity_matrix.version != self.phonetic_search.version:
+            self.similarity_matrix = None
+
+    def get_similarity_memo_stats(self) -> Dict[str, float]:
+        return self.similarity_memo.get_stats()
+
+    # The amount of match trees created, pruned, deduplicated and limited by the beam during the last search
+    def get_expansion_statistics(self) -> Dict[str, int]:
+        return self.expansion_counters.get_statistics()
+
+    # Send a trace with the phase timings of every search to the sink, or stop tracing by passing None
+    def set_trace_sink(self, trace_sink: VirtualBufferMatchTraceSink = None):
+        self.trace_sink = trace_sink
+        self.trace = None
+
+    # Only start a trace if a sink is connected and no search is being traced yet
+    # Retries and nested searches add their phases to the trace of the search that started it
+    def start_trace(self, search: str, phrases: List[str]) -> bool:
+        if self.trace_sink is None or self.trace is not None:
+            return False
+        self.trace = VirtualBufferMatchTrace(search, phrases)
+        return True
+
+    def finish_trace(self):
+        trace = self.trace
+        self.trace = None
+        if trace is not None:
+            trace.finish()
+            self.trace_sink(trace)
+
+    # Only returns the exact score if it can reach the minimum score, otherwise a score of 0 is returned
+    # Bailed out scores are memoized separately, as we only know the exact score is lower than the minimum score
+    def get_bounded_similarity_score(self, word_a: str, word_b: str, min_score: float) -> float:
+        if self.similarity_matrix is not None:
+            score = self.similarity_matrix.get(word_a, word_b)
+            if score is not None:
+                return score if score >= min_score else 0
+
+        upper_bound = self.similarity_upper_bounds.get(word_a, word_b)
+        if upper_bound is not None and min_score >= upper_bound:
+            return 0
+
+        score = self.similarity_memo.get(word_a, word_b)
+        if score is not None:
+            return score
+
+        score = self.phonetic_search.phonetic_similarity_score(word_a, word_b, min_score=min_score)
+        if score > 0:
+            self.similarity_memo.set(word_a, word_b, score)
+        else:
+            self.similarity_upper_bounds.set(word_a, word_b, min_score)
+        return score
+
+    # Precomputed ( strict, loose ) phonetic keys can be passed along to skip normalizing the words again
+    def get_memoized_similarity_score(self, word_a: str, word_b: str, phonetics_a: Tuple[str, str] = None, phonetics_b: Tuple[str, str] = None) -> float:
+        if self.similarity_matrix is not None:
+            score = self.similarity_matrix.get(word_a, word_b)
+            if score is not None:
+                return score
+
         # Quick memoized look up
-        if word_a in self.similarity_token_list and word_b in self.similarity_token_list[word_a]:
-            return self.similarity_token_list[word_a][word_b]
-        elif word_b in self.similarity_token_list and word_a in self.similarity_token_list[word_b]:
-            return self.similarity_token_list[word_b][word_a]
-        
-        # Generate single cache entry using calculated similarity score
-        if word_a not in self.similarity_token_list:
-            self.similarity_token_list[word_a] = {}
+        score = self.similarity_memo.get(word_a, word_b)
 
-        self.similarity_token_list[word_a][word_b] = self.phonetic_search.phonetic_similarity_score(word_a, word_b)
-        return self.similarity_token_list[word_a][word_b]
\ No newline at end of file
+        # Generate single cache entry using calculated similarity score
+        if score is None:
+            score = self.phonetic_search.phonetic_similarity_score(word_a, word_b, phonetics_a, phonetics_b)
+            self.similarity_memo.set(word_a, word_b, score)
+        return score
@@ -23,6 +23,12 @@ class VirtualBufferSettings:
     remove_word_key:str = "ctrl-backspace"
     remove_forward_word_key:str = "ctrl-delete"
 
+    # The engine used to expand matches, empty for the default match trees
+    matcher_engine:str = ""
+
+    # The order in which the windows of the document are searched, empty for the nearest windows first
+    matcher_window_search:str = ""
+
     def __init__(self, live_checking=False):
         self.live_checking = live_checking
 
@@ -76,4 +82,14 @@ class VirtualBufferSettings:
             self.remove_word_forward_key = settings.get("user.marithime_context_remove_forward_word")
         return self.remove_word_forward_key
 
+    def get_matcher_engine(self):
+        if self.live_checking:
+            self.matcher_engine = settings.get("user.marithime_matcher_engine")
+        return self.matcher_engine
+
+    def get_matcher_window_search(self):
+        if self.live_checking:
+            self.matcher_window_search = settings.get("user.marithime_matcher_window_search")
+        return self.matcher_window_search
+
 virtual_buffer_settings = VirtualBufferSettings(True)
\ No newline at end of file
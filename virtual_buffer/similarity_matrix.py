@@ -0,0 +1,73 @@
+from ..phonetics.phonetics import PhoneticSearch
+from ..utils.levenshtein import numpy
+from .vocabulary import VirtualBufferVocabulary
+from typing import List, Dict
+
+# The longest run of query words that is matched against a single buffer word
+MAX_COMBINED_QUERY_WORDS = 3
+
+# Every variant of the query that gets scored against single buffer words
+# Which are the query words themselves and runs of consecutive query words that can be combined
+def get_query_variants(query_words: List[str]) -> List[str]:
+    variants = []
+    for length in range(1, MAX_COMBINED_QUERY_WORDS + 1):
+        for index in range(0, len(query_words) - length + 1):
+            variant = "".join(query_words[index:index + length])
+            if variant not in variants:
+                variants.append(variant)
+    return variants
+
+# Similarity scores of every query variant against every distinct word in the buffer
+# The scores of new words are calculated for every variant in one batch, vectorized with NumPy where available
+# Without NumPy only the words whose upper bound reaches the minimum score are scored, the other cells are left empty
+# Scores only depend on the words themselves, so words that leave the buffer can stay in the matrix
+class VirtualBufferSimilarityMatrix:
+    phonetic_search: PhoneticSearch
+    version: int
+    queries: List[str]
+    row_indices: Dict[str, int]
+    column_indices: Dict[str, int]
+    scores: List[List[float]]
+
+    def __init__(self, phonetic_search: PhoneticSearch, queries: List[str]):
+        self.phonetic_search = phonetic_search
+        self.version = phonetic_search.version
+        self.queries = queries
+        self.row_indices = {query: index for index, query in enumerate(queries)}
+        self.column_indices = {}
+        self.scores = [[] for _ in queries]
+
+    def is_valid(self, queries: List[str]) -> bool:
+        return self.queries == queries and self.version == self.phonetic_search.version
+
+    # Add the scores of the words in the vocabulary that are not in the matrix yet
+    def add_words(self, vocabulary: VirtualBufferVocabulary, minimum_score: float = 0):
+        words = [word for word in vocabulary.word_phonetics if word not in self.column_indices]
+        if len(words) == 0:
+            return
+
+        for word in words:
+            self.column_indices[word] = len(self.column_indices)
+        for row, query in enumerate(self.queries):
+            row_words = words
+            if numpy is None:
+                upper_bounds = vocabulary.get_score_upper_bounds(query)
+                row_words = [word for word in words if upper_bounds[word] >= minimum_score]
+
+            row_scores = dict(zip(row_words, self.phonetic_search.score_many(query, row_words, [vocabulary.word_phonetics[word] for word in row_words])))
+            self.scores[row].extend([row_scores.get(word) for word in words])
+
+    # Look up the score in both directions, as similarity scores are symmetric
+    def get(self, word_a: str, word_b: str) -> float:
+        row = self.row_indices.get(word_a)
+        if row is not None:
+            column = self.column_indices.get(word_b)
+            if column is not None:
+                return self.scores[row][column]
+
+        row = self.row_indices.get(word_b)
+        if row is not None:
+            column = self.column_indices.get(word_a)
+            if column is not None:
+                return self.scores[row][column]
+        return None
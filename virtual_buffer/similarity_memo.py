@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Dict
+
+# The amount of word pair scores kept before the least recently used words are evicted
+DEFAULT_SIMILARITY_MEMO_SIZE = 50000
+
+# Bounded two level least recently used memo for similarity scores between word pairs
+# Scores are grouped per word, and whole groups are evicted at once when the memo grows beyond its maximum size
+# The memo is tied to a version of the phonetic search, so learned similarities or language changes clear the scores right away
+class SimilarityMemo:
+    max_size: int
+    rows: OrderedDict
+    entries: int = 0
+    version: int = -1
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __init__(self, max_size: int = DEFAULT_SIMILARITY_MEMO_SIZE):
+        self.max_size = max_size
+        self.invalidate()
+        self.reset_stats()
+
+    # Clear the memo if the scores were calculated with a different version of the phonetic search
+    def validate(self, version: int):
+        if version != self.version:
+            self.invalidate()
+            self.version = version
+
+    # Similarity scores are symmetric, so word pairs are always stored in the same order
+    def get(self, word_a: str, word_b: str) -> float:
+        if word_b < word_a:
+            word_a, word_b = word_b, word_a
+
+        row = self.rows.get(word_a)
+        if row is not None:
+            score = row.get(word_b)
+            if score is not None:
+                self.hits += 1
+                self.rows.move_to_end(word_a)
+                return score
+
+        self.misses += 1
+        return None
+
+    def set(self, word_a: str, word_b: str, score: float):
+        if self.max_size <= 0:
+            return
+        if word_b < word_a:
+            word_a, word_b = word_b, word_a
+
+        row = self.rows.get(word_a)
+        if row is None:
+            row = {}
+            self.rows[word_a] = row
+        if word_b not in row:
+            self.entries += 1
+        row[word_b] = score
+        self.rows.move_to_end(word_a)
+        self.evict(self.max_size)
+
+    def evict(self, max_size: int):
+        # Never evict the most recently used row, so a single large row can still be looked up
+        while self.entries > max_size and len(self.rows) > 1:
+            _, row = self.rows.popitem(last=False)
+            self.entries -= len(row)
+            self.evictions += len(row)
+
+    def set_max_size(self, max_size: int):
+        self.max_size = max_size
+        if max_size <= 0:
+            self.invalidate()
+        else:
+            self.evict(max_size)
+
+    def invalidate(self):
+        self.rows = OrderedDict()
+        self.entries = 0
+
+    def size(self) -> int:
+        return self.entries
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size(),
+            "hit_rate": 0.0 if lookups == 0 else self.hits / lookups
+        }
@@ -0,0 +1,62 @@
+from .typing import VirtualBufferToken
+from typing import List
+from bisect import bisect_left
+
+# Index from caret positions to the tokens of the virtual buffer
+# Keeps the first token index of every line, along with the character offsets from the start of the line at the end of every token
+# So a caret position can be resolved with a line lookup and a bisect rather than a scan through all the tokens
+class VirtualBufferTokenPositions:
+    line_starts: List[int]
+    line_offsets: List[List[int]]
+    outdated: bool = True
+
+    def __init__(self):
+        self.line_starts = []
+        self.line_offsets = []
+        self.outdated = True
+
+    # The tokens have changed and the positions cannot be used until they are updated
+    def mark_outdated(self):
+        self.outdated = True
+
+    # Update the positions of the reindexed tokens, starting from the line of the first token that has changed
+    # The lines before it are kept as their tokens have not moved
+    def update(self, tokens: List[VirtualBufferToken], token_index: int = 0):
+        starting_index = max(0, min(token_index, len(tokens) - 1))
+        while starting_index > 0 and not tokens[starting_index - 1].text.endswith("\n"):
+            starting_index -= 1
+
+        line_index = 0 if starting_index == 0 else tokens[starting_index - 1].line_index + 1
+        if line_index > len(self.line_starts):
+            line_index = 0
+            starting_index = 0
+        del self.line_starts[line_index:]
+        del self.line_offsets[line_index:]
+
+        offsets = None
+        for index in range(starting_index, len(tokens)):
+            if offsets is None:
+                offsets = []
+                self.line_starts.append(index)
+                self.line_offsets.append(offsets)
+
+            text = tokens[index].text
+            offsets.append((offsets[-1] if len(offsets) > 0 else 0) + len(text.replace("\n", "")))
+            if text.endswith("\n"):
+                offsets = None
+
+        self.outdated = False
+
+    # Find the first token that contains the caret position, along with the character index of the caret inside that token
+    def find(self, tokens: List[VirtualBufferToken], line_index: int, character_index: int) -> (int, int):
+        if line_index < 0 or line_index >= len(self.line_starts):
+            return -1, -1
+
+        offsets = self.line_offsets[line_index]
+        caret_offset = offsets[-1] - character_index
+        line_token_index = min(bisect_left(offsets, caret_offset), len(offsets) - 1)
+        token_index = self.line_starts[line_index] + line_token_index
+        token = tokens[token_index]
+        if token.index_from_line_end <= character_index and token.index_from_line_end + len(token.text) >= character_index:
+            return token_index, (len(token.text.replace("\n", "")) + token.index_from_line_end) - character_index
+        return -1, -1
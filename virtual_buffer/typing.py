@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import List, Self, Dict
+from dataclasses import dataclass, field
+from typing import List, Self, Dict, Tuple, Sequence, Iterator
+from itertools import islice
+from bisect import bisect_left
 
 # These values have been calculated with some deduction
 # And testing using expectations with a set of up to 5 word matches
@@ -14,6 +16,18 @@ class VirtualBufferToken:
     line_index: int = 0
     index_from_line_end: int = 0
 
+    # The phonetic keys and syllable count of the phrase, precomputed at index time
+    # So the matcher does not have to renormalize the buffer side for every query
+    # They are only valid for the phrase and language they were calculated with
+    phonetic_phrase: str = field(default=None, compare=False, repr=False)
+    phonetic_language: str = field(default=None, compare=False, repr=False)
+    strict_phonetics: str = field(default=None, compare=False, repr=False)
+    loose_phonetics: str = field(default=None, compare=False, repr=False)
+    syllables: int = field(default=0, compare=False, repr=False)
+
+    def has_phonetics(self, language: str) -> bool:
+        return self.phonetic_phrase is not None and self.phonetic_phrase == self.phrase and self.phonetic_language == language
+
 @dataclass
 class VirtualBufferTokenMatch:
     starts: int
@@ -63,16 +77,24 @@ class VirtualBufferMatchWords:
 # Keeps track of the visited branches and scores
 # So we can be intelligent about what branches we have already visited
 class VirtualBufferMatchVisitCache:
-    buffer_index_scores: Dict[int, List[float]]
-    visited_branches: Dict[str, float]
+    buffer_index_scores: List[float]
+    visited_branches: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], float]
     word_indices: Dict[str, List[int]]
     skip_indices: List[bool]
 
+    # Counters to see how much work the cache saves
+    visits: int = 0
+    hits: int = 0
+    skips: int = 0
+
     def __init__(self):
-        self.buffer_index_scores = {}
+        self.buffer_index_scores = []
         self.visited_branches = {}
         self.word_indices = {}
         self.skip_indices = []
+        self.visits = 0
+        self.hits = 0
+        self.skips = 0
     
     def index_token_list(self, token_list):
         self.word_indices = {}
@@ -82,6 +104,7 @@ class VirtualBufferMatchVisitCache:
             
             self.word_indices[token.phrase].append(token_list.index + index)
         self.skip_indices = [False for _ in range(token_list.length + token_list.index)]
+        self.buffer_index_scores = [-1 for _ in range(token_list.length + token_list.index)]
 
     def skip_word_sequence(self, words: List[str]):
         sequences = []
@@ -106,7 +129,10 @@ class VirtualBufferMatchVisitCache:
                 self.skip_indices[index] = True
     
     def should_skip_index(self, index: int):
-        return self.skip_indices[index] == True
+        if self.skip_indices[index] == True:
+            self.skips += 1
+            return True
+        return False
 
     def should_skip_sublist(self, sublist, match_calculation):
         sequence = ""
@@ -117,37 +143,80 @@ class VirtualBufferMatchVisitCache:
         # token_list sequence would be too short for a proper one-to-one match - skip entire token_list
         # NOTE - This is a naive skip, it could potentially skip over an exact match with a combined query search
         # But that is highly unlikely
-        return match_sequence in sequence
+        should_skip = match_sequence in sequence
+        if should_skip:
+            self.skips += 1
+        return should_skip
 
     def should_visit_branch(self, starting_query_index: List[int], next_query_index: List[int], starting_buffer_index: List[int], next_buffer_index: List[int], sublist) -> bool:
         key = self.get_cache_key(starting_query_index, next_query_index, starting_buffer_index, next_buffer_index, sublist)
-        return not key in self.visited_branches
+        self.visits += 1
+        if key in self.visited_branches:
+            self.hits += 1
+            return False
+        return True
 
     def cache_score(self, starting_query_index: List[int], next_query_index: List[int], starting_buffer_index: List[int], next_buffer_index: List[int], score: float, sublist):
         key = self.get_cache_key(starting_query_index, next_query_index, starting_buffer_index, next_buffer_index, sublist)
         self.visited_branches[key] = score
         self.cache_buffer_index_score(score, next_buffer_index, sublist)
     
+    # Keep the best score per buffer index, divided over the amount of buffer indices it was matched with
     def cache_buffer_index_score(self, score: float, local_buffer_indices: List[int], sublist):
-        for buffer_index in [sublist.to_global_index(local_buffer_index) for local_buffer_index in local_buffer_indices]:
-            if buffer_index not in self.buffer_index_scores:
-                self.buffer_index_scores[str(buffer_index)] = []
-            self.buffer_index_scores[str(buffer_index)].append(score / len(local_buffer_indices))
-
-    def get_cache_key(self, starting_query_index: List[int], next_query_index: List[int], starting_buffer_index: List[int], next_buffer_index: List[int], sublist) -> str:
-        source_pair = starting_query_index + [sublist.to_global_index(buffer_index) for buffer_index in starting_buffer_index]
-        source_pair = "-".join(list(map(lambda x: str(x), source_pair)))
-
-        target_pair = next_query_index + [sublist.to_global_index(buffer_index) for buffer_index in next_buffer_index]
-        target_pair = "-".join(list(map(lambda x, sublist=sublist: str(x), target_pair)))
-        return source_pair + ":" + target_pair if starting_query_index[0] < next_query_index[0] else target_pair + ":" + source_pair
+        score = score / len(local_buffer_indices)
+        for local_buffer_index in local_buffer_indices:
+            buffer_index = sublist.index + local_buffer_index
+            if buffer_index >= len(self.buffer_index_scores):
+                self.buffer_index_scores.extend([-1 for _ in range(buffer_index + 1 - len(self.buffer_index_scores))])
+            if score > self.buffer_index_scores[buffer_index]:
+                self.buffer_index_scores[buffer_index] = score
+
+    # The query indices and global buffer indices packed into a tuple, the same in both directions
+    def get_cache_key(self, starting_query_index: List[int], next_query_index: List[int], starting_buffer_index: List[int], next_buffer_index: List[int], sublist) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        source_pair = (*starting_query_index, *[sublist.index + buffer_index for buffer_index in starting_buffer_index])
+        target_pair = (*next_query_index, *[sublist.index + buffer_index for buffer_index in next_buffer_index])
+        return (source_pair, target_pair) if starting_query_index[0] < next_query_index[0] else (target_pair, source_pair)
 
     def get_highest_score_for_buffer_index(self, buffer_index) -> float:
-        if str(buffer_index) in self.buffer_index_scores:
-            return max(self.buffer_index_scores[str(buffer_index)])
+        if buffer_index < len(self.buffer_index_scores):
+            return self.buffer_index_scores[buffer_index]
         else:
             return -1
 
+    def get_statistics(self) -> Dict[str, int]:
+        return {"visits": self.visits, "hits": self.hits, "skips": self.skips}
+
+# Counters of the match trees handled while expanding the match roots of a single search
+# So the amount of work done by the worst case searches can be measured and bounded
+class VirtualBufferExpansionCounters:
+    created: int = 0
+    pruned: int = 0
+    deduplicated: int = 0
+    beam_pruned: int = 0
+    max_frontier: int = 0
+    windows_expanded: int = 0
+    windows_skipped: int = 0
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.created = 0
+        self.pruned = 0
+        self.deduplicated = 0
+        self.beam_pruned = 0
+        self.max_frontier = 0
+        self.windows_expanded = 0
+        self.windows_skipped = 0
+
+    def track_frontier(self, size: int):
+        if size > self.max_frontier:
+            self.max_frontier = size
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {"created": self.created, "pruned": self.pruned, "deduplicated": self.deduplicated, "beam_pruned": self.beam_pruned, "max_frontier": self.max_frontier, \
+            "windows_expanded": self.windows_expanded, "windows_skipped": self.windows_skipped}
+
 class VirtualBufferMatchCalculation:
     words: List[str]
     weights: List[float]
@@ -253,10 +322,56 @@ class VirtualBufferMatchCalculation:
     def get_starting_branches(self, sublist) -> List[VirtualBufferInitialBranch]:
         return sorted(list(set([branch for branch in self.starting_branches if sublist.is_valid_index(branch.buffer_indices[0] - sublist.index)])), key=lambda branch: branch.score, reverse=True)
 
+# A read-only range of tokens inside of a larger token list, without copying the tokens
+# Windows and sublists of the buffer are views on the same token list, so searching a large document does not copy it for every command
+# A view is only valid as long as the token list it refers to is not changed
+class VirtualBufferTokenView(Sequence):
+    source: List[VirtualBufferToken]
+    start: int
+    end: int
+
+    def __init__(self, source: List[VirtualBufferToken], start: int = 0, end: int = -1):
+        self.source = source
+        self.start = start
+        self.end = len(source) if end == -1 else end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, end, step = index.indices(self.end - self.start)
+            if step != 1:
+                return list(self)[index]
+            return VirtualBufferTokenView(self.source, self.start + start, self.start + max(start, end))
+
+        if index < 0:
+            index += self.end - self.start
+        if index < 0 or index >= self.end - self.start:
+            raise IndexError("token view index out of range")
+        return self.source[self.start + index]
+
+    def __iter__(self):
+        return islice(self.source, self.start, self.end)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, VirtualBufferTokenView)):
+            return len(self) == len(other) and all([a == b for a, b in zip(self, other)])
+        return False
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+# Create a view on a range of tokens, reusing the token list of the view if the tokens are a view already
+def get_token_view(tokens: Sequence[VirtualBufferToken], start: int, end: int) -> VirtualBufferTokenView:
+    if isinstance(tokens, VirtualBufferTokenView):
+        return VirtualBufferTokenView(tokens.source, tokens.start + start, tokens.start + end)
+    return VirtualBufferTokenView(tokens, start, end)
+
 @dataclass
 class VirtualBufferTokenList:
     index: int
-    tokens: List[VirtualBufferToken]
+    tokens: Sequence[VirtualBufferToken]
     end_index: int
     length: int
 
@@ -267,52 +382,56 @@ class VirtualBufferTokenList:
         self.length = len(tokens)
 
     # Get sublists in a windowed manner for rapid searching / elimination in large documents
-    def get_windowed_sublists(self, cursor_token_index, match_calculation: VirtualBufferMatchCalculation) -> List[Self]:
+    # The windows are generated lazily from the nearest to the furthest away from the cursor, alternating between the left and the right
+    # Windows at the same distance are generated from left to right, so searches that stop early never create the other windows
+    def get_windowed_sublists(self, cursor_token_index, match_calculation: VirtualBufferMatchCalculation) -> Iterator[Self]:
         sublist_size = max(25, len(match_calculation.words) * 5)
         if len(self.tokens) <= sublist_size * 2:
-            return [VirtualBufferTokenList(self.index, self.tokens)]
-        else:
-            window_overlap = len(match_calculation.words) * 2
-            starting_index = 0
-            sublists = []
-            while starting_index < len(self.tokens):
-                ending_index = min(len(self.tokens), starting_index + sublist_size)
-                sublists.append(self.get_sublist(starting_index, ending_index))
-                starting_index += sublist_size - window_overlap
-                if starting_index + sublist_size - window_overlap > len(self.tokens) - sublist_size:
-                    starting_index = len(self.tokens) - sublist_size - 1
-                    ending_index = min(len(self.tokens), starting_index + sublist_size)
-                    sublists.append(self.get_sublist(starting_index, ending_index))
-                    break
-
-            return sorted(sublists, key=lambda sublist, cursor_token_index=cursor_token_index: abs(sublist.index - cursor_token_index))
+            yield VirtualBufferTokenList(self.index, self.tokens)
+            return
+
+        starting_indices = self.get_window_starting_indices(sublist_size, len(match_calculation.words) * 2)
+        right = bisect_left(starting_indices, cursor_token_index - self.index)
+        left = right - 1
+        while left >= 0 or right < len(starting_indices):
+            if right >= len(starting_indices) or (left >= 0 and \
+                abs(self.index + starting_indices[left] - cursor_token_index) <= abs(self.index + starting_indices[right] - cursor_token_index)):
+                starting_index = starting_indices[left]
+                left -= 1
+            else:
+                starting_index = starting_indices[right]
+                right += 1
+            yield self.get_sublist(starting_index, min(len(self.tokens), starting_index + sublist_size))
+
+    # The starting indices of the overlapping windows, where the last window is aligned with the end of the token list
+    def get_window_starting_indices(self, sublist_size: int, window_overlap: int) -> List[int]:
+        starting_index = 0
+        starting_indices = []
+        while starting_index < len(self.tokens):
+            starting_indices.append(starting_index)
+            starting_index += sublist_size - window_overlap
+            if starting_index + sublist_size - window_overlap > len(self.tokens) - sublist_size:
+                starting_indices.append(len(self.tokens) - sublist_size - 1)
+                break
+        return starting_indices
 
     def get_sublist(self, starting_index: int, ending_index: int):
         # These use local indices that get translated to global indices later
         max_index = len(self.tokens)
-        sublist_tokens = []
         if starting_index <= ending_index and starting_index >= 0 and ending_index <= max_index:
-            sublist_tokens = self.tokens[starting_index:ending_index]
-        return VirtualBufferTokenList(self.index + starting_index, sublist_tokens)
+            return VirtualBufferTokenList(self.index + starting_index, get_token_view(self.tokens, starting_index, ending_index))
+        return VirtualBufferTokenList(self.index + starting_index, [])
 
     def filter_before_index(self, filter_index: int):
-        sublist_tokens = []
         if self.index < filter_index:
-            for token_index, token in enumerate(self.tokens):
-                if token_index + self.index < filter_index:
-                    sublist_tokens.append(token)
-        return VirtualBufferTokenList(self.index, sublist_tokens)
+            return VirtualBufferTokenList(self.index, get_token_view(self.tokens, 0, min(self.length, filter_index - self.index)))
+        return VirtualBufferTokenList(self.index, [])
 
     def filter_after_index(self, filter_index: int):
-        sublist_tokens = []
-        used_index = self.index
         if self.end_index > filter_index:
-            for token_index, token in enumerate(self.tokens):
-                if token_index + self.index > filter_index:
-                    if len(sublist_tokens) == 0:
-                        used_index = token_index + self.index
-                    sublist_tokens.append(token)
-        return VirtualBufferTokenList(used_index, sublist_tokens)
+            starting_index = max(0, filter_index + 1 - self.index)
+            return VirtualBufferTokenList(self.index + starting_index, get_token_view(self.tokens, starting_index, self.length))
+        return VirtualBufferTokenList(self.index, [])
 
     def is_valid_index(self, index) -> bool:
         return index >= 0 and index < self.length
@@ -431,6 +550,96 @@ class VirtualBufferTokenContext:
     current: VirtualBufferToken = None
     next: VirtualBufferToken = None
 
+# The amount of words around the caret that formatters, converters and the fixer get to see
+FORMATTER_CONTEXT_WORDS = 5
+
+# The text before and after the caret, or a possible selection, used while formatting an insert
+# The text is gathered lazily from the tokens around the caret, and only as far as the requested words or characters
+# So the cost of formatting does not grow with the length of the document
+class VirtualBufferFormatterContext:
+    tokens: List[VirtualBufferToken]
+    previous_index: Tuple[int, int]
+    next_index: Tuple[int, int]
+    texts: Dict[Tuple[bool, int, bool], str]
+
+    def __init__(self, tokens: List[VirtualBufferToken], previous_index: Tuple[int, int] = (-1, -1), next_index: Tuple[int, int] = (-1, -1)):
+        self.tokens = tokens
+        self.previous_index = previous_index
+        self.next_index = next_index
+        self.texts = {}
+
+    # The text pieces before the caret, from the caret backwards
+    def get_previous_pieces(self) -> Iterator[str]:
+        token_index, character_index = self.previous_index
+        if token_index > -1:
+            token = self.tokens[token_index]
+            if character_index > 0 and character_index <= len(token.text.replace("\n", "")):
+                yield token.text[:character_index]
+            for index in range(token_index - 1, -1, -1):
+                yield self.tokens[index].text
+
+    # The text pieces after the caret, from the caret forwards
+    def get_next_pieces(self) -> Iterator[str]:
+        token_index, character_index = self.next_index
+        if token_index > -1:
+            token = self.tokens[token_index]
+            if character_index > 0 and character_index < len(token.text.replace("\n", "")):
+                yield token.text[character_index:]
+            for index in range(token_index + 1, len(self.tokens)):
+                yield self.tokens[index].text
+
+    # Gather the pieces until the amount of whole words or characters has been reached
+    def gather(self, backwards: bool, amount: int, in_words: bool) -> str:
+        key = (backwards, amount, in_words)
+        if key not in self.texts:
+            pieces = []
+            words = 0
+            characters = 0
+            for piece in (self.get_previous_pieces() if backwards else self.get_next_pieces()):
+                if piece == "":
+                    continue
+
+                # The word at the edge of the gathered text is only complete when it is separated from the next piece by whitespace
+                adjacent_character = piece[-1] if backwards else piece[0]
+                separated = len(pieces) == 0 or adjacent_character.isspace() or pieces[-1][0 if backwards else -1].isspace()
+                if in_words and words >= amount and separated:
+                    break
+
+                piece_words = len(piece.split())
+                if piece_words > 0 and not separated:
+                    piece_words -= 1
+                words += piece_words
+                characters += len(piece)
+                pieces.append(piece)
+                if not in_words and characters >= amount:
+                    break
+
+            text = "".join(reversed(pieces) if backwards else pieces)
+            if not in_words:
+                text = text[-amount:] if backwards else text[:amount]
+            self.texts[key] = text
+        return self.texts[key]
+
+    # The text before the caret, starting at a whole word
+    def get_previous_text(self, words: int = FORMATTER_CONTEXT_WORDS) -> str:
+        return self.gather(True, words, True)
+
+    # The text after the caret, ending at a whole word
+    def get_next_text(self, words: int = FORMATTER_CONTEXT_WORDS) -> str:
+        return self.gather(False, words, True)
+
+    def get_previous_words(self, words: int = FORMATTER_CONTEXT_WORDS) -> List[str]:
+        return self.get_previous_text(words).split()[-words:] if words > 0 else []
+
+    def get_next_words(self, words: int = FORMATTER_CONTEXT_WORDS) -> List[str]:
+        return self.get_next_text(words).split()[:words]
+
+    def get_previous_characters(self, characters: int) -> str:
+        return self.gather(True, characters, False) if characters > 0 else ""
+
+    def get_next_characters(self, characters: int) -> str:
+        return self.gather(False, characters, False) if characters > 0 else ""
+
 @dataclass
 class InputMutation:
     time: float
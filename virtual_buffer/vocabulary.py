@@ -0,0 +1,202 @@
+from ..phonetics.phonetics import PhoneticSearch
+from ..phonetics.detection import EXACT_MATCH, HOMOPHONE_MATCH, PHONETIC_MATCH
+from .indexer import update_token_phonetics
+from .typing import VirtualBufferToken
+from typing import List, Dict, Tuple, Set
+
+# Count the character pairs in a phonetic key
+def get_bigrams(key: str) -> Dict[str, int]:
+    bigrams = {}
+    for index in range(len(key) - 1):
+        bigram = key[index:index + 2]
+        bigrams[bigram] = bigrams.get(bigram, 0) + 1
+    return bigrams
+
+# The lowest possible levenshtein distance between two keys, based on their lengths and the amount of bigrams they share
+# Every edit can remove at most two of the shared bigrams, so keys that share few bigrams must be far apart
+def get_minimum_distance(length_a: int, length_b: int, common_bigrams: int) -> int:
+    missing_bigrams = max(length_a - 1, length_b - 1, 0) - common_bigrams
+    return max(abs(length_a - length_b), (missing_bigrams + 1) // 2)
+
+# The highest possible similarity score of a single key distance, mirroring the way the scores are calculated
+def get_maximum_key_score(length_a: int, length_b: int, common_bigrams: int) -> float:
+    longest_length = max(length_a, length_b)
+    distance = get_minimum_distance(length_a, length_b, common_bigrams)
+    return (longest_length - distance) / longest_length if distance < longest_length else 0
+
+# Keeps track of the distinct words inside of a virtual buffer along with bigram indexes of their phonetic keys
+# So we can quickly determine which words could possibly reach a score for a query, without scoring every word
+# The buffer adds and removes the words of the tokens it changes, so the index stays in sync without walking through the tokens
+# Only when the tokens are replaced as a whole is the vocabulary marked as outdated, and synced with all the tokens on its next use
+class VirtualBufferVocabulary:
+    phonetic_search: PhoneticSearch
+    language: str = ""
+    outdated: bool = True
+    word_counts: Dict[str, int]
+    word_phonetics: Dict[str, Tuple[str, str]]
+    homophone_words: Dict[str, Set[str]]
+    phonetic_words: Dict[str, Set[str]]
+    homophone_bigrams: Dict[str, Dict[str, int]]
+    phonetic_bigrams: Dict[str, Dict[str, int]]
+    upper_bounds: Dict[str, Dict[str, float]]
+
+    def __init__(self, phonetic_search: PhoneticSearch):
+        self.phonetic_search = phonetic_search
+        self.clear()
+        self.outdated = True
+
+    def clear(self):
+        self.language = self.phonetic_search.language
+        self.word_counts = {}
+        self.word_phonetics = {}
+        self.homophone_words = {}
+        self.phonetic_words = {}
+        self.homophone_bigrams = {}
+        self.phonetic_bigrams = {}
+        self.upper_bounds = {}
+
+    def mark_outdated(self):
+        self.outdated = True
+
+    # Only walk through the tokens if they were replaced as a whole, or the language has changed since the last sync
+    def sync_changes(self, tokens: List[VirtualBufferToken]):
+        if self.outdated or self.language != self.phonetic_search.language:
+            self.sync(tokens)
+
+        # Learned similarities can change the bounds between searches, so they are only kept for a single search
+        else:
+            self.upper_bounds = {}
+
+    # Rebuild the index from all the tokens, only needed when the tokens were replaced as a whole
+    def sync(self, tokens: List[VirtualBufferToken]):
+        self.clear()
+        self.outdated = False
+        self.add_tokens(tokens)
+
+    # Count the words of tokens added to the buffer, only words that were not in the buffer yet need to be indexed
+    # While the vocabulary is outdated the changes are skipped, as the next sync counts all the tokens again
+    def add_tokens(self, tokens: List[VirtualBufferToken]):
+        if self.outdated:
+            return
+
+        for token in tokens:
+            word = token.phrase.replace(" ", "")
+            if word in self.word_counts:
+                self.word_counts[word] += 1
+            else:
+                self.add_word(word, update_token_phonetics(token, self.phonetic_search))
+
+    # Uncount the words of tokens removed from the buffer, and remove the words that no longer occur from the index
+    def remove_tokens(self, tokens: List[VirtualBufferToken]):
+        if self.outdated:
+            return
+
+        for token in tokens:
+            word = token.phrase.replace(" ", "")
+            if self.word_counts.get(word, 0) > 1:
+                self.word_counts[word] -= 1
+            elif word in self.word_counts:
+                self.remove_word(word)
+
+    def add_word(self, word: str, token: VirtualBufferToken):
+        self.upper_bounds = {}
+        self.word_counts[word] = 1
+        self.word_phonetics[word] = (token.strict_phonetics, token.loose_phonetics)
+        if token.strict_phonetics not in self.homophone_words:
+            self.homophone_words[token.strict_phonetics] = set()
+        self.homophone_words[token.strict_phonetics].add(word)
+        if token.loose_phonetics not in self.phonetic_words:
+            self.phonetic_words[token.loose_phonetics] = set()
+        self.phonetic_words[token.loose_phonetics].add(word)
+        for bigram, count in get_bigrams(token.strict_phonetics).items():
+            if bigram not in self.homophone_bigrams:
+                self.homophone_bigrams[bigram] = {}
+            self.homophone_bigrams[bigram][word] = count
+        for bigram, count in get_bigrams(token.loose_phonetics).items():
+            if bigram not in self.phonetic_bigrams:
+                self.phonetic_bigrams[bigram] = {}
+            self.phonetic_bigrams[bigram][word] = count
+
+    def remove_word(self, word: str):
+        self.upper_bounds = {}
+        homophone, phonetic = self.word_phonetics[word]
+        self.homophone_words[homophone].discard(word)
+        if len(self.homophone_words[homophone]) == 0:
+            del self.homophone_words[homophone]
+        self.phonetic_words[phonetic].discard(word)
+        if len(self.phonetic_words[phonetic]) == 0:
+            del self.phonetic_words[phonetic]
+        for bigram in get_bigrams(homophone):
+            del self.homophone_bigrams[bigram][word]
+            if len(self.homophone_bigrams[bigram]) == 0:
+                del self.homophone_bigrams[bigram]
+        for bigram in get_bigrams(phonetic):
+            del self.phonetic_bigrams[bigram][word]
+            if len(self.phonetic_bigrams[bigram]) == 0:
+                del self.phonetic_bigrams[bigram]
+        del self.word_phonetics[word]
+        del self.word_counts[word]
+
+    def get_common_bigrams(self, key: str, bigram_index: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+        common_bigrams = {}
+        for bigram, count in get_bigrams(key).items():
+            if bigram in bigram_index:
+                for word, word_count in bigram_index[bigram].items():
+                    common_bigrams[word] = common_bigrams.get(word, 0) + min(count, word_count)
+        return common_bigrams
+
+    # Calculate the highest score every word in the vocabulary could possibly have with the query
+    # The exact score of a word is never higher than its bound, so words below a threshold do not need to be scored
+    def get_score_upper_bounds(self, query: str) -> Dict[str, float]:
+        if query in self.upper_bounds:
+            return self.upper_bounds[query]
+
+        homophone_query, phonetic_query, _ = self.phonetic_search.get_phonetic_keys(query)
+        common_homophone_bigrams = self.get_common_bigrams(homophone_query, self.homophone_bigrams)
+        common_phonetic_bigrams = self.get_common_bigrams(phonetic_query, self.phonetic_bigrams)
+
+        upper_bounds = {}
+        for word, (homophone, phonetic) in self.word_phonetics.items():
+            if word == query or homophone == homophone_query or \
+                self.phonetic_search.is_homophone(word, query) or self.phonetic_search.is_semantically_similar(word, query):
+                upper_bounds[word] = EXACT_MATCH
+            else:
+                homophone_score = get_maximum_key_score(len(homophone), len(homophone_query), common_homophone_bigrams.get(word, 0))
+                phonetic_score = get_maximum_key_score(len(phonetic), len(phonetic_query), common_phonetic_bigrams.get(word, 0))
+
+                # Short words can be scored on their homophone distance alone
+                upper_bound = (homophone_score + phonetic_score) / 2
+                if len(word) <= 3 and len(query) <= 3:
+                    upper_bound = max(homophone_score, upper_bound)
+                upper_bounds[word] = upper_bound
+
+        self.upper_bounds[query] = upper_bounds
+        return upper_bounds
+
+    # Whether any word in the vocabulary reaches the minimum score with the query
+    # Exact words, known homophones and equal phonetic keys are looked up directly
+    # Only words that share the loose phonetic key or whose upper bound reaches the score are scored with the fuzzy matching
+    def has_matching_word(self, query: str, min_score: float) -> bool:
+        if query in self.word_counts:
+            return True
+
+        if HOMOPHONE_MATCH >= min_score:
+            if any([homophone.lower() in self.word_counts for homophone in self.phonetic_search.find_homophones(query)]):
+                return True
+        if PHONETIC_MATCH >= min_score:
+            if any([similarity.lower() in self.word_counts for similarity in self.phonetic_search.find_semantic_similarities(query)]):
+                return True
+
+        homophone_query, phonetic_query, _ = self.phonetic_search.get_phonetic_keys(query)
+        if HOMOPHONE_MATCH >= min_score and homophone_query in self.homophone_words:
+            return True
+
+        candidates = list(self.phonetic_words.get(phonetic_query, []))
+        candidates.extend([word for word, upper_bound in self.get_score_upper_bounds(query).items() \
+            if upper_bound >= min_score and word not in self.phonetic_words.get(phonetic_query, [])])
+        for word in candidates:
+            score = self.phonetic_search.phonetic_similarity_score(query, word, (homophone_query, phonetic_query), self.word_phonetics[word], min_score=min_score)
+            if score >= min_score:
+                return True
+
+        return False